@@ -0,0 +1,87 @@
+"""
+Execution layer for running ADK agents without blocking the FastAPI event loop.
+
+``Runner.run`` is a synchronous generator and the agent tools (Firestore,
+Imagen, Veo, GCS) are blocking calls, so every agent invocation is handed to a
+bounded worker pool. Each kind of generation also has its own concurrency
+limit so that, for example, a burst of video generations cannot starve SEO
+generation for newly added products.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+AGENT_WORKER_THREADS = int(os.getenv("AGENT_WORKER_THREADS", "16"))
+
+# Maximum number of concurrent runs per kind of agent
+AGENT_CONCURRENCY_LIMITS = {
+    "seo": int(os.getenv("AGENT_SEO_CONCURRENCY", "4")),
+    "content": int(os.getenv("AGENT_CONTENT_CONCURRENCY", "4")),
+    "media": int(os.getenv("AGENT_MEDIA_CONCURRENCY", "2")),
+    "market_analysis": int(os.getenv("AGENT_MARKET_ANALYSIS_CONCURRENCY", "2")),
+}
+DEFAULT_CONCURRENCY_LIMIT = int(os.getenv("AGENT_DEFAULT_CONCURRENCY", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=AGENT_WORKER_THREADS, thread_name_prefix="adk-agent")
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+_running: Dict[str, int] = {}
+_waiting: Dict[str, int] = {}
+
+
+def _get_semaphore(kind: str) -> asyncio.Semaphore:
+    """Get (or lazily create) the semaphore for a kind of agent run"""
+    semaphore = _semaphores.get(kind)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(AGENT_CONCURRENCY_LIMITS.get(kind, DEFAULT_CONCURRENCY_LIMIT))
+        _semaphores[kind] = semaphore
+    return semaphore
+
+
+async def run_agent(runner, kind: str, *, user_id: str, session_id: str, new_message) -> List[Any]:
+    """
+    Run an ADK runner in the worker pool and return all of its events.
+
+    Waits for a free slot in the ``kind`` concurrency limit first, so excess
+    requests queue on the event loop instead of piling up worker threads.
+    Exceptions raised by the runner (e.g. "Session not found") propagate to
+    the caller unchanged.
+    """
+    semaphore = _get_semaphore(kind)
+    _waiting[kind] = _waiting.get(kind, 0) + 1
+    try:
+        await semaphore.acquire()
+    finally:
+        _waiting[kind] -= 1
+
+    _running[kind] = _running.get(kind, 0) + 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _executor,
+            lambda: list(runner.run(user_id=user_id, session_id=session_id, new_message=new_message))
+        )
+    finally:
+        _running[kind] -= 1
+        semaphore.release()
+
+
+def get_agent_executor_stats() -> Dict[str, Any]:
+    """Current pool size, limits and in-flight/queued runs per kind"""
+    kinds = set(AGENT_CONCURRENCY_LIMITS) | set(_semaphores)
+    return {
+        "worker_threads": AGENT_WORKER_THREADS,
+        "kinds": {
+            kind: {
+                "limit": AGENT_CONCURRENCY_LIMITS.get(kind, DEFAULT_CONCURRENCY_LIMIT),
+                "running": _running.get(kind, 0),
+                "waiting": _waiting.get(kind, 0),
+            }
+            for kind in sorted(kinds)
+        },
+    }
+
+
+def shutdown_agent_executor():
+    """Stop accepting new agent runs and wait for in-flight ones to finish"""
+    _executor.shutdown(wait=True)
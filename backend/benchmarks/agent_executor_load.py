@@ -0,0 +1,123 @@
+"""
+Read-endpoint latency while agent generations are running.
+
+A fake ADK runner whose `run()` blocks like the real one (model calls and
+Firestore/GCS writes in the tools) is driven through two versions of a
+generation endpoint:
+
+* inline   – the handler iterates `runner.run()` on the event loop (before agent_executor)
+* executor – the handler awaits `agent_executor.run_agent()`
+
+While the generations run, a stream of GET requests hits a cheap read
+endpoint; their p50 / p99 / max latency is what a user browsing products
+sees during generation load.
+
+Run from backend/:
+
+    python -m benchmarks.agent_executor_load [--generations 8] [--run-seconds 0.5] [--gets 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+import agent_executor
+from agent_executor import run_agent
+
+
+class BlockingRunner:
+    """Stands in for google.adk Runner: a synchronous generator that blocks between events"""
+
+    def __init__(self, run_seconds: float, events: int = 5):
+        self.step = run_seconds / events
+        self.events = events
+
+    def run(self, user_id, session_id, new_message):
+        for index in range(self.events):
+            time.sleep(self.step)
+            yield {"event": index}
+
+
+def build_app(runner: BlockingRunner) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/products/{product_id}")
+    async def read_product(product_id: str):
+        return {"product_id": product_id}
+
+    @app.post("/inline/generate")
+    async def generate_inline():
+        events = list(runner.run(user_id="u", session_id="s", new_message=None))
+        return {"events": len(events)}
+
+    @app.post("/executor/generate")
+    async def generate_executor():
+        events = await run_agent(runner, "content", user_id="u", session_id="s", new_message=None)
+        return {"events": len(events)}
+
+    return app
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def measure(mode: str, app: FastAPI, generations: int, gets: int, get_interval: float):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+
+        async def one_get(index, due):
+            await client.get(f"/products/p{index}")
+            # Measured from when the request was due, not when the blocked loop got to send it
+            latencies.append(time.perf_counter() - due)
+
+        started = time.perf_counter()
+        generation_tasks = [
+            asyncio.create_task(client.post(f"/{mode}/generate", timeout=None)) for _ in range(generations)
+        ]
+        get_tasks = []
+        for index in range(gets):
+            due = started + index * get_interval
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            get_tasks.append(asyncio.create_task(one_get(index, due)))
+        await asyncio.gather(*get_tasks)
+        await asyncio.gather(*generation_tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "total_s": elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generations", type=int, default=8, help="Concurrent generation requests")
+    parser.add_argument("--run-seconds", type=float, default=0.5, help="Blocking time of one runner.run()")
+    parser.add_argument("--gets", type=int, default=200, help="Read requests issued during the load")
+    parser.add_argument("--get-interval", type=float, default=0.005, help="Seconds between read requests")
+    args = parser.parse_args()
+
+    # One kind-limit large enough for the whole burst, so only the blocking differs
+    agent_executor.AGENT_CONCURRENCY_LIMITS["content"] = args.generations
+    app = build_app(BlockingRunner(args.run_seconds))
+
+    print(f"{args.generations} generations x {args.run_seconds}s blocking, {args.gets} GETs")
+    print(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}")
+    for mode in ("inline", "executor"):
+        result = await measure(mode, app, args.generations, args.gets, args.get_interval)
+        print(f"{result['mode']:<10}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+              f"{result['max_ms']:>10.1f}{result['total_s']:>10.2f}")
+    agent_executor.shutdown_agent_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
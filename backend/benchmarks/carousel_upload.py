@@ -0,0 +1,87 @@
+"""
+Carousel upload time: one blob after another vs upload_blobs_concurrently.
+
+Uploads go to a stand-in bucket whose blobs sleep for a fixed time per
+upload (the GCS round trip), so the numbers show how much of the fan-out
+actually overlaps. The peak number of uploads in progress at once is
+reported as well.
+
+Run from backend/:
+
+    python -m benchmarks.carousel_upload [--upload-seconds 0.2] [--sizes 2 5 10]
+"""
+import argparse
+import threading
+import time
+
+import firebase_utils
+from firebase_utils import upload_blobs_concurrently
+
+
+class SleepingBucket:
+    """Bucket stand-in: every upload_from_string blocks for `upload_seconds`"""
+
+    def __init__(self, upload_seconds: float):
+        self.upload_seconds = upload_seconds
+        self.in_progress = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def blob(self, path):
+        return SleepingBlob(self, path)
+
+
+class SleepingBlob:
+    def __init__(self, bucket: SleepingBucket, path: str):
+        self.bucket = bucket
+        self.metadata = None
+        self.public_url = f"https://storage.googleapis.com/bench/{path}"
+
+    def upload_from_string(self, data, content_type=None, predefined_acl=None):
+        with self.bucket._lock:
+            self.bucket.in_progress += 1
+            self.bucket.peak = max(self.bucket.peak, self.bucket.in_progress)
+        try:
+            time.sleep(self.bucket.upload_seconds)
+        finally:
+            with self.bucket._lock:
+                self.bucket.in_progress -= 1
+
+
+def carousel(size: int):
+    return [
+        {"gcs_path": f"brand/product/instagram/carousel_{i}.png", "data": b"\x89PNG" + bytes(1024), "content_type": "image/png"}
+        for i in range(size)
+    ]
+
+
+def serial(uploads, bucket):
+    """What the carousel tool did before: one upload at a time (its extra make_public call is not counted)"""
+    return [upload_blobs_concurrently([upload], target_bucket=bucket)[0] for upload in uploads]
+
+
+def timed(fn, uploads, bucket):
+    started = time.perf_counter()
+    results = fn(uploads, bucket)
+    assert all("public_url" in r for r in results)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upload-seconds", type=float, default=0.2, help="Simulated time of one GCS upload")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 5, 10], help="Carousel sizes to upload")
+    args = parser.parse_args()
+
+    print(f"{args.upload_seconds}s per upload, {firebase_utils.MEDIA_UPLOAD_WORKERS} upload workers")
+    print(f"{'images':>7}{'serial s':>11}{'concurrent s':>14}{'speedup':>9}{'peak':>6}")
+    for size in args.sizes:
+        uploads = carousel(size)
+        serial_s = timed(serial, uploads, SleepingBucket(args.upload_seconds))
+        bucket = SleepingBucket(args.upload_seconds)
+        concurrent_s = timed(lambda u, b: upload_blobs_concurrently(u, target_bucket=b), uploads, bucket)
+        print(f"{size:>7}{serial_s:>11.2f}{concurrent_s:>14.2f}{serial_s / concurrent_s:>8.1f}x{bucket.peak:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import copy
+import hashlib
+import os
+import threading
+import time
 import uuid
 import logging
 logger = logging.getLogger(__name__)
@@ -22,6 +30,166 @@ except Exception as e:
     bucket = None
 
 
+# ---------------------------------------------------------------------------
+# Process-local read-through cache for brand profiles and products
+# ---------------------------------------------------------------------------
+
+CACHE_ENABLED = os.environ.get('FIRESTORE_CACHE_ENABLED', 'true').lower() == 'true'
+CACHE_TTL_SECONDS = float(os.environ.get('FIRESTORE_CACHE_TTL_SECONDS', '30'))
+CACHE_MAX_ENTRIES = int(os.environ.get('FIRESTORE_CACHE_MAX_ENTRIES', '1024'))
+# When enabled, every cached document gets a Firestore snapshot listener that
+# drops the entry as soon as the document changes (e.g. written by another replica)
+CACHE_LISTENER_ENABLED = os.environ.get('FIRESTORE_CACHE_LISTENER', 'false').lower() == 'true'
+
+
+class DocumentCache:
+    """Thread-safe TTL + LRU cache of Firestore document dicts.
+
+    Values are deep-copied on the way in and out so callers can mutate
+    what they get back without corrupting the cache.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._watches: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        value = copy.deepcopy(value)
+        evicted = []
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                evicted.append(self._watches.pop(old_key, None))
+        self._unsubscribe(evicted)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+            watch = self._watches.pop(key, None)
+        self._unsubscribe([watch])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            watches = list(self._watches.values())
+            self._watches.clear()
+        self._unsubscribe(watches)
+
+    def watch(self, key: str, doc_ref):
+        """Invalidate `key` whenever the Firestore document changes"""
+        with self._lock:
+            if key in self._watches:
+                return
+            self._watches[key] = None
+
+        initial = [True]
+
+        def on_change(doc_snapshots, changes, read_time):
+            # The first callback delivers the current state, not a change
+            if initial[0]:
+                initial[0] = False
+                return
+            self.invalidate(key)
+
+        try:
+            watch = doc_ref.on_snapshot(on_change)
+        except Exception as e:
+            print(f"Error watching {self.name} document {key}: {str(e)}")
+            with self._lock:
+                self._watches.pop(key, None)
+            return
+
+        with self._lock:
+            if key in self._watches and self._watches[key] is None:
+                self._watches[key] = watch
+                return
+        # Invalidated while the listener was being registered
+        self._unsubscribe([watch])
+
+    def _unsubscribe(self, watches):
+        for watch in watches:
+            if watch is None:
+                continue
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                print(f"Error removing {self.name} cache listener: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'listeners': len(self._watches)
+            }
+
+
+_brand_cache = DocumentCache('brand_profiles', CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES)
+_product_cache = DocumentCache('products', CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES)
+
+
+def _cache_get(cache: DocumentCache, key: str) -> Optional[Dict[str, Any]]:
+    if not CACHE_ENABLED or not key:
+        return None
+    return cache.get(key)
+
+def _cache_put(cache: DocumentCache, key: str, value: Optional[Dict[str, Any]], doc_ref=None):
+    # Missing documents are not cached: they may be created by another replica
+    if not CACHE_ENABLED or not key or not value:
+        return
+    cache.put(key, value)
+    if CACHE_LISTENER_ENABLED and doc_ref is not None:
+        cache.watch(key, doc_ref)
+
+def invalidate_brand_cache(brand_id: str):
+    """Drop a cached brand profile; call after writing brand_profiles/{brand_id} directly"""
+    _brand_cache.invalidate(brand_id)
+
+def invalidate_product_cache(product_id: str):
+    """Drop a cached product; call after writing products/{product_id} directly"""
+    _product_cache.invalidate(product_id)
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and sizes of the document caches"""
+    return {
+        'enabled': CACHE_ENABLED,
+        'listener_invalidation': CACHE_LISTENER_ENABLED,
+        'brand_profiles': _brand_cache.stats(),
+        'products': _product_cache.stats()
+    }
+
+
 
 def store_formatted_content(query, user_id, session_id, structured_content, raw_responses):
     """
@@ -247,6 +415,7 @@ def store_brand_profile(brand_name, description, logo_url, brand_id=None,marketi
             'marketing_platforms': marketing_platforms or [],
             'timestamp': datetime.now().isoformat()
         })
+        invalidate_brand_cache(brand_id)
         
         return brand_id
     except Exception as e:
@@ -256,9 +425,16 @@ def store_brand_profile(brand_name, description, logo_url, brand_id=None,marketi
 def get_brand_profile_by_id(brand_id):
     """Retrieve brand profile by ID."""
     try:
-        doc = db.collection('brand_profiles').document(brand_id).get()
+        cached = _cache_get(_brand_cache, brand_id)
+        if cached is not None:
+            return cached
+
+        doc_ref = db.collection('brand_profiles').document(brand_id)
+        doc = doc_ref.get()
         if doc.exists:
-            return doc.to_dict()
+            brand_data = doc.to_dict()
+            _cache_put(_brand_cache, brand_id, brand_data, doc_ref)
+            return brand_data
         return None
     except Exception as e:
         print(f"Error retrieving brand profile: {str(e)}")
@@ -270,6 +446,7 @@ def update_brand_logo_url(brand_id, logo_url):
         db.collection('brand_profiles').document(brand_id).update({
             'logo_url': logo_url
         })
+        invalidate_brand_cache(brand_id)
         return True
     except Exception as e:
         print(f"Error updating logo URL: {str(e)}")
@@ -322,14 +499,17 @@ def store_product(brand_id, product_name, description, category=None):
         product_id = str(uuid.uuid4())
         
         # Create a new document in the products collection
-        db.collection('products').document(product_id).set({
+        product_data = {
             'product_id': product_id,
             'brand_id': brand_id,
             'product_name': product_name,
             'description': description,
             'category': category,
             'timestamp': datetime.now().isoformat()
-        })
+        }
+        product_ref = db.collection('products').document(product_id)
+        product_ref.set(product_data)
+        _cache_put(_product_cache, product_id, product_data, product_ref)
         
         return product_id
     except Exception as e:
@@ -343,7 +523,11 @@ def get_products_by_brand(brand_id):
         products = db.collection('products').where('brand_id', '==', brand_id).stream()
         
         # Convert to list of dictionaries
-        product_list = [doc.to_dict() for doc in products]
+        product_list = []
+        for doc in products:
+            product_data = doc.to_dict()
+            _cache_put(_product_cache, doc.id, product_data)
+            product_list.append(product_data)
         
         return product_list
     except Exception as e:
@@ -353,9 +537,16 @@ def get_products_by_brand(brand_id):
 def get_product_by_id(product_id):
     """Retrieve a product by ID."""
     try:
-        doc = db.collection('products').document(product_id).get()
+        cached = _cache_get(_product_cache, product_id)
+        if cached is not None:
+            return cached
+
+        doc_ref = db.collection('products').document(product_id)
+        doc = doc_ref.get()
         if doc.exists:
-            return doc.to_dict()
+            product_data = doc.to_dict()
+            _cache_put(_product_cache, product_id, product_data, doc_ref)
+            return product_data
         return None
     except Exception as e:
         print(f"Error retrieving product: {str(e)}")
@@ -373,6 +564,7 @@ def update_brand_marketing_platforms(brand_id: str, platforms: List[str]):
         brand_ref.update({
             'marketing_platforms': platforms
         })
+        invalidate_brand_cache(brand_id)
         
         return True
     except Exception as e:
@@ -399,6 +591,7 @@ def update_brand_profile(brand_id: str, brand_data: Dict[str, Any]) -> bool:
         
         # Update the document with the new data
         brand_ref.update(brand_data)
+        invalidate_brand_cache(brand_id)
         
         logger.info(f"Successfully updated brand profile {brand_id}")
         return True
@@ -407,50 +600,187 @@ def update_brand_profile(brand_id: str, brand_data: Dict[str, Any]) -> bool:
         return False
 
 
+MEDIA_UPLOAD_WORKERS = int(os.environ.get('MEDIA_UPLOAD_WORKERS', '8'))
+_media_upload_executor = ThreadPoolExecutor(max_workers=MEDIA_UPLOAD_WORKERS, thread_name_prefix="gcs-upload")
+
+def upload_blobs_concurrently(uploads: List[Dict[str, Any]], target_bucket=None, public: bool = True) -> List[Dict[str, Any]]:
+    """
+    Upload several blobs to Cloud Storage in parallel.
+
+    Args:
+        uploads: One dict per blob with 'gcs_path', 'data' (bytes), 'content_type'
+            and optionally 'metadata'
+        target_bucket: Bucket to upload to (defaults to the Firebase bucket)
+        public: Apply the publicRead ACL in the upload request itself, instead of
+            a separate make_public() call per blob
+
+    Returns:
+        A result per upload, in the same order as `uploads`: {'gcs_path', 'public_url'}
+        on success or {'gcs_path', 'error'} on failure
+    """
+    target_bucket = target_bucket or bucket
+
+    def upload_one(upload):
+        try:
+            blob = target_bucket.blob(upload['gcs_path'])
+            if upload.get('metadata'):
+                blob.metadata = upload['metadata']
+            blob.upload_from_string(
+                upload['data'],
+                content_type=upload.get('content_type'),
+                predefined_acl="publicRead" if public else None
+            )
+            return {'gcs_path': upload['gcs_path'], 'public_url': blob.public_url}
+        except Exception as e:
+            print(f"Error uploading {upload['gcs_path']}: {str(e)}")
+            return {'gcs_path': upload['gcs_path'], 'error': str(e)}
+
+    if len(uploads) == 1:
+        return [upload_one(uploads[0])]
+    return list(_media_upload_executor.map(upload_one, uploads))
+
+def _brand_folder_name(brand_id):
+    """Sanitized brand name used as the top-level media folder"""
+    brand_data = get_brand_profile_by_id(brand_id)
+    brand_name = brand_data.get("brand_name", "unnamed_brand") if brand_data else "unnamed_brand"
+    return brand_name.lower().replace(" ", "_")
+
+def _media_gcs_path(safe_brand_name, product_id, platform, media_type, index=None):
+    """Storage path for an uploaded product media file: brand/product/platform/[carousel/]filename"""
+    safe_product_id = product_id.lower().replace(" ", "_")
+    
+    if media_type == "carousel":
+        # For carousel items
+        filename = f"{platform.lower()}_{product_id}_carousel_{index+1 if index is not None else 'new'}.png"
+        return f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/carousel/{filename}"
+    elif media_type == "video":
+        filename = f"{platform.lower()}_{product_id}_video.mp4"
+        return f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/{filename}"
+    # Single image
+    filename = f"{platform.lower()}_{product_id}_image.png"
+    return f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/{filename}"
+
+def _media_content_type(filename, media_type):
+    extension = os.path.splitext(filename)[1]
+    return "video/mp4" if media_type == "video" else f"image/{extension[1:]}"
+
 def upload_media_to_firebase(file_bytes, filename, brand_id, product_id, platform, media_type, index=None):
     """Upload media file to Firebase Storage and return the URL"""
     try:
-        # Get brand name from brand_id
-        brand_data = get_brand_profile_by_id(brand_id)
-        brand_name = brand_data.get("brand_name", "unnamed_brand") if brand_data else "unnamed_brand"
+        result = upload_blobs_concurrently([{
+            'gcs_path': _media_gcs_path(_brand_folder_name(brand_id), product_id, platform, media_type, index),
+            'data': file_bytes,
+            'content_type': _media_content_type(filename, media_type),
+            'metadata': {'Cache-Control': 'no-cache, max-age=0'}
+        }])[0]
+        if 'error' in result:
+            raise Exception(result['error'])
         
-        # Sanitize names for folder structure
-        safe_brand_name = brand_name.lower().replace(" ", "_")
-        safe_product_id = product_id.lower().replace(" ", "_")
-            
-        # Generate a unique filename
-        extension = os.path.splitext(filename)[1]
-        timestamp = int(datetime.now().timestamp())
-        
-        if media_type == "carousel":
-            # For carousel items
-            filename = f"{platform.lower()}_{product_id}_carousel_{index+1 if index is not None else 'new'}.png"
-            gcs_path = f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/carousel/{filename}"
-        elif media_type == "video":
-            filename = f"{platform.lower()}_{product_id}_video.mp4"
-            gcs_path = f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/{filename}"
-        else:
-            # Single image
-            filename = f"{platform.lower()}_{product_id}_image.png"
-            gcs_path = f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/{filename}"
+        # Return the public URL
+        return result['public_url']
         
-        # Upload to Google Cloud Storage
-        blob = bucket.blob(gcs_path)
+    except Exception as e:
+        print(f"Error uploading media to Firebase: {str(e)}")
+        raise
+
+MEDIA_UPLOAD_CHUNK_SIZE = int(os.environ.get('MEDIA_UPLOAD_CHUNK_SIZE', str(4 * 1024 * 1024)))
+
+class _ChecksumReader:
+    """Read-only file wrapper that counts bytes and computes their MD5 as they stream through.
+
+    Rewinds done by the resumable upload on retry are passed through to the
+    underlying file; bytes already hashed are not hashed twice.
+    """
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        self._start = fileobj.tell()
+        self._hashed_to = self._start
+        self.md5 = hashlib.md5()
+
+    @property
+    def size(self):
+        return self._hashed_to - self._start
+
+    def read(self, size=-1):
+        position = self._file.tell()
+        data = self._file.read(size)
+        end = position + len(data)
+        if end > self._hashed_to:
+            self.md5.update(data[self._hashed_to - position:])
+            self._hashed_to = end
+        return data
+
+    def tell(self):
+        return self._file.tell()
 
-        metadata = {'Cache-Control': 'no-cache, max-age=0'}
-        blob.metadata = metadata
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+def upload_media_stream_to_firebase(fileobj, filename, brand_id, product_id, platform, media_type="video"):
+    """
+    Upload a media file to Firebase Storage from a file object using a chunked resumable upload.
+
+    Only MEDIA_UPLOAD_CHUNK_SIZE bytes are held in memory at a time, whatever the file size.
+    The size and MD5 are computed while streaming and checked against what Cloud Storage stored.
+    Returns the public URL.
+    """
+    try:
+        gcs_path = _media_gcs_path(_brand_folder_name(brand_id), product_id, platform, media_type)
+        blob = bucket.blob(gcs_path, chunk_size=MEDIA_UPLOAD_CHUNK_SIZE)
+        blob.metadata = {'Cache-Control': 'no-cache, max-age=0'}
         
-        content_type = "video/mp4" if media_type == "video" else f"image/{extension[1:]}"
-        blob.upload_from_string(file_bytes, content_type=content_type)
+        reader = _ChecksumReader(fileobj)
+        blob.upload_from_file(
+            reader,
+            content_type=_media_content_type(filename, media_type),
+            predefined_acl="publicRead"
+        )
         
-        # Make the file publicly accessible
-        blob.make_public()
+        local_md5 = base64.b64encode(reader.md5.digest()).decode("ascii")
+        if blob.md5_hash and blob.md5_hash != local_md5:
+            blob.delete()
+            raise Exception(f"Checksum mismatch for {gcs_path}: uploaded {blob.md5_hash}, expected {local_md5}")
+        if blob.size is not None and blob.size != reader.size:
+            blob.delete()
+            raise Exception(f"Size mismatch for {gcs_path}: uploaded {blob.size} bytes, expected {reader.size}")
         
-        # Return the public URL
+        print(f"Uploaded {gcs_path} ({reader.size} bytes, md5 {local_md5})")
         return blob.public_url
         
     except Exception as e:
-        print(f"Error uploading media to Firebase: {str(e)}")
+        print(f"Error streaming media to Firebase: {str(e)}")
+        raise
+
+def upload_carousel_to_firebase(files, brand_id, product_id, platform, start_index=0):
+    """
+    Upload carousel images concurrently and return their public URLs in order.
+
+    Args:
+        files: List of (file_bytes, filename) tuples in carousel order
+        start_index: Carousel position of the first file
+    """
+    try:
+        # Resolve the brand folder once for the whole carousel
+        safe_brand_name = _brand_folder_name(brand_id)
+        uploads = []
+        for offset, (file_bytes, filename) in enumerate(files):
+            uploads.append({
+                'gcs_path': _media_gcs_path(safe_brand_name, product_id, platform, "carousel", start_index + offset),
+                'data': file_bytes,
+                'content_type': _media_content_type(filename, "carousel"),
+                'metadata': {'Cache-Control': 'no-cache, max-age=0'}
+            })
+        
+        results = upload_blobs_concurrently(uploads)
+        failed = [result for result in results if 'error' in result]
+        if failed:
+            raise Exception(f"{len(failed)} of {len(results)} carousel uploads failed: {failed[0]['error']}")
+        
+        return [result['public_url'] for result in results]
+        
+    except Exception as e:
+        print(f"Error uploading carousel to Firebase: {str(e)}")
         raise
 
 def update_product_media(product_id, platform, content):
@@ -463,6 +793,7 @@ def update_product_media(product_id, platform, content):
         product_ref.update({
             f"marketing_content.{platform}": content
         })
+        invalidate_product_cache(product_id)
         
         return True
         
@@ -470,20 +801,82 @@ def update_product_media(product_id, platform, content):
         print(f"Error updating product media: {str(e)}")
         return False
     
+SAVED_FIELDS_STATE_KEY = "saved_product_fields"
+
+def record_saved_fields(state, product_id: str, fields: Dict[str, Any]):
+    """
+    Record fields an agent tool wrote to products/{product_id} in the agent session state.
+
+    `fields` is nested like the product document (e.g. {'marketing_content': {'instagram': {'image_url': url}}}).
+    The merged result is exposed through the events' state_delta, so the caller can
+    confirm the save without re-reading Firestore.
+    """
+    saved = copy.deepcopy(state.get(SAVED_FIELDS_STATE_KEY) or {})
+    _deep_merge(saved.setdefault(product_id, {}), copy.deepcopy(fields))
+    state[SAVED_FIELDS_STATE_KEY] = saved
+
+def _deep_merge(target: Dict[str, Any], updates: Dict[str, Any]):
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+def get_platform_content(marketing_content: Optional[Dict[str, Any]], platform: str) -> Dict[str, Any]:
+    """Look up a platform's entry in marketing_content, ignoring case of the platform key"""
+    if not marketing_content:
+        return {}
+    if platform.lower() in marketing_content:
+        return marketing_content[platform.lower()] or {}
+    for key, value in marketing_content.items():
+        if key.lower() == platform.lower():
+            return value or {}
+    return {}
+
+def has_platform_text_content(platform: str, platform_content: Dict[str, Any]) -> bool:
+    """Check that a marketing_content.<platform> entry has the text fields the platform needs"""
+    content = platform_content.get("content") if platform_content else None
+    if not content:
+        return False
+    if platform.lower() in ("instagram", "facebook", "twitter"):
+        return bool(content.get("caption"))
+    elif platform.lower() == "youtube":
+        return "title" in content and "caption" in content
+    # For other platforms, just check if any content exists
+    return True
+
+def has_platform_media(platform_content: Dict[str, Any], media_type: str) -> bool:
+    """Check that a marketing_content.<platform> entry has the URL(s) for media_type"""
+    if not platform_content:
+        return False
+    if media_type == "image":
+        return bool(platform_content.get("image_url"))
+    elif media_type == "carousel":
+        return bool(platform_content.get("carousel_urls"))
+    elif media_type == "video":
+        return bool(platform_content.get("video_url"))
+    return False
+
+def _get_product_fields(product_id: str, field_paths: List[str]) -> Optional[Dict[str, Any]]:
+    """Read only `field_paths` of a product, or use the cached document if there is one"""
+    cached = _cache_get(_product_cache, product_id)
+    if cached is not None:
+        return cached
+    doc = db.collection('products').document(product_id).get(field_paths=field_paths)
+    return doc.to_dict() if doc.exists else None
+
 def is_seo_content_stored(product_id: str) -> bool:
     """
     Check if SEO content is stored for a specific product
     Returns True if content is stored, False otherwise
     """
     try:
-        product_data = get_product_by_id(product_id)
+        product_data = _get_product_fields(product_id, ["seo_content"])
         if not product_data:
             return False
         
         # Check if SEO content exists and is not empty
-        if "seo_content" in product_data and product_data["seo_content"]:
-            return True
-        return False
+        return bool(product_data.get("seo_content"))
     except Exception as e:
         print(f"Error checking SEO content: {str(e)}")
         return False
@@ -494,30 +887,14 @@ def is_marketing_content_stored(product_id: str, platform: str) -> bool:
     Returns True if content is stored, False otherwise
     """
     try:
-        product_data = get_product_by_id(product_id)
+        product_data = _get_product_fields(
+            product_id, [product_field_path("marketing_content", platform.lower(), "content")]
+        )
         if not product_data:
             return False
         
-        # Check if marketing content exists for this platform
-        if "marketing_content" in product_data and platform.lower() in product_data["marketing_content"]:
-            platform_content = product_data["marketing_content"][platform.lower()]
-            
-            # Check if content section exists and has meaningful data
-            if "content" in platform_content and platform_content["content"]:
-                # Validate based on platform-specific requirements
-                if platform.lower() == "instagram":
-                    return "caption" in platform_content["content"] and platform_content["content"]["caption"]
-                elif platform.lower() == "facebook":
-                    return "caption" in platform_content["content"] and platform_content["content"]["caption"]
-                elif platform.lower() == "twitter":
-                    return "caption" in platform_content["content"] and platform_content["content"]["caption"]
-                elif platform.lower() == "youtube":
-                    return "title" in platform_content["content"] and "caption" in platform_content["content"]
-                else:
-                    # For other platforms, just check if any content exists
-                    return bool(platform_content["content"])
-        
-        return False
+        platform_content = get_platform_content(product_data.get("marketing_content"), platform)
+        return has_platform_text_content(platform, platform_content)
     except Exception as e:
         print(f"Error checking marketing content: {str(e)}")
         return False
@@ -528,23 +905,169 @@ def is_media_content_stored(product_id: str, platform: str, media_type: str) ->
     Returns True if content is stored, False otherwise
     """
     try:
-        product_data = get_product_by_id(product_id)
+        media_field = {"image": "image_url", "carousel": "carousel_urls", "video": "video_url"}.get(media_type)
+        if not media_field:
+            return False
+        product_data = _get_product_fields(
+            product_id, [product_field_path("marketing_content", platform.lower(), media_field)]
+        )
         if not product_data:
             return False
         
-        # Check if marketing content exists for this platform
-        if "marketing_content" in product_data and platform.lower() in product_data["marketing_content"]:
-            platform_content = product_data["marketing_content"][platform.lower()]
-            
-            # Check for the appropriate media URL based on media type
-            if media_type == "image":
-                return "image_url" in platform_content and platform_content["image_url"]
-            elif media_type == "carousel":
-                return "carousel_urls" in platform_content and platform_content["carousel_urls"]
-            elif media_type == "video":
-                return "video_url" in platform_content and platform_content["video_url"]
-        
-        return False
+        platform_content = get_platform_content(product_data.get("marketing_content"), platform)
+        return has_platform_media(platform_content, media_type)
     except Exception as e:
         print(f"Error checking media content: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+
+def create_generation_job(product_id: str, platform: str, params: Dict[str, Any]) -> str:
+    """
+    Create a generation job record in the top-level jobs collection (jobs/{job_id}),
+    so status lookups only need the job ID
+    Returns the new job ID
+    """
+    try:
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        db.collection('jobs').document(job_id).set({
+            'job_id': job_id,
+            'product_id': product_id,
+            'platform': platform,
+            'params': params,
+            'status': 'queued',
+            'stages': {},
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+            'heartbeat_at': now
+        })
+        return job_id
+    except Exception as e:
+        print(f"Error creating generation job: {str(e)}")
+        raise e
+
+def update_generation_job(job_id: str, updates: Dict[str, Any]) -> bool:
+    """Update a generation job record; keys may be dotted field paths (e.g. stages.media)"""
+    try:
+        updates = dict(updates)
+        updates['updated_at'] = datetime.now().isoformat()
+        db.collection('jobs').document(job_id).update(updates)
+        return True
+    except Exception as e:
+        print(f"Error updating generation job: {str(e)}")
+        return False
+
+def get_generation_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Retrieve a generation job by ID"""
+    try:
+        doc = db.collection('jobs').document(job_id).get()
+        return doc.to_dict() if doc.exists else None
+    except Exception as e:
+        print(f"Error retrieving generation job: {str(e)}")
+        return None
+
+def touch_generation_jobs(job_ids: List[str]) -> None:
+    """Record that the worker holding these jobs is still alive (heartbeat_at only, so progress streams stay quiet)"""
+    now = datetime.now().isoformat()
+    job_ids = list(job_ids)
+    # A write batch holds at most 500 operations
+    for start in range(0, len(job_ids), 500):
+        batch = db.batch()
+        for job_id in job_ids[start:start + 500]:
+            batch.update(db.collection('jobs').document(job_id), {'heartbeat_at': now})
+        try:
+            batch.commit()
+        except Exception as e:
+            print(f"Error recording generation job heartbeat: {str(e)}")
+
+def is_generation_job_stale(job: Dict[str, Any], stale_seconds: float) -> bool:
+    """True for a queued/running job whose worker has not sent a heartbeat within stale_seconds"""
+    if job.get('status') not in ('queued', 'running'):
+        return False
+    last_seen = job.get('heartbeat_at') or job.get('updated_at')
+    try:
+        return datetime.fromisoformat(last_seen) < datetime.now() - timedelta(seconds=stale_seconds)
+    except (TypeError, ValueError):
+        return True
+
+def fail_generation_job(job_id: str, error: str, stale_seconds: Optional[float] = None) -> bool:
+    """
+    Mark a job that can no longer finish as failed.
+
+    Runs in a transaction and only touches a job that is still queued/running
+    (and, with stale_seconds, still without a recent heartbeat), so a job that
+    completed or checked in since it was read is left alone.
+    Returns True if the job was marked failed.
+    """
+    job_ref = db.collection('jobs').document(job_id)
+
+    @firestore.transactional
+    def fail_in_transaction(transaction):
+        snapshot = job_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            return False
+        job = snapshot.to_dict()
+        if job.get('status') not in ('queued', 'running'):
+            return False
+        if stale_seconds is not None and not is_generation_job_stale(job, stale_seconds):
+            return False
+        now = datetime.now().isoformat()
+        transaction.update(job_ref, {
+            'status': 'failed',
+            'error': error,
+            'finished_at': now,
+            'updated_at': now
+        })
+        return True
+
+    try:
+        return fail_in_transaction(db.transaction())
+    except Exception as e:
+        print(f"Error failing generation job {job_id}: {str(e)}")
+        return False
+
+def fail_stale_generation_jobs(stale_seconds: float) -> int:
+    """
+    Fail queued/running jobs whose worker stopped sending heartbeats (the process
+    holding them restarted or died). Returns the number of jobs marked failed.
+    """
+    try:
+        docs = db.collection('jobs').where('status', 'in', ['queued', 'running']).stream()
+        stale = [doc.to_dict() for doc in docs]
+        stale = [job for job in stale if is_generation_job_stale(job, stale_seconds)]
+        return sum(
+            fail_generation_job(job['job_id'], "Job was interrupted before it finished", stale_seconds)
+            for job in stale
+        )
+    except Exception as e:
+        print(f"Error failing stale generation jobs: {str(e)}")
+        return 0
+
+def product_field_path(*parts: str) -> str:
+    """Build a dotted Firestore field path, quoting segments that need it (e.g. 'marketing_content', 'instagram', 'image_url')"""
+    return firestore.FieldPath(*parts).to_api_repr()
+
+def update_product_fields(product_id: str, updates: Dict[str, Any]) -> bool:
+    """
+    Write individual fields of a product document without rewriting the rest of it.
+
+    Args:
+        product_id: The product to update
+        updates: Mapping of dotted field paths (see product_field_path) to new values
+
+    Returns:
+        True on success (nothing is written for an empty `updates`). Raises if the
+        product does not exist or the write fails.
+    """
+    if not updates:
+        return True
+    try:
+        db.collection('products').document(product_id).update(updates)
+        return True
+    except Exception as e:
+        print(f"Error updating product fields for {product_id}: {str(e)}")
+        raise
+    finally:
+        invalidate_product_cache(product_id)
@@ -0,0 +1,73 @@
+"""
+In-process worker pool for long running generation jobs.
+
+Jobs are coroutines submitted by the API handlers. A fixed number of worker
+tasks pull them off an asyncio queue, so the HTTP request can return a job id
+immediately while the content/media pipeline keeps running. Job state itself
+is persisted in Firestore by the job coroutine, which lets any replica answer
+status queries.
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "4"))
+
+
+class JobQueue:
+    """Fixed-size pool of asyncio workers draining a job queue"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._active = 0
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+        print(f"Started {self.workers} {self.name} workers")
+
+    async def stop(self):
+        """Cancel the workers; queued jobs that have not started are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: Callable[..., Awaitable[Any]], *args, **kwargs):
+        """Queue a job coroutine function to be run by the next free worker"""
+        if self._queue is None:
+            raise RuntimeError(f"{self.name} queue has not been started")
+        self._queue.put_nowait((job, args, kwargs))
+
+    async def _worker(self, index: int):
+        while True:
+            job, args, kwargs = await self._queue.get()
+            self._active += 1
+            try:
+                await job(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in {self.name} worker {index}: {str(e)}")
+            finally:
+                self._active -= 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "active": self._active,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
+
+
+generation_jobs = JobQueue("generation-jobs", GENERATION_JOB_WORKERS)
@@ -1,10 +1,12 @@
 
+import asyncio
+import copy
 import json
 import os
 from fastapi import Body, FastAPI, Form, HTTPException, Query, UploadFile, File
 from jsonschema import ValidationError
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any, Union
+from typing import Awaitable, Callable, Optional, List, Dict, Any, Union
 from datetime import datetime
 from google.genai import types
 
@@ -14,29 +16,49 @@ from google.adk.runners import Runner
 from google.adk.agents.sequential_agent import SequentialAgent
 from marketing_agency.sub_agents.social_media_image_create import social_media_pipeline_agent
 from marketing_agency.sub_agents.content import content_creation_workflow
+from marketing_agency.sub_agents.content.agent import PLATFORM_GUIDELINES
 from marketing_agency.sub_agents.seo import product_seo_agent
 from marketing_agency.sub_agents.research import market_analysis_agent
 from marketing_agency.sub_agents.mood_board import color_palette_agent
 from google.adk.artifacts import InMemoryArtifactService
 
 from fastapi import BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from agent_executor import get_agent_executor_stats, run_agent, shutdown_agent_executor
+from job_queue import generation_jobs
+
 
 
 
 from firebase_utils import (
+    create_generation_job,
+    fail_generation_job,
+    fail_stale_generation_jobs,
     get_brand_profile_by_id,
+    get_cache_stats,
+    get_generation_job,
+    get_platform_content,
     get_product_by_id,
     get_products_by_brand,
+    has_platform_media,
+    has_platform_text_content,
+    is_generation_job_stale,
     is_marketing_content_stored,
     is_media_content_stored,
     is_seo_content_stored,
+    SAVED_FIELDS_STATE_KEY,
     store_brand_profile,
     store_product,
+    touch_generation_jobs,
     update_brand_profile,
+    update_generation_job,
     update_product_media,
+    upload_carousel_to_firebase,
+    upload_media_stream_to_firebase,
     upload_logo_to_firebase,
     upload_media_to_firebase
 )
@@ -76,6 +98,30 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def start_job_workers():
+    """Start the generation job worker pool and fail jobs orphaned by a previous process"""
+    generation_jobs.start()
+    global job_heartbeat_task
+    job_heartbeat_task = asyncio.create_task(heartbeat_generation_jobs(), name="generation-job-heartbeat")
+    orphaned = await run_in_threadpool(fail_stale_generation_jobs, JOB_STALE_SECONDS)
+    if orphaned:
+        print(f"Marked {orphaned} orphaned generation jobs as failed")
+
+
+@app.on_event("shutdown")
+async def shutdown_agent_workers():
+    """Stop the job workers and let in-flight agent runs finish before the process exits"""
+    if job_heartbeat_task is not None:
+        job_heartbeat_task.cancel()
+    await generation_jobs.stop()
+    # Queued and running jobs of this process are gone with it
+    for job_id in list(local_generation_jobs):
+        await run_in_threadpool(fail_generation_job, job_id, "Job was interrupted by a server shutdown")
+    local_generation_jobs.clear()
+    await run_in_threadpool(shutdown_agent_executor)
+
+
 class BrandProfileRequest(BaseModel):
     brand_name: str
     description: str
@@ -219,6 +265,41 @@ class CombinedContentResponse(BaseModel):
     media_type: Optional[str] = None
     media_data: Optional[List[str]] = None
 
+class GenerationJobSubmitResponse(BaseModel):
+    job_id: str
+    product_id: str
+    platform: str
+    status: str
+    status_url: str
+    events_url: str
+
+class GenerationJobResponse(BaseModel):
+    job_id: str
+    product_id: str
+    platform: str
+    status: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+    stages: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    result: Optional[CombinedContentResponse] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+def get_saved_product_fields(events, product_id: str) -> Dict[str, Any]:
+    """
+    Fields the agent tools reported writing to a product during a run.
+    Tools record them with record_saved_fields, which surfaces in the events' state_delta.
+    """
+    saved_fields = {}
+    for event in events:
+        state_delta = getattr(getattr(event, "actions", None), "state_delta", None)
+        if state_delta and SAVED_FIELDS_STATE_KEY in state_delta:
+            # Each delta carries the merged fields recorded so far
+            saved_fields = state_delta[SAVED_FIELDS_STATE_KEY].get(product_id) or saved_fields
+    return saved_fields
+
 async def run_background_market_analysis(brand_id: str, brand_name: str, user_id: str = USER_ID):
     """Run market analysis in the background"""
     try:
@@ -246,7 +327,7 @@ async def run_background_market_analysis(brand_id: str, brand_name: str, user_id
         content = types.Content(role='user', parts=[types.Part(text=query)])
          
         # Run the agent
-        events = runner.run(user_id=user_id, session_id=session_id, new_message=content)
+        events = await run_agent(runner, "market_analysis", user_id=user_id, session_id=session_id, new_message=content)
         
         # Extract responses
         responses = []
@@ -414,6 +495,10 @@ async def add_product(brand_id: str, request: ProductRequest, background_tasks:
             description=request.description,
             category=request.category
         )
+        # Served from the cache primed by store_product
+        product_data = get_product_by_id(product_id)
+        if not product_data:
+            raise HTTPException(status_code=500, detail="Product could not be stored")
         
         # Generate SEO content with retry logic
         retry_count = 0
@@ -449,7 +534,7 @@ async def add_product(brand_id: str, request: ProductRequest, background_tasks:
                 # Run the agent
                 try:
                     # Try to use existing session
-                    events = runner.run(user_id=USER_ID, session_id=session_id, new_message=content)
+                    events = await run_agent(runner, "seo", user_id=USER_ID, session_id=session_id, new_message=content)
                 except ValueError as e:
                     if "Session not found" in str(e):
                         # Recreate session if not found
@@ -459,7 +544,7 @@ async def add_product(brand_id: str, request: ProductRequest, background_tasks:
                             user_id=USER_ID,
                             session_id=session_id
                         )
-                        events = runner.run(user_id=USER_ID, session_id=session_id, new_message=content)
+                        events = await run_agent(runner, "seo", user_id=USER_ID, session_id=session_id, new_message=content)
                     else:
                         raise
                 
@@ -470,10 +555,10 @@ async def add_product(brand_id: str, request: ProductRequest, background_tasks:
                         if event.content and hasattr(event.content, 'parts') and event.content.parts:
                             responses.append(event.content.parts[0].text)
                 
-                # Verify SEO content was stored
-                if is_seo_content_stored(product_id):
+                # Verify SEO content was stored, using the tool's report when present
+                saved_fields = get_saved_product_fields(events, product_id)
+                if saved_fields.get("seo_content") or is_seo_content_stored(product_id):
                     seo_content_generated = True
-                    product_data = get_product_by_id(product_id)
                     product_data["seo_content_status"] = "completed"
                     print(f"SEO content successfully stored for product: {product_id}")
                     break
@@ -490,12 +575,10 @@ async def add_product(brand_id: str, request: ProductRequest, background_tasks:
                 print(f"Error in SEO content generation attempt {retry_count + 1}: {str(e)}")
                 retry_count += 1
                 if retry_count >= MAX_RETRIES:
-                    product_data = get_product_by_id(product_id)
                     product_data["seo_content_status"] = "error"
                     raise Exception(f"Failed to generate SEO content after {MAX_RETRIES} attempts: {str(e)}")
 
         if not seo_content_generated:
-            product_data = get_product_by_id(product_id)
             product_data["seo_content_status"] = "error"
             raise HTTPException(
                 status_code=500, 
@@ -611,7 +694,7 @@ async def generate_marketing_content(product_id: str, platform: str):
         content = types.Content(role='user', parts=[types.Part(text=query)])
         
         # Run the agent
-        events = runner.run(user_id=USER_ID, session_id=session_id, new_message=content)
+        events = await run_agent(runner, "content", user_id=USER_ID, session_id=session_id, new_message=content)
         
         # Extract responses
         responses = []
@@ -663,7 +746,7 @@ async def generate_social_media_image(
         content = types.Content(role='user', parts=[types.Part(text=query)])
         
         # Run the agent
-        events = runner.run(user_id=USER_ID, session_id=session_id, new_message=content)
+        events = await run_agent(runner, "media", user_id=USER_ID, session_id=session_id, new_message=content)
         
         # Extract responses
         responses = []
@@ -683,237 +766,600 @@ async def generate_social_media_image(
         print(f"Error in generate_social_media_content: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating social media {media_type}: {str(e)}")
 
-@app.post("/products/{product_id}/platform/{platform}/generate-content", response_model=CombinedContentResponse)
-async def generate_product_content(
-    product_id: str, 
+async def run_product_content_pipeline(
+    product_id: str,
     platform: str,
-    media_type: str = Query("image", description="Type of media to generate: 'image', 'carousel', or 'video'"),
-    content_only: bool = Query(False, description="Generate only text content without media"),
-    media_only: bool = Query(False, description="Generate only media without text content")
-):
-    """Generate both marketing content and social media for a product and platform"""
+    media_type: str = "image",
+    content_only: bool = False,
+    media_only: bool = False,
+    on_progress: Optional[Callable[..., Awaitable[None]]] = None,
+    product_data: Optional[Dict[str, Any]] = None,
+    brand_data: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Run the text content and media stages for a product and platform.
+
+    on_progress, if given, is awaited as on_progress(stage, status, **details)
+    whenever a stage starts, retries, completes or fails.
+    product_data/brand_data, if given, are used instead of reading Firestore and
+    are seeded into the agent sessions so the agent tools skip those reads too.
+    Raises HTTPException on failure.
+    """
     MAX_RETRIES = 3  # Maximum number of retries for content generation
-    
-    try:
-        # First check if product exists
+
+    async def report(stage: str, status: str, **details):
+        if on_progress:
+            try:
+                await on_progress(stage, status, **details)
+            except Exception as e:
+                print(f"Error reporting {stage} progress: {str(e)}")
+
+    # First check if product exists
+    if product_data is None:
         product_data = get_product_by_id(product_id)
-        if not product_data:
-            raise HTTPException(status_code=404, detail="Product not found")
-        
-        # Initialize response variables
-        marketing_content_responses = []
-        media_responses = []
+    if not product_data:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    # Session state shared with the agent tools
+    content_state = {}
+    media_state = {}
+    if brand_data:
+        content_state["brand_info"] = brand_data
+        media_state["brand_info"] = brand_data
+    if product_data.get("product_id") == product_id:
+        content_state["preloaded_product"] = product_data
+    content_state = json.loads(json.dumps(content_state, default=str))
+    media_state = json.loads(json.dumps(media_state, default=str))
+    
+    # Initialize response variables
+    marketing_content_responses = []
+    media_responses = []
+    
+    # Generate text content if not media_only
+    if not media_only:
+        # Add retry logic for content generation
+        retry_count = 0
+        content_generated = False
         
-        # Generate text content if not media_only
-        if not media_only:
-            # Add retry logic for content generation
-            retry_count = 0
-            content_generated = False
-            
-            while retry_count < MAX_RETRIES and not content_generated:
+        while retry_count < MAX_RETRIES and not content_generated:
+            try:
+                print(f"Marketing content generation attempt {retry_count + 1} of {MAX_RETRIES} for product: {product_id}, platform: {platform}")
+                await report("content", "running", attempt=retry_count + 1)
+                
+                # Generate a unique session ID for content creation
+                content_session_id = f"content_creation_{product_id}_{platform}_{retry_count}"
+                
+                # Create session for content creation
+                await session_service.create_session(
+                    app_name=APP_NAME,
+                    user_id=USER_ID,
+                    session_id=content_session_id,
+                    state=content_state
+                )
+                
+                # Create Runner for content creation
+                content_runner = Runner(
+                    agent=content_creation_workflow,
+                    app_name=APP_NAME,
+                    session_service=session_service
+                )
+                
+                # Prepare the content creation query
+                content_query = f"Create marketing content for product_id: {product_id} for platform: {platform}"
+                
+                # Format as ADK content
+                content = types.Content(role='user', parts=[types.Part(text=content_query)])
+                
+                # Run the content creation agent with session error handling
                 try:
-                    print(f"Marketing content generation attempt {retry_count + 1} of {MAX_RETRIES} for product: {product_id}, platform: {platform}")
-                    
-                    # Generate a unique session ID for content creation
-                    content_session_id = f"content_creation_{product_id}_{platform}_{retry_count}"
-                    
-                    # Create session for content creation
-                    await session_service.create_session(
-                        app_name=APP_NAME,
-                        user_id=USER_ID,
-                        session_id=content_session_id
-                    )
-                    
-                    # Create Runner for content creation
-                    content_runner = Runner(
-                        agent=content_creation_workflow,
-                        app_name=APP_NAME,
-                        session_service=session_service
-                    )
-                    
-                    # Prepare the content creation query
-                    content_query = f"Create marketing content for product_id: {product_id} for platform: {platform}"
-                    
-                    # Format as ADK content
-                    content = types.Content(role='user', parts=[types.Part(text=content_query)])
-                    
-                    # Run the content creation agent with session error handling
-                    try:
-                        content_events = content_runner.run(user_id=USER_ID, session_id=content_session_id, new_message=content)
-                    except ValueError as e:
-                        if "Session not found" in str(e):
-                            # Recreate session if not found
-                            print(f"Content session not found, recreating session: {content_session_id}")
-                            await session_service.create_session(
-                                app_name=APP_NAME,
-                                user_id=USER_ID,
-                                session_id=content_session_id
-                            )
-                            content_events = content_runner.run(user_id=USER_ID, session_id=content_session_id, new_message=content)
-                        else:
-                            raise
-                    
-                    # Extract content responses
-                    for event in content_events:
-                        if event.is_final_response():
-                            if event.content and hasattr(event.content, 'parts') and event.content.parts:
-                                marketing_content_responses.append(event.content.parts[0].text)
-                                print(f"Marketing Content Response: {event.content.parts[0].text}")
-                    
-                    # Verify content was properly stored
-                    if is_marketing_content_stored(product_id, platform):
-                        content_generated = True
-                        print(f"Marketing content successfully stored for product: {product_id}, platform: {platform}")
+                    content_events = await run_agent(content_runner, "content", user_id=USER_ID, session_id=content_session_id, new_message=content)
+                except ValueError as e:
+                    if "Session not found" in str(e):
+                        # Recreate session if not found
+                        print(f"Content session not found, recreating session: {content_session_id}")
+                        await session_service.create_session(
+                            app_name=APP_NAME,
+                            user_id=USER_ID,
+                            session_id=content_session_id,
+                            state=content_state
+                        )
+                        content_events = await run_agent(content_runner, "content", user_id=USER_ID, session_id=content_session_id, new_message=content)
                     else:
-                        # Content wasn't stored properly, increment retry counter
-                        retry_count += 1
-                        if retry_count < MAX_RETRIES:
-                            print(f"Marketing content not properly stored, retrying ({retry_count}/{MAX_RETRIES})...")
-                        else:
-                            print(f"Failed to store marketing content after {MAX_RETRIES} attempts")
+                        raise
+                
+                # Extract content responses
+                for event in content_events:
+                    if event.is_final_response():
+                        if event.content and hasattr(event.content, 'parts') and event.content.parts:
+                            marketing_content_responses.append(event.content.parts[0].text)
+                            print(f"Marketing Content Response: {event.content.parts[0].text}")
                 
-                except Exception as e:
-                    print(f"Error in content generation attempt {retry_count + 1}: {str(e)}")
+                # Verify content was properly stored, using the tool's report when present
+                saved_fields = get_saved_product_fields(content_events, product_id)
+                saved_platform_content = get_platform_content(saved_fields.get("marketing_content"), platform)
+                if has_platform_text_content(platform, saved_platform_content) or is_marketing_content_stored(product_id, platform):
+                    content_generated = True
+                    print(f"Marketing content successfully stored for product: {product_id}, platform: {platform}")
+                    await report("content", "completed", attempt=retry_count + 1)
+                else:
+                    # Content wasn't stored properly, increment retry counter
                     retry_count += 1
-                    if retry_count >= MAX_RETRIES:
-                        raise Exception(f"Failed to generate marketing content after {MAX_RETRIES} attempts: {str(e)}")
+                    if retry_count < MAX_RETRIES:
+                        print(f"Marketing content not properly stored, retrying ({retry_count}/{MAX_RETRIES})...")
+                        await report("content", "retrying", attempt=retry_count, error="Content not stored")
+                    else:
+                        print(f"Failed to store marketing content after {MAX_RETRIES} attempts")
             
-            # If content generation failed after retries, raise error
-            if not content_generated and not media_only:
-                # Update product with error status
-                if "marketing_content" not in product_data:
-                    product_data["marketing_content"] = {}
-                if platform.lower() not in product_data["marketing_content"]:
-                    product_data["marketing_content"][platform.lower()] = {}
+            except Exception as e:
+                print(f"Error in content generation attempt {retry_count + 1}: {str(e)}")
+                retry_count += 1
+                if retry_count >= MAX_RETRIES:
+                    await report("content", "failed", attempt=retry_count, error=str(e))
+                    raise Exception(f"Failed to generate marketing content after {MAX_RETRIES} attempts: {str(e)}")
+                await report("content", "retrying", attempt=retry_count, error=str(e))
+        
+        # If content generation failed after retries, raise error
+        if not content_generated and not media_only:
+            # Update product with error status
+            if "marketing_content" not in product_data:
+                product_data["marketing_content"] = {}
+            if platform.lower() not in product_data["marketing_content"]:
+                product_data["marketing_content"][platform.lower()] = {}
+            
+            product_data["marketing_content"][platform.lower()]["content_status"] = "error"
+            # Update the database
+            update_product_media(
+                product_id=product_id,
+                platform=platform.lower(),
+                content=product_data["marketing_content"][platform.lower()]
+            )
+            await report("content", "failed", attempt=retry_count, error="Content not stored")
+            
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Failed to generate and store marketing content after {MAX_RETRIES} attempts"
+            )
+    else:
+        await report("content", "skipped")
+    
+    # Generate media if not content_only
+    if not content_only:
+        # Add retry logic for media generation
+        retry_count = 0
+        media_generated = False
+        
+        while retry_count < MAX_RETRIES and not media_generated:
+            try:
+                print(f"Media generation attempt {retry_count + 1} of {MAX_RETRIES} for product: {product_id}, platform: {platform}")
+                await report("media", "running", attempt=retry_count + 1, media_type=media_type)
                 
-                product_data["marketing_content"][platform.lower()]["content_status"] = "error"
-                # Update the database
-                update_product_media(
-                    product_id=product_id,
-                    platform=platform.lower(),
-                    content=product_data["marketing_content"][platform.lower()]
+                # Generate a unique session ID for media creation
+                media_session_id = f"social_media_image_{product_id}_{platform.lower()}_{retry_count}"
+                
+                # Create session for media creation
+                await session_service.create_session(
+                    app_name=APP_NAME,
+                    user_id=USER_ID,
+                    session_id=media_session_id,
+                    state=media_state
                 )
                 
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Failed to generate and store marketing content after {MAX_RETRIES} attempts"
+                # Create Runner for media creation
+                media_runner = Runner(
+                    agent=social_media_pipeline_agent,
+                    app_name=APP_NAME,
+                    session_service=session_service,
+                    artifact_service=InMemoryArtifactService()
                 )
-        
-        # Generate media if not content_only
-        if not content_only:
-            # Add retry logic for media generation
-            retry_count = 0
-            media_generated = False
-            
-            while retry_count < MAX_RETRIES and not media_generated:
+                
+                # Prepare the media creation query
+                media_query = f"Generate {platform} {media_type} for product_id {product_id}"
+                
+                # Format as ADK content
+                media_content = types.Content(role='user', parts=[types.Part(text=media_query)])
+                
+                # Run the media creation agent with session error handling
                 try:
-                    print(f"Media generation attempt {retry_count + 1} of {MAX_RETRIES} for product: {product_id}, platform: {platform}")
-                    
-                    # Generate a unique session ID for media creation
-                    media_session_id = f"social_media_image_{product_id}_{platform.lower()}_{retry_count}"
-                    
-                    # Create session for media creation
-                    await session_service.create_session(
-                        app_name=APP_NAME,
-                        user_id=USER_ID,
-                        session_id=media_session_id
-                    )
-                    
-                    # Create Runner for media creation
-                    media_runner = Runner(
-                        agent=social_media_pipeline_agent,
-                        app_name=APP_NAME,
-                        session_service=session_service,
-                        artifact_service=InMemoryArtifactService()
-                    )
-                    
-                    # Prepare the media creation query
-                    media_query = f"Generate {platform} {media_type} for product_id {product_id}"
-                    
-                    # Format as ADK content
-                    media_content = types.Content(role='user', parts=[types.Part(text=media_query)])
-                    
-                    # Run the media creation agent with session error handling
-                    try:
-                        media_events = media_runner.run(user_id=USER_ID, session_id=media_session_id, new_message=media_content)
-                    except ValueError as e:
-                        if "Session not found" in str(e):
-                            # Recreate session if not found
-                            print(f"Media session not found, recreating session: {media_session_id}")
-                            await session_service.create_session(
-                                app_name=APP_NAME,
-                                user_id=USER_ID,
-                                session_id=media_session_id
-                            )
-                            media_events = media_runner.run(user_id=USER_ID, session_id=media_session_id, new_message=media_content)
-                        else:
-                            raise
-                    
-                    # Extract media responses
-                    for event in media_events:
-                        if event.is_final_response():
-                            if event.content and hasattr(event.content, 'parts') and event.content.parts:
-                                media_responses.append(event.content.parts[0].text)
-                                print(f"Social Media {media_type.capitalize()} Response: {event.content.parts[0].text}")
-                    
-                    # Verify media content was properly stored
-                    if is_media_content_stored(product_id, platform, media_type):
-                        media_generated = True
-                        print(f"Media content successfully stored for product: {product_id}, platform: {platform}")
+                    media_events = await run_agent(media_runner, "media", user_id=USER_ID, session_id=media_session_id, new_message=media_content)
+                except ValueError as e:
+                    if "Session not found" in str(e):
+                        # Recreate session if not found
+                        print(f"Media session not found, recreating session: {media_session_id}")
+                        await session_service.create_session(
+                            app_name=APP_NAME,
+                            user_id=USER_ID,
+                            session_id=media_session_id,
+                            state=media_state
+                        )
+                        media_events = await run_agent(media_runner, "media", user_id=USER_ID, session_id=media_session_id, new_message=media_content)
                     else:
-                        # Media wasn't stored properly, increment retry counter
-                        retry_count += 1
-                        if retry_count < MAX_RETRIES:
-                            print(f"Media content not properly stored, retrying ({retry_count}/{MAX_RETRIES})...")
-                        else:
-                            print(f"Failed to store media content after {MAX_RETRIES} attempts")
+                        raise
                 
-                except Exception as e:
-                    print(f"Error in media generation attempt {retry_count + 1}: {str(e)}")
+                # Extract media responses
+                for event in media_events:
+                    if event.is_final_response():
+                        if event.content and hasattr(event.content, 'parts') and event.content.parts:
+                            media_responses.append(event.content.parts[0].text)
+                            print(f"Social Media {media_type.capitalize()} Response: {event.content.parts[0].text}")
+                
+                # Verify media content was properly stored, using the tool's report when present
+                saved_fields = get_saved_product_fields(media_events, product_id)
+                saved_platform_content = get_platform_content(saved_fields.get("marketing_content"), platform)
+                if has_platform_media(saved_platform_content, media_type) or is_media_content_stored(product_id, platform, media_type):
+                    media_generated = True
+                    print(f"Media content successfully stored for product: {product_id}, platform: {platform}")
+                    await report("media", "completed", attempt=retry_count + 1, media_type=media_type)
+                else:
+                    # Media wasn't stored properly, increment retry counter
                     retry_count += 1
-                    if retry_count >= MAX_RETRIES:
-                        raise Exception(f"Failed to generate media content after {MAX_RETRIES} attempts: {str(e)}")
+                    if retry_count < MAX_RETRIES:
+                        print(f"Media content not properly stored, retrying ({retry_count}/{MAX_RETRIES})...")
+                        await report("media", "retrying", attempt=retry_count, error="Media not stored")
+                    else:
+                        print(f"Failed to store media content after {MAX_RETRIES} attempts")
             
-            # If media generation failed after retries, raise error
-            if not media_generated and not content_only:
-                # Update product with error status
-                if "marketing_content" not in product_data:
-                    product_data["marketing_content"] = {}
-                if platform.lower() not in product_data["marketing_content"]:
-                    product_data["marketing_content"][platform.lower()] = {}
-                
-                product_data["marketing_content"][platform.lower()]["media_status"] = "error"
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Failed to generate and store media content after {MAX_RETRIES} attempts"
+            except Exception as e:
+                print(f"Error in media generation attempt {retry_count + 1}: {str(e)}")
+                retry_count += 1
+                if retry_count >= MAX_RETRIES:
+                    await report("media", "failed", attempt=retry_count, error=str(e))
+                    raise Exception(f"Failed to generate media content after {MAX_RETRIES} attempts: {str(e)}")
+                await report("media", "retrying", attempt=retry_count, error=str(e))
+        
+        # If media generation failed after retries, raise error
+        if not media_generated and not content_only:
+            # Update product with error status
+            if "marketing_content" not in product_data:
+                product_data["marketing_content"] = {}
+            if platform.lower() not in product_data["marketing_content"]:
+                product_data["marketing_content"][platform.lower()] = {}
+            
+            product_data["marketing_content"][platform.lower()]["media_status"] = "error"
+            await report("media", "failed", attempt=retry_count, error="Media not stored")
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Failed to generate and store media content after {MAX_RETRIES} attempts"
+            )
+    else:
+        await report("media", "skipped")
+    
+    # Update success status in database
+    if "marketing_content" not in product_data:
+        product_data["marketing_content"] = {}
+    if platform.lower() not in product_data["marketing_content"]:
+        product_data["marketing_content"][platform.lower()] = {}
+    
+    if not media_only:
+        product_data["marketing_content"][platform.lower()]["content_status"] = "completed"
+    if not content_only:
+        product_data["marketing_content"][platform.lower()]["media_status"] = "completed"
+    
+    
+    # Return combined response
+    return {
+        "product_id": product_id,
+        "platform": platform,
+        "marketing_content": marketing_content_responses if not media_only else None,
+        "media_type": media_type if not content_only else None,
+        "media_data": media_responses if not content_only else None
+    }
+
+
+@app.post("/products/{product_id}/platform/{platform}/generate-content", response_model=CombinedContentResponse)
+async def generate_product_content(
+    product_id: str, 
+    platform: str,
+    media_type: str = Query("image", description="Type of media to generate: 'image', 'carousel', or 'video'"),
+    content_only: bool = Query(False, description="Generate only text content without media"),
+    media_only: bool = Query(False, description="Generate only media without text content")
+):
+    """Generate both marketing content and social media for a product and platform"""
+    try:
+        return await run_product_content_pipeline(
+            product_id=product_id,
+            platform=platform,
+            media_type=media_type,
+            content_only=content_only,
+            media_only=media_only
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in generate_product_content: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating product content: {str(e)}")
+
+
+DEFAULT_GENERATION_PLATFORMS = ["instagram", "facebook", "twitter", "youtube"]
+# Platforms the content agent has guidelines for
+SUPPORTED_GENERATION_PLATFORMS = set(PLATFORM_GUIDELINES)
+GENERATE_ALL_MAX_PARALLEL = int(os.getenv("GENERATE_ALL_MAX_PARALLEL", "4"))
+
+@app.post("/products/{product_id}/generate-all")
+async def generate_all_platform_content(
+    product_id: str,
+    platforms: Optional[List[str]] = Query(None, description="Platforms to generate for; defaults to the brand's marketing platforms"),
+    media_type: str = Query("image", description="Type of media to generate: 'image', 'carousel', or 'video'"),
+    content_only: bool = Query(False, description="Generate only text content without media"),
+    media_only: bool = Query(False, description="Generate only media without text content"),
+    max_parallel: int = Query(GENERATE_ALL_MAX_PARALLEL, ge=1, le=8, description="Maximum platforms generated at once")
+):
+    """
+    Generate content and media for several platforms of a product concurrently.
+
+    The product and brand profile are loaded once and shared with every platform run.
+    Results are streamed as newline-delimited JSON, one line per platform as it
+    finishes, followed by a summary line.
+    """
+    requested = [p.strip().lower() for p in platforms or [] if p.strip()]
+    unsupported = sorted(set(requested) - SUPPORTED_GENERATION_PLATFORMS)
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported platforms: {', '.join(unsupported)}. "
+                   f"Supported: {', '.join(sorted(SUPPORTED_GENERATION_PLATFORMS))}"
+        )
+
+    product_data = await run_in_threadpool(get_product_by_id, product_id)
+    if not product_data:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    brand_data = None
+    if product_data.get("brand_id"):
+        brand_data = await run_in_threadpool(get_brand_profile_by_id, product_data["brand_id"])
+
+    if not requested:
+        # Brand platforms we can't generate for are skipped rather than failing the request
+        brand_platforms = (brand_data or {}).get("marketing_platforms") or DEFAULT_GENERATION_PLATFORMS
+        requested = [
+            p.strip().lower() for p in brand_platforms
+            if p.strip() and p.strip().lower() in SUPPORTED_GENERATION_PLATFORMS
+        ]
+    # Drop duplicates while keeping the requested order
+    platforms = list(dict.fromkeys(requested))
+
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def generate_platform(platform: str) -> Dict[str, Any]:
+        async with semaphore:
+            started = datetime.now()
+            try:
+                result = await run_product_content_pipeline(
+                    product_id=product_id,
+                    platform=platform,
+                    media_type=media_type,
+                    content_only=content_only,
+                    media_only=media_only,
+                    product_data=copy.deepcopy(product_data),
+                    brand_data=brand_data
                 )
-        
-        # Update success status in database
-        if "marketing_content" not in product_data:
-            product_data["marketing_content"] = {}
-        if platform.lower() not in product_data["marketing_content"]:
-            product_data["marketing_content"][platform.lower()] = {}
-        
-        if not media_only:
-            product_data["marketing_content"][platform.lower()]["content_status"] = "completed"
-        if not content_only:
-            product_data["marketing_content"][platform.lower()]["media_status"] = "completed"
-        
-        
-        # Return combined response
+                status, error = "completed", None
+            except HTTPException as e:
+                result, status, error = None, "failed", e.detail
+            except Exception as e:
+                print(f"Error generating {platform} content for product {product_id}: {str(e)}")
+                result, status, error = None, "failed", str(e)
+            return {
+                "platform": platform,
+                "status": status,
+                "result": result,
+                "error": error,
+                "duration_seconds": round((datetime.now() - started).total_seconds(), 2)
+            }
+
+    async def result_stream():
+        started = datetime.now()
+        tasks = [asyncio.create_task(generate_platform(platform)) for platform in platforms]
+        completed = []
+        failed = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                platform_result = await next_done
+                (completed if platform_result["status"] == "completed" else failed).append(platform_result["platform"])
+                yield json.dumps(platform_result, default=str) + "\n"
+        finally:
+            # Client went away (or the stream failed): stop the platforms still queued or
+            # running; an agent run already in a worker thread finishes, later stages don't start
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        yield json.dumps({
+            "product_id": product_id,
+            "summary": True,
+            "completed": completed,
+            "failed": failed,
+            "duration_seconds": round((datetime.now() - started).total_seconds(), 2)
+        }) + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+#---Generation Job Endpoints---#
+
+JOB_TERMINAL_STATUSES = {"completed", "failed"}
+# Workers refresh heartbeat_at on the jobs they hold; a queued/running job without
+# a heartbeat for JOB_STALE_SECONDS lost its process and is failed
+JOB_HEARTBEAT_SECONDS = float(os.getenv("GENERATION_JOB_HEARTBEAT_SECONDS", "60"))
+JOB_STALE_SECONDS = float(os.getenv("GENERATION_JOB_STALE_SECONDS", "300"))
+# An event stream with no job progress for this long is closed; clients can reconnect
+JOB_STREAM_MAX_IDLE_SECONDS = float(os.getenv("GENERATION_JOB_STREAM_MAX_IDLE_SECONDS", "1800"))
+
+# Jobs queued or running in this process
+local_generation_jobs: set = set()
+job_heartbeat_task: Optional[asyncio.Task] = None
+
+
+async def heartbeat_generation_jobs():
+    """Keep heartbeat_at fresh on this process's jobs so other replicas don't treat them as orphaned"""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        if local_generation_jobs:
+            await run_in_threadpool(touch_generation_jobs, list(local_generation_jobs))
+
+
+async def fail_if_orphaned(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Fail a queued/running job whose process stopped sending heartbeats and return its current state"""
+    if job.get("job_id") in local_generation_jobs or not is_generation_job_stale(job, JOB_STALE_SECONDS):
+        return job
+    await run_in_threadpool(
+        fail_generation_job, job["job_id"], "Job was interrupted before it finished", JOB_STALE_SECONDS
+    )
+    return await run_in_threadpool(get_generation_job, job["job_id"]) or job
+
+
+async def run_generation_job(
+    job_id: str,
+    product_id: str,
+    platform: str,
+    media_type: str,
+    content_only: bool,
+    media_only: bool
+):
+    """Run the content pipeline for a queued job and record its progress"""
+    await run_in_threadpool(update_generation_job, job_id, {
+        "status": "running",
+        "started_at": datetime.now().isoformat()
+    })
+
+    async def on_progress(stage: str, status: str, **details):
+        await run_in_threadpool(update_generation_job, job_id, {
+            f"stages.{stage}": {"status": status, "timestamp": datetime.now().isoformat(), **details}
+        })
+
+    try:
+        result = await run_product_content_pipeline(
+            product_id=product_id,
+            platform=platform,
+            media_type=media_type,
+            content_only=content_only,
+            media_only=media_only,
+            on_progress=on_progress
+        )
+        await run_in_threadpool(update_generation_job, job_id, {
+            "status": "completed",
+            "result": result,
+            "finished_at": datetime.now().isoformat()
+        })
+    except HTTPException as e:
+        await run_in_threadpool(update_generation_job, job_id, {
+            "status": "failed",
+            "error": e.detail,
+            "finished_at": datetime.now().isoformat()
+        })
+    except Exception as e:
+        print(f"Error in generation job {job_id}: {str(e)}")
+        await run_in_threadpool(update_generation_job, job_id, {
+            "status": "failed",
+            "error": str(e),
+            "finished_at": datetime.now().isoformat()
+        })
+    # A cancelled job stays in local_generation_jobs and is failed at shutdown
+    local_generation_jobs.discard(job_id)
+
+
+@app.post("/products/{product_id}/platform/{platform}/generate-content/jobs", response_model=GenerationJobSubmitResponse, status_code=202)
+async def submit_product_content_job(
+    product_id: str, 
+    platform: str,
+    media_type: str = Query("image", description="Type of media to generate: 'image', 'carousel', or 'video'"),
+    content_only: bool = Query(False, description="Generate only text content without media"),
+    media_only: bool = Query(False, description="Generate only media without text content")
+):
+    """Queue content and media generation for a product and platform, returning a job ID immediately"""
+    try:
+        product_data = await run_in_threadpool(get_product_by_id, product_id)
+        if not product_data:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        job_id = await run_in_threadpool(create_generation_job, product_id, platform, {
+            "media_type": media_type,
+            "content_only": content_only,
+            "media_only": media_only
+        })
+        local_generation_jobs.add(job_id)
+        generation_jobs.submit(
+            run_generation_job, job_id, product_id, platform, media_type, content_only, media_only
+        )
+
         return {
+            "job_id": job_id,
             "product_id": product_id,
             "platform": platform,
-            "marketing_content": marketing_content_responses if not media_only else None,
-            "media_type": media_type if not content_only else None,
-            "media_data": media_responses if not content_only else None
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events"
         }
-    
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in generate_product_content: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating product content: {str(e)}")
+        print(f"Error in submit_product_content_job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error queueing product content job: {str(e)}")
+
+
+@app.get("/jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_job_status(job_id: str):
+    """Get the status and per-stage progress of a generation job"""
+    job = await run_in_threadpool(get_generation_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await fail_if_orphaned(job)
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    poll_interval: float = Query(1.0, ge=0.5, le=10.0, description="Seconds between job status checks")
+):
+    """
+    Stream job progress as server-sent events until the job completes or fails.
+    The stream also ends if the job disappears, is orphaned by a restarted worker,
+    or makes no progress for JOB_STREAM_MAX_IDLE_SECONDS.
+    """
+    job = await run_in_threadpool(get_generation_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    def end_event(status: str, **details) -> str:
+        return f"event: end\ndata: {json.dumps({'job_id': job_id, 'status': status, **details})}\n\n"
+
+    async def event_stream():
+        current = job
+        last_update = None
+        idle = 0.0
+        since_progress = 0.0
+        while True:
+            if current is None:
+                yield end_event("not_found")
+                return
+            current = await fail_if_orphaned(current)
+            if current.get("updated_at") != last_update:
+                last_update = current.get("updated_at")
+                idle = 0.0
+                since_progress = 0.0
+                yield f"event: progress\ndata: {json.dumps(current, default=str)}\n\n"
+                if current.get("status") in JOB_TERMINAL_STATUSES:
+                    yield end_event(current.get("status"))
+                    return
+            elif since_progress >= JOB_STREAM_MAX_IDLE_SECONDS:
+                yield end_event(current.get("status"), idle_timeout=True)
+                return
+            elif idle >= 15:
+                # Keep proxies from closing an idle connection
+                idle = 0.0
+                yield ": keep-alive\n\n"
+
+            await asyncio.sleep(poll_interval)
+            idle += poll_interval
+            since_progress += poll_interval
+            current = await run_in_threadpool(get_generation_job, job_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/products/{product_id}/platform/{platform}/text", response_model=ProductPlatformTextResponse)
 async def get_product_platform_text_content(product_id: str, platform: str):
@@ -1043,23 +1489,20 @@ async def upload_product_media(
             )
             
         elif media_type == "carousel" and carousel_files:
-            for carousel_file in carousel_files:
-                file_content = await carousel_file.read()
-                url = upload_media_to_firebase(
-                    file_bytes=file_content,
-                    filename=carousel_file.filename,
-                    brand_id=brand_id,
-                    product_id=product_id,
-                    platform=platform,
-                    media_type="carousel",
-                    index=len(carousel_urls)
-                )
-                carousel_urls.append(url)
+            files = [(await carousel_file.read(), carousel_file.filename) for carousel_file in carousel_files]
+            carousel_urls = await run_in_threadpool(
+                upload_carousel_to_firebase,
+                files=files,
+                brand_id=brand_id,
+                product_id=product_id,
+                platform=platform
+            )
                 
         elif media_type == "video" and video_file:
-            file_content = await video_file.read()
-            video_url = upload_media_to_firebase(
-                file_bytes=file_content,
+            # Stream from the spooled upload instead of reading the whole video into memory
+            video_url = await run_in_threadpool(
+                upload_media_stream_to_firebase,
+                fileobj=video_file.file,
                 filename=video_file.filename,
                 brand_id=brand_id,
                 product_id=product_id,
@@ -1267,25 +1710,21 @@ async def update_product_platform_content(
                   platform_content["image_url"] = file_url
                   platform_content["media_type"] = "image"
             elif media_type == "carousel" and carousel_files:
-                carousel_urls = []
-                for idx, carousel_file in enumerate(carousel_files):
-                    file_content = await carousel_file.read()
-                    url = upload_media_to_firebase(
-                        file_bytes=file_content,
-                        filename=carousel_file.filename,
-                        brand_id=brand_id,
-                        product_id=product_id,
-                        platform=platform,
-                        media_type="carousel",
-                        index=idx
-                    )
-                    carousel_urls.append(url)
+                files = [(await carousel_file.read(), carousel_file.filename) for carousel_file in carousel_files]
+                carousel_urls = await run_in_threadpool(
+                    upload_carousel_to_firebase,
+                    files=files,
+                    brand_id=brand_id,
+                    product_id=product_id,
+                    platform=platform
+                )
                 platform_content["carousel_urls"] = carousel_urls
                 platform_content["media_type"] = "carousel"
             elif media_type == "video" and video_file:
-                file_content = await video_file.read()
-                video_url = upload_media_to_firebase(
-                    file_bytes=file_content,
+                # Stream from the spooled upload instead of reading the whole video into memory
+                video_url = await run_in_threadpool(
+                    upload_media_stream_to_firebase,
+                    fileobj=video_file.file,
                     filename=video_file.filename,
                     brand_id=brand_id,
                     product_id=product_id,
@@ -1389,6 +1828,18 @@ async def get_product_platform_content(product_id: str, platform: str):
         raise HTTPException(status_code=500, detail=f"Error retrieving content: {str(e)}")
 
 
+@app.get("/agents/stats")
+def get_agent_stats():
+    """In-flight and queued agent runs per generation kind, plus the job worker pool"""
+    return {**get_agent_executor_stats(), "generation_jobs": generation_jobs.stats()}
+
+
+@app.get("/cache/stats")
+def get_firestore_cache_stats():
+    """Hit/miss counters for the brand profile and product caches"""
+    return get_cache_stats()
+
+
 @app.get("/")
 def root():
     """Root endpoint with API information"""
@@ -22,6 +22,7 @@ STATE_STRUCTURED_OUTPUT = "structured_output"
 STATE_SEO_CONTENT       = "seo_content"
 STATE_PRODUCT_ID        = "product_id"
 STATE_PLATFORM          = "platform"
+STATE_PRELOADED_PRODUCT = "preloaded_product"
 
 
 
@@ -85,7 +86,7 @@ PLATFORM_GUIDELINES = {
     }
 }
 
-from firebase_utils import get_brand_profile_by_id
+from firebase_utils import get_brand_profile_by_id, product_field_path, record_saved_fields, update_product_fields
 import logging
 
 logger = logging.getLogger(__name__)
@@ -103,18 +104,21 @@ def get_product_seo_content(tool_context: ToolContext, product_id: str, platform
     try:
         print(f"  [Tool Call] Retrieving SEO content for product {product_id}, platform {platform}")
         
-        from firebase_utils import db
-        
-        # Get a reference to the product document
-        product_ref = db.collection('products').document(product_id)
-        product_doc = product_ref.get()
-        
-        if not product_doc.exists:
-            logger.error(f"No product found with ID: {product_id}")
-            tool_context.state["error"] = f"No product found with ID: {product_id}"
-            return {"error": f"No product found with ID: {product_id}"}
+        # Use the product loaded by the caller when the session was created (batch generation)
+        product_data = tool_context.state.get(STATE_PRELOADED_PRODUCT)
+        if not product_data or product_data.get('product_id') != product_id:
+            from firebase_utils import db
+            
+            # Get a reference to the product document
+            product_ref = db.collection('products').document(product_id)
+            product_doc = product_ref.get()
             
-        product_data = product_doc.to_dict()
+            if not product_doc.exists:
+                logger.error(f"No product found with ID: {product_id}")
+                tool_context.state["error"] = f"No product found with ID: {product_id}"
+                return {"error": f"No product found with ID: {product_id}"}
+                
+            product_data = product_doc.to_dict()
         
         # Check if SEO content exists for this product
         if 'seo_content' not in product_data:
@@ -161,7 +165,8 @@ def get_product_seo_content(tool_context: ToolContext, product_id: str, platform
         
         # Also fetch brand info if available
         brand_id = product_data.get('brand_id')
-        if brand_id:
+        preloaded_brand = tool_context.state.get(STATE_BRAND_INFO)
+        if brand_id and not (preloaded_brand and preloaded_brand.get('brand_id') == brand_id):
             brand_profile = get_brand_profile_by_id(brand_id)
             if brand_profile:
                 tool_context.state[STATE_BRAND_INFO] = brand_profile
@@ -201,29 +206,13 @@ def save_product_content(tool_context: ToolContext, content: Dict[str, Any]) ->
 
         structured_content = enforce_content_structure(platform, content)
         
-        from firebase_utils import db
-        
-        # Get a reference to the product document
-        product_ref = db.collection('products').document(product_id)
-        product_doc = product_ref.get()
-        
-        if not product_doc.exists:
-            error_msg = f"No product found with ID: {product_id}"
-            logger.error(error_msg)
-            return {"success": False, "error": error_msg}
-            
-        # Get the current product data
-        product_data = product_doc.to_dict()
-        
-        # Create content structure if it doesn't exist
-        if 'marketing_content' not in product_data:
-            product_data['marketing_content'] = {}
-            
-        # Save the content for the specific platform
-        product_data['marketing_content'][platform] = structured_content
-        
-        # Save back to Firebase
-        product_ref.update(product_data)
+        # Replace marketing_content.<platform> as a whole (media from an earlier run
+        # is cleared, so a failed media step can't pass as stored) without
+        # rewriting the rest of the product document
+        update_product_fields(product_id, {
+            product_field_path('marketing_content', platform): structured_content
+        })
+        record_saved_fields(tool_context.state, product_id, {'marketing_content': {platform: structured_content}})
         logger.info(f"Successfully saved content for product {product_id}, platform {platform}")
         
         return {
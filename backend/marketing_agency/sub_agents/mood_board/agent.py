@@ -14,7 +14,7 @@ from google.genai import Client, types
 from PIL import Image, ImageDraw, ImageFont
 from io import BytesIO
 import numpy as np
-from firebase_utils import db
+from firebase_utils import db, product_field_path, record_saved_fields, update_product_fields
 
 load_dotenv()
 
@@ -366,33 +366,17 @@ def save_palette_to_product(tool_context: ToolContext) -> Dict[str, Any]:
         palette_image = tool_context.state.get("palette_image", {})
         color_analysis = tool_context.state.get("color_analysis", {})
         
-        # Get a reference to the product document
-        product_ref = db.collection('products').document(product_id)
-        product_doc = product_ref.get()
-        
-        if not product_doc.exists:
-            return {"error": f"Product {product_id} no longer exists in the database."}
-            
-        product_data = product_doc.to_dict()
-        
-        # Ensure marketing_content exists
-        if 'marketing_content' not in product_data:
-            product_data['marketing_content'] = {}
-        
-        # Ensure platform exists in marketing_content
-        if platform not in product_data['marketing_content']:
-            product_data['marketing_content'][platform] = {}
-        
-        # Add color palette data
-        product_data['marketing_content'][platform]['color_palette'] = {
+        # Write only this platform's color palette
+        color_palette = {
             'hex_codes': hex_codes,
             'palette_image_url': palette_image.get("public_url", ""),
             'analysis': color_analysis,
             'generated_at': int(time.time())
         }
-        
-        # Update the document
-        product_ref.update(product_data)
+        update_product_fields(product_id, {
+            product_field_path('marketing_content', platform, 'color_palette'): color_palette
+        })
+        record_saved_fields(tool_context.state, product_id, {'marketing_content': {platform: {'color_palette': color_palette}}})
         
         return {
             "status": "success",
@@ -9,7 +9,7 @@ GEMINI_MODEL = "gemini-2.0-flash"
 
 import logging
 from typing import Dict, Any, List, Optional
-from firebase_utils import get_brand_profile_by_id
+from firebase_utils import get_brand_profile_by_id, product_field_path, record_saved_fields, update_product_fields
 from google.adk.tools.tool_context import ToolContext
 
 logger = logging.getLogger(__name__)
@@ -153,37 +153,13 @@ def save_product_seo_content(tool_context: ToolContext, product_id: str, seo_con
         print(f"SAVE: Starting save operation for product_id={product_id}")
         print(f"SAVE: Content structure received: {list(seo_content.keys())}")
         
-        from firebase_utils import db
-        
-        # Get a reference to the product document
-        product_ref = db.collection('products').document(product_id)
-        product_doc = product_ref.get()
-        
-        if not product_doc.exists:
-            error_msg = f"SAVE ERROR: No product found with ID: {product_id}"
-            print(error_msg)
-            logger.error(error_msg)
-            tool_context.state["error"] = error_msg
-            return False
-            
-        # Get the current product data
-        product_data = product_doc.to_dict()
-        print(f"SAVE: Retrieved existing product data with keys: {list(product_data.keys())}")
-        
-        # Update the product with the new SEO content
-        if 'seo_content' in product_data:
-            print(f"SAVE: Updating existing seo_content")
-            # If seo_content already exists, update it by platform
-            for platform, content in seo_content.items():
-                product_data['seo_content'][platform] = content
-        else:
-            print(f"SAVE: Creating new seo_content field")
-            # If seo_content doesn't exist, create it
-            product_data['seo_content'] = seo_content
-        
-        # Save back to Firebase
-        print(f"SAVE: Updating document in Firebase")
-        product_ref.update(product_data)
+        # Update seo_content key by key; existing keys not in seo_content are kept
+        print(f"SAVE: Updating seo_content fields in Firebase")
+        update_product_fields(product_id, {
+            product_field_path('seo_content', key): content
+            for key, content in seo_content.items()
+        })
+        record_saved_fields(tool_context.state, product_id, {'seo_content': seo_content})
         success_msg = f"SAVE SUCCESS: Saved SEO content for product {product_id}"
         print(success_msg)
         logger.info(success_msg)
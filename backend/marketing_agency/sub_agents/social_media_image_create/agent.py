@@ -21,7 +21,7 @@ storage_client = storage.Client()
 BUCKET_NAME = "brandvoice-images"
 
 
-from firebase_utils import db
+from firebase_utils import db, product_field_path, record_saved_fields, update_product_fields, upload_blobs_concurrently
 import logging
 
 logger = logging.getLogger(__name__)
@@ -126,8 +126,11 @@ def get_content_from_database(tool_context: ToolContext, product_id: str, platfo
         # Fetch brand info if available
         brand_id = product_data.get('brand_id')
         if brand_id:
-            from firebase_utils import get_brand_profile_by_id
-            brand_profile = get_brand_profile_by_id(brand_id)
+            # Reuse the brand profile loaded by the caller when the session was created
+            brand_profile = tool_context.state.get("brand_info")
+            if not brand_profile or brand_profile.get("brand_id") != brand_id:
+                from firebase_utils import get_brand_profile_by_id
+                brand_profile = get_brand_profile_by_id(brand_id)
             if brand_profile:
                 tool_context.state["brand_info"] = brand_profile
                 tool_context.state["brand_name"] = brand_profile.get("brand_name", "")
@@ -590,27 +593,12 @@ def generate_single_image(tool_context, enhanced_prompt, platform, product_id,
         # Save the image URL back to the marketing content in Firebase
         if product_id and platform:
             try:
-                # Get a reference to the product document
-                product_ref = db.collection('products').document(product_id)
-                product_doc = product_ref.get()
-                
-                if product_doc.exists:
-                    product_data = product_doc.to_dict()
-                    
-                    # Make sure marketing_content exists
-                    if 'marketing_content' not in product_data:
-                        product_data['marketing_content'] = {}
-                    
-                    # Make sure platform exists in marketing_content
-                    if platform not in product_data['marketing_content']:
-                        product_data['marketing_content'][platform] = {}
-                    
-                    # Add the image URL to the marketing content
-                    product_data['marketing_content'][platform]['image_url'] = public_url
-                    
-                    # Update the document
-                    product_ref.update(product_data)
-                    print(f"  [Tool Call] Updated product {product_id} with image URL for {platform}")
+                # Write only this platform's image_url so parallel platform runs don't overwrite each other
+                update_product_fields(product_id, {
+                    product_field_path('marketing_content', platform, 'image_url'): public_url
+                })
+                record_saved_fields(tool_context.state, product_id, {'marketing_content': {platform: {'image_url': public_url}}})
+                print(f"  [Tool Call] Updated product {product_id} with image URL for {platform}")
             except Exception as e:
                 print(f"  [Tool Call] Error updating product with image URL: {str(e)}")
         
@@ -654,6 +642,7 @@ def generate_carousel_images(tool_context, enhanced_prompt, platform, product_id
     
     results = []
     image_urls = []
+    uploads = []
     
     for i, generated_image in enumerate(response.generated_images):
         image_bytes = generated_image.image.image_bytes
@@ -667,58 +656,42 @@ def generate_carousel_images(tool_context, enhanced_prompt, platform, product_id
             types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
         )
 
-        try:
-            # Create a path within the bucket: brand/product/platform/carousel/filename
-            gcs_path = f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/carousel/{filename}"
-            
-            # Upload to Google Cloud Storage
-            blob = bucket.blob(gcs_path)
-            blob.upload_from_string(image_bytes, content_type="image/png")
-            
-            # Make the blob publicly accessible
-            blob.make_public()
-            public_url = blob.public_url
-            
-            # Add to the list of URLs
-            image_urls.append(public_url)
-            
-            results.append({
-                "filename": filename,
-                "gcs_path": gcs_path,
-                "public_url": public_url
-            })
-            
-        except Exception as e:
+        # Create a path within the bucket: brand/product/platform/carousel/filename
+        uploads.append({
+            "gcs_path": f"{safe_brand_name}/{safe_product_id}/{platform.lower()}/carousel/{filename}",
+            "data": image_bytes,
+            "content_type": "image/png",
+            "filename": filename
+        })
+    
+    # Upload all carousel images in parallel, made public in the same request
+    for i, (upload, uploaded) in enumerate(zip(uploads, upload_blobs_concurrently(uploads, target_bucket=bucket))):
+        if "error" in uploaded:
             results.append({
                 "status": "failed",
-                "error": f"Failed to upload carousel image {i+1}: {str(e)}",
-                "filename": filename
+                "error": f"Failed to upload carousel image {i+1}: {uploaded['error']}",
+                "filename": upload["filename"]
             })
+            continue
+        
+        # Add to the list of URLs
+        image_urls.append(uploaded["public_url"])
+        
+        results.append({
+            "filename": upload["filename"],
+            "gcs_path": uploaded["gcs_path"],
+            "public_url": uploaded["public_url"]
+        })
     
     # Save all carousel image URLs back to the marketing content in Firebase
     if product_id and platform and image_urls:
         try:
-            # Get a reference to the product document
-            product_ref = db.collection('products').document(product_id)
-            product_doc = product_ref.get()
-            
-            if product_doc.exists:
-                product_data = product_doc.to_dict()
-                
-                # Make sure marketing_content exists
-                if 'marketing_content' not in product_data:
-                    product_data['marketing_content'] = {}
-                
-                # Make sure platform exists in marketing_content
-                if platform not in product_data['marketing_content']:
-                    product_data['marketing_content'][platform] = {}
-                
-                # Add the carousel image URLs to the marketing content
-                product_data['marketing_content'][platform]['carousel_urls'] = image_urls
-                
-                # Update the document
-                product_ref.update(product_data)
-                print(f"  [Tool Call] Updated product {product_id} with carousel URLs for {platform}")
+            # Write only this platform's carousel_urls so parallel platform runs don't overwrite each other
+            update_product_fields(product_id, {
+                product_field_path('marketing_content', platform, 'carousel_urls'): image_urls
+            })
+            record_saved_fields(tool_context.state, product_id, {'marketing_content': {platform: {'carousel_urls': image_urls}}})
+            print(f"  [Tool Call] Updated product {product_id} with carousel URLs for {platform}")
         except Exception as e:
             print(f"  [Tool Call] Error updating product with carousel URLs: {str(e)}")
     
@@ -823,27 +796,12 @@ def generate_video_content(tool_context, enhanced_prompt, platform, product_id,
 
         if product_id and platform:
             try:
-                # Get a reference to the product document
-                product_ref = db.collection('products').document(product_id)
-                product_doc = product_ref.get()
-                
-                if product_doc.exists:
-                    product_data = product_doc.to_dict()
-                    
-                    # Make sure marketing_content exists
-                    if 'marketing_content' not in product_data:
-                        product_data['marketing_content'] = {}
-                    
-                    # Make sure platform exists in marketing_content
-                    if platform not in product_data['marketing_content']:
-                        product_data['marketing_content'][platform] = {}
-                    
-                    # Add the video URL to the marketing content
-                    product_data['marketing_content'][platform]['video_url'] = public_url
-                    
-                    # Update the document
-                    product_ref.update(product_data)
-                    print(f"  [Tool Call] Updated product {product_id} with video URL for {platform}")
+                # Write only this platform's video_url so parallel platform runs don't overwrite each other
+                update_product_fields(product_id, {
+                    product_field_path('marketing_content', platform, 'video_url'): public_url
+                })
+                record_saved_fields(tool_context.state, product_id, {'marketing_content': {platform: {'video_url': public_url}}})
+                print(f"  [Tool Call] Updated product {product_id} with video URL for {platform}")
             except Exception as e:
                 print(f"  [Tool Call] Error updating product with video URL: {str(e)}")
 
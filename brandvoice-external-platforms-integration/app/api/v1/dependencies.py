@@ -2,7 +2,8 @@ from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.models.user import User
 from app.services.user_service import UserService
-from app.models.firestore_db import verify_firebase_token, FirestoreSession
+from app.models.firestore_db import FirestoreSession
+from app.core.auth_cache import auth_cache
 from app.core.db_dependencies import db_session
 
 security = HTTPBearer()
@@ -21,18 +22,23 @@ async def get_current_user(
 ) -> User:
     """
     Get the current user from the token.
+    Verified tokens and users are cached (app/core/auth_cache.py).
     """
     try:
         # Verify Firebase token
-        decoded_token = await verify_firebase_token(credentials.credentials)
+        decoded_token = await auth_cache.verify_token(credentials.credentials)
+        uid = decoded_token["uid"]
         
         # Get user from Firestore using Firebase UID
-        user = await user_service.get_user_by_firebase_uid(decoded_token["uid"])
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        user = auth_cache.get_user(uid)
+        if user is None:
+            user = await user_service.get_user_by_firebase_uid(uid)
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            auth_cache.put_user(uid, user)
         
         return user
     except Exception as e:
@@ -9,6 +9,7 @@ from app.models.firestore_db import (
     get_firebase_user,
     sign_in_with_email_password
 )
+from app.core.auth_cache import auth_cache
 from app.core.db_dependencies import db_session
 from typing import Dict
 
@@ -103,6 +104,7 @@ async def update_current_user_info(
         )
     
     await user_service.update_user(current_user.id, update_data)
+    auth_cache.invalidate_user(current_user.firebase_uid)
     
     # Get updated user
     if not current_user.firebase_uid:
@@ -122,6 +124,7 @@ async def delete_current_user(
     Delete current user account.
     """
     success = await user_service.delete_user(str(current_user.id))
+    auth_cache.invalidate_user(current_user.firebase_uid)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
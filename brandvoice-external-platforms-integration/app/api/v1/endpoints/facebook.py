@@ -5,8 +5,10 @@ from app.core.db_dependencies import db_session
 from app.api.v1.dependencies import get_current_user
 from app.services import facebook_service as fb
 from app.services.facebook_service import post_video
+from app.services.credential_resolver import credential_resolver
 from app.models.firestore_db import FirestoreSession
 import httpx
+from app.core.http import get_http_client
 from app.core.config import get_settings
 from typing import List
 from app.models.facebook import FacebookCredential, FacebookCredentialCreate, FacebookCredentialUpdate
@@ -62,11 +64,11 @@ async def fb_callback(
         "code": code
     }
     
-    async with httpx.AsyncClient() as client:
-        r = await client.get(token_url, params=params)
-        if r.status_code != 200:
-            raise HTTPException(400, f"Token exchange failed: {r.text}")
-        token_data = r.json()
+    client = get_http_client("graph")
+    r = await client.get(token_url, params=params)
+    if r.status_code != 200:
+        raise HTTPException(400, f"Token exchange failed: {r.text}")
+    token_data = r.json()
     
     # Get user ID from state
     user_id = state
@@ -85,21 +87,19 @@ async def fb_callback(
         "fb_exchange_token": token_data["access_token"]
     }
     
-    async with httpx.AsyncClient() as client:
-        r = await client.get(token_url, params=params)
-        if r.status_code != 200:
-            raise HTTPException(400, f"Long-lived token exchange failed: {r.text}")
-        long_lived_token = r.json()["access_token"]
+    r = await client.get(token_url, params=params)
+    if r.status_code != 200:
+        raise HTTPException(400, f"Long-lived token exchange failed: {r.text}")
+    long_lived_token = r.json()["access_token"]
     
     # Get user's Facebook pages
     pages_url = "https://graph.facebook.com/v23.0/me/accounts"
     params = {"access_token": long_lived_token}
     
-    async with httpx.AsyncClient() as client:
-        r = await client.get(pages_url, params=params)
-        if r.status_code != 200:
-            raise HTTPException(400, f"Failed to get pages: {r.text}")
-        pages_data = r.json()
+    r = await client.get(pages_url, params=params)
+    if r.status_code != 200:
+        raise HTTPException(400, f"Failed to get pages: {r.text}")
+    pages_data = r.json()
     
     # For each page, store Facebook credentials and get Instagram account
     for page in pages_data.get("data", []):
@@ -110,11 +110,10 @@ async def fb_callback(
             "access_token": long_lived_token
         }
         
-        async with httpx.AsyncClient() as client:
-            r = await client.get(page_token_url, params=params)
-            if r.status_code != 200:
-                continue
-            page_token = r.json()["access_token"]
+        r = await client.get(page_token_url, params=params)
+        if r.status_code != 200:
+            continue
+        page_token = r.json()["access_token"]
         
         # Store Facebook credentials
         fb_credential_data = {
@@ -152,46 +151,47 @@ async def fb_callback(
             "access_token": page_token
         }
         
-        async with httpx.AsyncClient() as client:
-            r = await client.get(instagram_url, params=params)
-            if r.status_code != 200:
-                continue
-            instagram_data = r.json()
+        r = await client.get(instagram_url, params=params)
+        if r.status_code != 200:
+            continue
+        instagram_data = r.json()
             
-            if "instagram_business_account" in instagram_data:
-                instagram_account = instagram_data["instagram_business_account"]
+        if "instagram_business_account" in instagram_data:
+            instagram_account = instagram_data["instagram_business_account"]
                 
-                # Create or update Instagram credential
-                instagram_credential_data = {
-                    "user_id": user_id,
-                    "instagram_account_id": instagram_account["id"],
-                    "access_token": page_token,
-                    "page_id": page["id"],
-                    "page_name": page["name"],
-                    "account_name": instagram_account.get("username"),
-                    "is_active": True
-                }
+            # Create or update Instagram credential
+            instagram_credential_data = {
+                "user_id": user_id,
+                "instagram_account_id": instagram_account["id"],
+                "access_token": page_token,
+                "page_id": page["id"],
+                "page_name": page["name"],
+                "account_name": instagram_account.get("username"),
+                "is_active": True
+            }
                 
-                # Check if Instagram credential exists
-                existing_instagram_credentials = await db.query(
+            # Check if Instagram credential exists
+            existing_instagram_credentials = await db.query(
+                "instagram_credentials",
+                filters=[
+                    ("user_id", "==", user_id),
+                    ("instagram_account_id", "==", instagram_account["id"])
+                ]
+            )
+                
+            if existing_instagram_credentials:
+                # Update existing Instagram credential
+                await db.update(
                     "instagram_credentials",
-                    filters=[
-                        ("user_id", "==", user_id),
-                        ("instagram_account_id", "==", instagram_account["id"])
-                    ]
+                    existing_instagram_credentials[0]["id"],
+                    instagram_credential_data
                 )
-                
-                if existing_instagram_credentials:
-                    # Update existing Instagram credential
-                    await db.update(
-                        "instagram_credentials",
-                        existing_instagram_credentials[0]["id"],
-                        instagram_credential_data
-                    )
-                else:
-                    # Create new Instagram credential
-                    await db.add("instagram_credentials", instagram_credential_data)
+            else:
+                # Create new Instagram credential
+                await db.add("instagram_credentials", instagram_credential_data)
     
+    credential_resolver.invalidate(user_id, "facebook")
+    credential_resolver.invalidate(user_id, "instagram")
     return {"message": "Facebook and Instagram accounts connected successfully"}
 
 # ---------- posting ---------- #
@@ -203,15 +203,10 @@ async def post_message(
     db: FirestoreSession = Depends(db_session)
 ):
     # Get user's Facebook credentials
-    credentials = await db.query(
-        "facebook_credentials",
-        filters=[("user_id", "==", str(user.id))]
-    )
-    if not credentials:
+    credential = await credential_resolver.get(db, "facebook", str(user.id))
+    if not credential:
         raise HTTPException(status_code=401, detail="Facebook credentials not found")
     
-    credential = credentials[0]
-    
     # Upload photo if provided
     photo_id = None
     if file:
@@ -219,43 +214,43 @@ async def post_message(
         with open(path, "wb") as f:
             f.write(await file.read())
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"https://graph.facebook.com/v23.0/{credential['page_id']}/photos",
-                params={
-                    "access_token": credential["access_token"],
-                    "published": False
-                },
-                files={
-                    "source": open(path, "rb")
-                }
-            )
+        client = get_http_client("graph")
+        response = await client.post(
+            f"https://graph.facebook.com/v23.0/{credential['page_id']}/photos",
+            params={
+                "access_token": credential["access_token"],
+                "published": False
+            },
+            files={
+                "source": open(path, "rb")
+            }
+        )
             
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail="Failed to upload photo")
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail="Failed to upload photo")
             
-            photo_id = response.json()["id"]
+        photo_id = response.json()["id"]
         
         os.remove(path)
     
     # Create post
-    async with httpx.AsyncClient() as client:
-        data = {
-            "message": message,
-            "access_token": credential["access_token"]
-        }
-        if photo_id:
-            data["attached_media"] = [{"media_fbid": photo_id}]
+    client = get_http_client("graph")
+    data = {
+        "message": message,
+        "access_token": credential["access_token"]
+    }
+    if photo_id:
+        data["attached_media"] = [{"media_fbid": photo_id}]
         
-        response = await client.post(
-            f"https://graph.facebook.com/v23.0/{credential['page_id']}/feed",
-            data=data
-        )
+    response = await client.post(
+        f"https://graph.facebook.com/v23.0/{credential['page_id']}/feed",
+        data=data
+    )
         
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail="Failed to create post")
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Failed to create post")
         
-        post_id = response.json()["id"]
+    post_id = response.json()["id"]
     
     return {"post_id": post_id}
 
@@ -275,13 +270,9 @@ async def fb_photo(
             raise HTTPException(status_code=404, detail="Credential not found")
     else:
         # Get the default (first active) credential
-        credentials = await db.query(
-            "facebook_credentials",
-            filters=[("user_id", "==", str(user.id)), ("is_active", "==", True)]
-        )
-        if not credentials:
+        credential = await credential_resolver.get(db, "facebook", str(user.id))
+        if not credential:
             raise HTTPException(status_code=400, detail="No Facebook account connected")
-        credential = credentials[0]
     
     url = f"https://graph.facebook.com/v23.0/{credential['page_id']}/photos"
     params = {
@@ -289,8 +280,8 @@ async def fb_photo(
         "message": message or "",
         "access_token": credential["access_token"]
     }
-    async with httpx.AsyncClient() as client:
-        r = await client.post(url, data=params)
+    client = get_http_client("graph")
+    r = await client.post(url, data=params)
     if r.status_code != 200:
         raise HTTPException(400, f"Photo upload failed: {r.text}")
     return r.json()
@@ -312,13 +303,9 @@ async def fb_video(
             raise HTTPException(status_code=404, detail="Credential not found")
     else:
         # Get the default (first active) credential
-        credentials = await db.query(
-            "facebook_credentials",
-            filters=[("user_id", "==", str(user.id)), ("is_active", "==", True)]
-        )
-        if not credentials:
+        credential = await credential_resolver.get(db, "facebook", str(user.id))
+        if not credential:
             raise HTTPException(status_code=400, detail="No Facebook account connected")
-        credential = credentials[0]
         credential_id = credential["id"]  # Store the credential ID for later use
     
     # First, create a video container
@@ -331,28 +318,28 @@ async def fb_video(
     }
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:  # 30 second timeout for initial request
-            r = await client.post(url, data=params)
-            if r.status_code != 200:
-                raise HTTPException(400, f"Video upload failed: {r.text}")
-            response = r.json()
+        client = get_http_client("graph")
+        r = await client.post(url, data=params, timeout=30.0)
+        if r.status_code != 200:
+            raise HTTPException(400, f"Video upload failed: {r.text}")
+        response = r.json()
             
-            # Store the upload status in the database
-            status_data = {
-                "user_id": str(user.id),
-                "credential_id": credential_id,
-                "video_id": response.get("id"),
-                "status": "processing",
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            await db.add("video_uploads", status_data)
+        # Store the upload status in the database
+        status_data = {
+            "user_id": str(user.id),
+            "credential_id": credential_id,
+            "video_id": response.get("id"),
+            "status": "processing",
+            "created_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        await db.add("video_uploads", status_data)
             
-            return {
-                "video_id": response.get("id"),
-                "status": "processing",
-                "message": "Video upload started. Use /video/{video_id}/status to check progress."
-            }
+        return {
+            "video_id": response.get("id"),
+            "status": "processing",
+            "message": "Video upload started. Use /video/{video_id}/status to check progress."
+        }
     except httpx.TimeoutException:
         raise HTTPException(408, "Request timed out. The video might be too large or the server might be busy.")
     except httpx.RequestError as e:
@@ -373,13 +360,9 @@ async def video_status(
             raise HTTPException(status_code=404, detail="Credential not found")
     else:
         # Get the default (first active) credential
-        credentials = await db.query(
-            "facebook_credentials",
-            filters=[("user_id", "==", str(user.id)), ("is_active", "==", True)]
-        )
-        if not credentials:
+        credential = await credential_resolver.get(db, "facebook", str(user.id))
+        if not credential:
             raise HTTPException(status_code=400, detail="No Facebook account connected")
-        credential = credentials[0]
     
     # Check status from Facebook
     url = f"https://graph.facebook.com/v23.0/{video_id}"
@@ -389,37 +372,37 @@ async def video_status(
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            r = await client.get(url, params=params)
-            if r.status_code != 200:
-                raise HTTPException(400, f"Failed to get video status: {r.text}")
+        client = get_http_client("graph")
+        r = await client.get(url, params=params, timeout=10.0)
+        if r.status_code != 200:
+            raise HTTPException(400, f"Failed to get video status: {r.text}")
             
-            status_data = r.json()
+        status_data = r.json()
             
-            # Update status in database
-            uploads = await db.query(
+        # Update status in database
+        uploads = await db.query(
+            "video_uploads",
+            filters=[
+                ("user_id", "==", str(user.id)),
+                ("video_id", "==", video_id)
+            ]
+        )
+            
+        if uploads:
+            await db.update(
                 "video_uploads",
-                filters=[
-                    ("user_id", "==", str(user.id)),
-                    ("video_id", "==", video_id)
-                ]
+                uploads[0]["id"],
+                {
+                    "status": status_data.get("status", "unknown"),
+                    "updated_at": datetime.utcnow().isoformat()
+                }
             )
             
-            if uploads:
-                await db.update(
-                    "video_uploads",
-                    uploads[0]["id"],
-                    {
-                        "status": status_data.get("status", "unknown"),
-                        "updated_at": datetime.utcnow().isoformat()
-                    }
-                )
-            
-            return {
-                "video_id": video_id,
-                "status": status_data.get("status", "unknown"),
-                "status_video": status_data.get("status_video", {})
-            }
+        return {
+            "video_id": video_id,
+            "status": status_data.get("status", "unknown"),
+            "status_video": status_data.get("status_video", {})
+        }
     except httpx.TimeoutException:
         raise HTTPException(408, "Request timed out while checking video status")
     except httpx.RequestError as e:
@@ -500,6 +483,7 @@ async def update_facebook_credential(
     update_data = credential.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
     await db.update("facebook_credentials", credential_id, update_data)
+    credential_resolver.invalidate(existing_credential["user_id"], "facebook")
     
     updated_credential = await db.get("facebook_credentials", credential_id)
     return updated_credential
@@ -516,4 +500,5 @@ async def delete_facebook_credential(
         raise HTTPException(status_code=404, detail="Credential not found")
     
     await db.delete("facebook_credentials", credential_id)
+    credential_resolver.invalidate(credential["user_id"], "facebook")
     return {"message": "Credential deleted successfully"}
@@ -6,6 +6,9 @@ from app.api.v1.dependencies import get_current_user
 from app.models.firestore_db import FirestoreSession
 from app.models.instagram import InstagramCredential, InstagramCredentialCreate, InstagramCredentialUpdate
 import httpx
+from app.core.http import get_http_client
+from app.services.credential_resolver import credential_resolver
+from app.services.instagram_service import fetch_container_statuses
 from starlette.responses import RedirectResponse
 from datetime import datetime, timedelta
 
@@ -45,14 +48,14 @@ async def instagram_callback(
         "code": code
     }
 
-    async with httpx.AsyncClient() as client:
-        response1 = await client.get(token_url, params=params)
-        if response1.status_code != 200:
-            raise HTTPException(status_code=response1.status_code,
-                              detail="Failed to get access token from Facebook.")
-        data = response1.json()
-        access_token = data.get("access_token")
-        expires_in = data.get("expires_in", 0)
+    client = get_http_client("graph")
+    response1 = await client.get(token_url, params=params)
+    if response1.status_code != 200:
+        raise HTTPException(status_code=response1.status_code,
+                          detail="Failed to get access token from Facebook.")
+    data = response1.json()
+    access_token = data.get("access_token")
+    expires_in = data.get("expires_in", 0)
 
     exchange_url = "https://graph.facebook.com/v23.0/oauth/access_token"
     exchange_params = {
@@ -62,19 +65,17 @@ async def instagram_callback(
         "client_secret": settings.facebook_app_secret
     }
 
-    async with httpx.AsyncClient() as client:
-        response2 = await client.get(exchange_url, params=exchange_params)
-        if response2.status_code != 200:
-            raise HTTPException(status_code=response2.status_code,
-                              detail="Failed to exchange access token.")
-        data = response2.json()
-        long_lived_token = data.get("access_token")
-        long_lived_expires_in = data.get("expires_in", 0)
+    response2 = await client.get(exchange_url, params=exchange_params)
+    if response2.status_code != 200:
+        raise HTTPException(status_code=response2.status_code,
+                          detail="Failed to exchange access token.")
+    data = response2.json()
+    long_lived_token = data.get("access_token")
+    long_lived_expires_in = data.get("expires_in", 0)
 
     # Fetch Page list to get the Page ID
     pages_url = "https://graph.facebook.com/v23.0/me/accounts"
-    async with httpx.AsyncClient() as client:
-        r3 = await client.get(pages_url, params={"access_token": long_lived_token})
+    r3 = await client.get(pages_url, params={"access_token": long_lived_token})
     if r3.status_code != 200 or not (pages := r3.json().get("data")):
         raise HTTPException(status_code=400, detail="Failed to fetch Facebook Pages")
     
@@ -85,11 +86,10 @@ async def instagram_callback(
 
     # Get IG Business Account ID
     ig_url = f"https://graph.facebook.com/v23.0/{page_id}"
-    async with httpx.AsyncClient() as client:
-        r4 = await client.get(ig_url, params={
-            "fields": "instagram_business_account{id,username}",
-            "access_token": long_lived_token
-        })
+    r4 = await client.get(ig_url, params={
+        "fields": "instagram_business_account{id,username}",
+        "access_token": long_lived_token
+    })
     if r4.status_code != 200 or not (ig := r4.json().get("instagram_business_account")):
         raise HTTPException(status_code=400, detail="No Instagram Business account found")
     
@@ -126,6 +126,7 @@ async def instagram_callback(
     else:
         # Create new credential
         credential_id = await db.add("instagram_credentials", credential_data)
+    credential_resolver.invalidate(state, "instagram")
 
     return {
         "status": "connected",
@@ -177,6 +178,7 @@ async def delete_credential(
         raise HTTPException(status_code=403, detail="Not authorized to delete this credential")
     
     await db.update("instagram_credentials", credential_id, {"is_active": False})
+    credential_resolver.invalidate(credential["user_id"], "instagram")
     return None
 
 # Media endpoints remain the same but use the credential from the database
@@ -195,13 +197,9 @@ async def create_media(
             raise HTTPException(status_code=404, detail="Credential not found")
     else:
         # Get the default (first active) credential
-        credentials = await db.query(
-            "instagram_credentials",
-            filters=[("user_id", "==", str(user.id)), ("is_active", "==", True)]
-        )
-        if not credentials:
+        credential = await credential_resolver.get(db, "instagram", str(user.id))
+        if not credential:
             raise HTTPException(status_code=400, detail="No Instagram account connected")
-        credential = credentials[0]
     
     url = f"https://graph.facebook.com/v23.0/{credential['instagram_account_id']}/media"
     params = {
@@ -209,13 +207,43 @@ async def create_media(
         "caption": caption or "",
         "access_token": credential["access_token"]
     }
-    async with httpx.AsyncClient() as client:
-        r = await client.post(url, data=params)
+    client = get_http_client("graph")
+    r = await client.post(url, data=params)
     if r.status_code != 200:
         raise HTTPException(400, f"Media create failed: {r.text}")
     container_id = r.json()["id"]
     return {"container_id": container_id}
 
+@router.get("/media/status")
+async def media_statuses(
+    container_ids: str,
+    credential_id: str | None = None,
+    user: User = Depends(get_current_user),
+    db: FirestoreSession = Depends(get_db)
+):
+    """Status of several containers (comma-separated ids) in one Graph API request."""
+    # Get the credential
+    if credential_id:
+        credential = await db.get("instagram_credentials", credential_id)
+        if not credential or credential["user_id"] != str(user.id):
+            raise HTTPException(status_code=404, detail="Credential not found")
+    else:
+        # Get the default (first active) credential
+        credential = await credential_resolver.get(db, "instagram", str(user.id))
+        if not credential:
+            raise HTTPException(status_code=400, detail="No Instagram account connected")
+
+    ids = [c.strip() for c in container_ids.split(",") if c.strip()]
+    if not ids:
+        raise HTTPException(400, "No container ids given")
+    try:
+        statuses = await fetch_container_statuses(
+            ids, credential["access_token"], credential["instagram_account_id"]
+        )
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(400, f"Status fetch failed: {e.response.text}")
+    return {cid: {"status_code": statuses.get(cid, {}).get("status_code")} for cid in ids}
+
 @router.get("/media/{container_id}/status")
 async def media_status(
     container_id: str,
@@ -230,21 +258,17 @@ async def media_status(
             raise HTTPException(status_code=404, detail="Credential not found")
     else:
         # Get the default (first active) credential
-        credentials = await db.query(
-            "instagram_credentials",
-            filters=[("user_id", "==", str(user.id)), ("is_active", "==", True)]
-        )
-        if not credentials:
+        credential = await credential_resolver.get(db, "instagram", str(user.id))
+        if not credential:
             raise HTTPException(status_code=400, detail="No Instagram account connected")
-        credential = credentials[0]
     
     url = f"https://graph.facebook.com/v23.0/{container_id}"
     params = {
         "fields": "status_code",
         "access_token": credential["access_token"]
     }
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, params=params)
+    client = get_http_client("graph")
+    r = await client.get(url, params=params)
     if r.status_code != 200:
         raise HTTPException(400, f"Status fetch failed: {r.text}")
     return {"status_code": r.json().get("status_code")}
@@ -263,21 +287,17 @@ async def publish_media(
             raise HTTPException(status_code=404, detail="Credential not found")
     else:
         # Get the default (first active) credential
-        credentials = await db.query(
-            "instagram_credentials",
-            filters=[("user_id", "==", str(user.id)), ("is_active", "==", True)]
-        )
-        if not credentials:
+        credential = await credential_resolver.get(db, "instagram", str(user.id))
+        if not credential:
             raise HTTPException(status_code=400, detail="No Instagram account connected")
-        credential = credentials[0]
     
     url = f"https://graph.facebook.com/v23.0/{credential['instagram_account_id']}/media_publish"
     params = {
         "creation_id": container_id,
         "access_token": credential["access_token"]
     }
-    async with httpx.AsyncClient() as client:
-        r = await client.post(url, data=params)
+    client = get_http_client("graph")
+    r = await client.post(url, data=params)
     if r.status_code != 200:
         raise HTTPException(400, f"Publish failed: {r.text}")
     return {"media_object_id": r.json()["id"]}
@@ -1,18 +1,24 @@
+import asyncio
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from uuid import UUID
 
 from app.api.v1.dependencies import get_current_user
 from app.core.db_dependencies import get_db
-from app.models.enums import ScheduleState
+from app.models.enums import Platform, ScheduleState
 from app.models.firestore_db import FirestoreSession
 from app.models.schedule import Schedule, ScheduleCreate, ScheduleUpdate
 from app.models.user import User
+from app.services.publish_payload import resolve_payload
 
 router = APIRouter()
 
+# Page size when the caller does not give one; upper bound otherwise
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 
 # ────────────────────────────────────────────────────────────────────
 # helpers
@@ -25,17 +31,103 @@ def _assert_owner(user_id: str, current_user: User):
         )
 
 
+def _schedule_filters(
+    user_id: str,
+    status_: Optional[ScheduleState] = None,
+    platform: Optional[Platform] = None,
+    run_at_from: Optional[datetime] = None,
+    run_at_to: Optional[datetime] = None,
+) -> list:
+    """
+    Firestore filters for a user's schedules. Combined with ordering on
+    run_at these need the composite indexes in firestore.indexes.json
+    (user_id, [platforms], [status], run_at).
+    """
+    filters = [("user_id", "==", user_id)]
+    if status_ is not None:
+        filters.append(("status", "==", status_.value))
+    if platform is not None:
+        filters.append(("platforms", "array_contains", platform.value))
+    if run_at_from is not None:
+        filters.append(("run_at", ">=", _as_utc(run_at_from)))
+    if run_at_to is not None:
+        filters.append(("run_at", "<", _as_utc(run_at_to)))
+    return filters
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+async def _refresh_payload(db: FirestoreSession, schedule: dict) -> dict:
+    """Re-resolve the publish payload of a schedule from its product's current content."""
+    payload = await resolve_payload(db, schedule.get("product_id"), schedule.get("platforms") or [])
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    await db.update("schedules", schedule["id"], {"payload": payload})
+    return await db.get("schedules", schedule["id"])
+
+
 # ────────────────────────────────────────────────────────────────────
 # routes
 # ────────────────────────────────────────────────────────────────────
 @router.get("/", response_model=List[Schedule])
 async def list_schedules(
     user_id: str,
+    response: Response,
+    status_: Optional[ScheduleState] = Query(None, alias="status"),
+    platform: Optional[Platform] = None,
+    run_at_from: Optional[datetime] = None,
+    run_at_to: Optional[datetime] = None,
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: FirestoreSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    A user's schedules ordered by run_at, optionally filtered by status,
+    platform and a [run_at_from, run_at_to) range.
+
+    Always paged: one page of `page_size` (default DEFAULT_PAGE_SIZE) per call.
+    The cursor for the next page comes back in the `X-Next-Cursor` header,
+    which is empty on the last page.
+    """
+    _assert_owner(user_id, current_user)
+    filters = _schedule_filters(user_id, status_, platform, run_at_from, run_at_to)
+
+    try:
+        page, next_cursor = await db.query_page(
+            "schedules",
+            filters,
+            order_by="run_at",
+            page_size=page_size,
+            start_after=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response.headers["X-Next-Cursor"] = next_cursor or ""
+    return page
+
+
+@router.get("/counts", response_model=Dict[str, int])
+async def count_schedules(
+    user_id: str,
+    platform: Optional[Platform] = None,
+    run_at_from: Optional[datetime] = None,
+    run_at_to: Optional[datetime] = None,
     db: FirestoreSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """Badge counts per status (and the total) from count() aggregations; no documents are read."""
     _assert_owner(user_id, current_user)
-    return await db.query("schedules", filters=[("user_id", "==", user_id)])
+
+    async def count(status_: Optional[ScheduleState]) -> int:
+        filters = _schedule_filters(user_id, status_, platform, run_at_from, run_at_to)
+        return await db.count("schedules", filters)
+
+    states = list(ScheduleState)
+    totals = await asyncio.gather(count(None), *(count(state) for state in states))
+    return {"total": totals[0], **{state.value: n for state, n in zip(states, totals[1:])}}
 
 
 @router.post("/", response_model=Schedule, status_code=status.HTTP_201_CREATED)
@@ -57,6 +149,11 @@ async def create_schedule(
     # data.run_at is already tz-aware UTC thanks to the validator
     schedule_data["run_at"] = data.run_at
 
+    # Resolve message / media now so the worker needs no product read at run_at
+    schedule_data["payload"] = await resolve_payload(
+        db, schedule_data["product_id"], schedule_data["platforms"]
+    )
+
     doc_id = await db.add("schedules", schedule_data)
     return {**schedule_data, "id": doc_id}
 
@@ -99,10 +196,52 @@ async def update_schedule(
     if "run_at" in update_data:
         # validator already UTC-normalised
         update_data["run_at"] = update_data["run_at"]
+    # Picks up product edits made since the schedule was created
+    update_data["payload"] = await resolve_payload(
+        db, schedule.get("product_id"), update_data.get("platforms") or schedule.get("platforms") or []
+    )
     await db.update("schedules", schedule_id, update_data)
     return await db.get("schedules", schedule_id)
 
 
+@router.post("/refresh-payload", response_model=List[Schedule])
+async def refresh_product_payloads(
+    user_id: str,
+    product_id: str,
+    db: FirestoreSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Hook for product edits: re-resolve the payload of every upcoming schedule of the product."""
+    _assert_owner(user_id, current_user)
+
+    schedules = await db.query(
+        "schedules",
+        filters=[
+            ("user_id", "==", user_id),
+            ("product_id", "==", product_id),
+            ("status", "==", ScheduleState.upcoming),
+        ],
+    )
+    return [await _refresh_payload(db, schedule) for schedule in schedules]
+
+
+@router.post("/{schedule_id}/refresh-payload", response_model=Schedule)
+async def refresh_schedule_payload(
+    user_id: str,
+    schedule_id: str,
+    db: FirestoreSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    _assert_owner(user_id, current_user)
+
+    schedule = await db.get("schedules", schedule_id)
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    if schedule["user_id"] != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return await _refresh_payload(db, schedule)
+
+
 @router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_schedule(
     user_id: str,
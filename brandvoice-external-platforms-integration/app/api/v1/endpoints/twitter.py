@@ -6,6 +6,8 @@ from app.core.db_dependencies import db_session
 from app.api.v1.dependencies import get_firebase_user
 from app.models.firestore_db import FirestoreSession
 from app.core.config import get_settings
+from app.services.credential_resolver import credential_resolver
+from app.services.twitter_service import post_tweet_for_user
 import tweepy, secrets
 from datetime import datetime, timedelta
 from typing import List, Optional
@@ -105,6 +107,7 @@ async def twitter_callback(
             credentail_id = await db.update("twitter_credentials", existing[0]["id"], cred)
         else:
             credentail_id = await db.add("twitter_credentials", cred)
+        credential_resolver.invalidate(user_id, "twitter")
         return {"message": "Twitter credentials created successfully", "credential_id": credentail_id}
     
     except Exception as e:
@@ -149,6 +152,7 @@ async def update_twitter_credential(
     update_data = credential.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
     await db.update("twitter_credentials", credential_id, update_data)
+    credential_resolver.invalidate(existing_credential["user_id"], "twitter")
     updated_credential = await db.get("twitter_credentials", credential_id)
     return updated_credential
 
@@ -162,6 +166,7 @@ async def delete_twitter_credential(
     if not credential or credential["user_id"] != str(user.id):
         raise HTTPException(status_code=404, detail="Credential not found")
     await db.update("twitter_credentials", credential_id, {"is_active": False})
+    credential_resolver.invalidate(credential["user_id"], "twitter")
     return {"message": "Credential deleted successfully"}
 
 @router.post("/post", status_code=status.HTTP_201_CREATED)
@@ -179,36 +184,21 @@ async def post_to_twitter(
             raise HTTPException(status_code=404, detail="Credential not found")
     else:
         # Get the default (first active) credential
-        credentials = await db.query(
-            "twitter_credentials",
-            filters=[("user_id", "==", str(user.id)), ("is_active", "==", True)]
-        )
-        if not credentials:
+        credential = await credential_resolver.get(db, "twitter", str(user.id))
+        if not credential:
             raise HTTPException(status_code=400, detail="No Twitter account connected")
-        credential = credentials[0]
         credential_id = credential["id"]  # Store the credential ID for later use
 
-    media_paths = []
-    if media:
-        for file in media:
-            path = f"/tmp/{file.filename}"
-            with open(path, "wb") as out:
-                out.write(file.file.read())
-            media_paths.append(path)
+    # Uploaded files are handed to Twitter from memory; nothing is written to /tmp
+    media_items = [(file.filename, await file.read()) for file in media or []]
 
     try:
         tweet_id = await post_tweet_for_user(
             credential["access_token"],
             credential["access_token_secret"],
             text,
-            media_paths
+            media=media_items or None,
         )
         return {"status": "success", "tweet_id": tweet_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to post tweet: {e}")
-    finally:
-        for path in media_paths:
-            try:
-                os.remove(path)
-            except Exception:
-                pass
@@ -7,6 +7,8 @@ from app.api.v1.dependencies import get_firebase_user
 from app.models.firestore_db import FirestoreSession
 from app.models.youtube import YouTubeCredential, YouTubeCredentialCreate, YouTubeCredentialUpdate
 import httpx
+from app.core.http import get_http_client
+from app.services.credential_resolver import credential_resolver
 from starlette.responses import RedirectResponse
 import os
 from datetime import datetime, timedelta
@@ -50,53 +52,55 @@ async def youtube_callback(
 
     try:
         # Exchange code for tokens
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "client_id": settings.youtube_client_id,
-                    "client_secret": settings.youtube_client_secret,
-                    "code": code,
-                    "grant_type": "authorization_code",
-                    "redirect_uri": "https://brandvoice-api-995012456302.us-central1.run.app/api/v1/youtube/callback"
-                }
-            )
+        client = get_http_client("google")
+        response = await client.post(
+            "https://oauth2.googleapis.com/token",
+            data={
+                "client_id": settings.youtube_client_id,
+                "client_secret": settings.youtube_client_secret,
+                "code": code,
+                "grant_type": "authorization_code",
+                "redirect_uri": "https://brandvoice-api-995012456302.us-central1.run.app/api/v1/youtube/callback"
+            }
+        )
             
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get access token"
-                )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to get access token"
+            )
             
-            token_data = response.json()
+        token_data = response.json()
             
-            # Create credential in database
-            credential_data = {
-                "user_id": user.id,  # state parameter contains user ID
-                "access_token": token_data["access_token"],
-                "refresh_token": token_data["refresh_token"],
-                "token_type": token_data["token_type"],
-                "expires_at": (datetime.utcnow() + timedelta(seconds=token_data["expires_in"])).isoformat(),
-                "scope": token_data["scope"],
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            }
+        # Create credential in database
+        credential_data = {
+            "user_id": user.id,  # state parameter contains user ID
+            "access_token": token_data["access_token"],
+            "refresh_token": token_data["refresh_token"],
+            "token_type": token_data["token_type"],
+            "expires_at": (datetime.utcnow() + timedelta(seconds=token_data["expires_in"])).isoformat(),
+            "scope": token_data["scope"],
+            "created_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat()
+        }
             
-            # Check if user already has credentials
-            existing_credentials = await db.query(
-                "youtube_credentials",
-                filters=[("user_id", "==", user.id)]
-            )
+        # Check if user already has credentials
+        existing_credentials = await db.query(
+            "youtube_credentials",
+            filters=[("user_id", "==", user.id)]
+        )
             
-            if existing_credentials:
-                # Update existing credential
-                credential_id = existing_credentials[0]["id"]
-                await db.update("youtube_credentials", credential_id, credential_data)
-                return {"message": "YouTube credentials updated successfully", "credential_id": credential_id}
-            else:
-                # Create new credential
-                credential_id = await db.add("youtube_credentials", credential_data)
-                return {"message": "YouTube credentials created successfully", "credential_id": credential_id}
+        if existing_credentials:
+            # Update existing credential
+            credential_id = existing_credentials[0]["id"]
+            await db.update("youtube_credentials", credential_id, credential_data)
+            credential_resolver.invalidate(str(user.id), "youtube")
+            return {"message": "YouTube credentials updated successfully", "credential_id": credential_id}
+        else:
+            # Create new credential
+            credential_id = await db.add("youtube_credentials", credential_data)
+            credential_resolver.invalidate(str(user.id), "youtube")
+            return {"message": "YouTube credentials created successfully", "credential_id": credential_id}
             
     except Exception as e:
         raise HTTPException(
@@ -117,79 +121,74 @@ async def youtube_upload(
         f.write(await file.read())
     
     # Get user's YouTube credentials
-    credentials = await db.query(
-        "youtube_credentials",
-        filters=[("user_id", "==", str(user.id))]
-    )
-    if not credentials:
+    credential = await credential_resolver.get(db, "youtube", str(user.id))
+    if not credential:
         raise HTTPException(status_code=401, detail="YouTube credentials not found")
     
-    credential = credentials[0]
-    
     # Upload to YouTube
-    async with httpx.AsyncClient() as client:
-        # Prepare the metadata part
-        metadata = {
-            "snippet": {
-                "title": title,
-                "description": description,
-                "categoryId": "22"  # People & Blogs category
-            },
-            "status": {
-                "privacyStatus": "private"
-            }
+    client = get_http_client("google")
+    # Prepare the metadata part
+    metadata = {
+        "snippet": {
+            "title": title,
+            "description": description,
+            "categoryId": "22"  # People & Blogs category
+        },
+        "status": {
+            "privacyStatus": "private"
         }
+    }
         
-        # Prepare the multipart request
-        files = {
-            "file": ("video.mp4", open(path, "rb"), "video/mp4")
-        }
+    # Prepare the multipart request
+    files = {
+        "file": ("video.mp4", open(path, "rb"), "video/mp4")
+    }
         
-        data = {
-            "part": "snippet,status",
-            "uploadType": "multipart"
-        }
+    data = {
+        "part": "snippet,status",
+        "uploadType": "multipart"
+    }
         
-        headers = {
-            "Authorization": f"Bearer {credential['access_token']}"
-        }
+    headers = {
+        "Authorization": f"Bearer {credential['access_token']}"
+    }
         
-        # First, create the video with metadata
-        response = await client.post(
-            "https://www.googleapis.com/upload/youtube/v3/videos",
-            params=data,
-            headers=headers,
-            files=files,
-            data={"metadata": json.dumps(metadata)}
-        )
+    # First, create the video with metadata
+    response = await client.post(
+        "https://www.googleapis.com/upload/youtube/v3/videos",
+        params=data,
+        headers=headers,
+        files=files,
+        data={"metadata": json.dumps(metadata)}
+    )
         
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to upload to YouTube: {response.text}"
-            )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to upload to YouTube: {response.text}"
+        )
         
-        video_id = response.json()["id"]
+    video_id = response.json()["id"]
         
-        # Update the video with metadata to ensure it's set
-        update_response = await client.put(
-            f"https://www.googleapis.com/youtube/v3/videos?part=snippet,status",
-            headers=headers,
-            json={
-                "id": video_id,
-                "snippet": {
-                    "title": title,
-                    "description": description,
-                    "categoryId": "22"  # People & Blogs category
-                },
-                "status": {
-                    "privacyStatus": "public"
-                }
+    # Update the video with metadata to ensure it's set
+    update_response = await client.put(
+        f"https://www.googleapis.com/youtube/v3/videos?part=snippet,status",
+        headers=headers,
+        json={
+            "id": video_id,
+            "snippet": {
+                "title": title,
+                "description": description,
+                "categoryId": "22"  # People & Blogs category
+            },
+            "status": {
+                "privacyStatus": "public"
             }
-        )
+        }
+    )
         
-        if update_response.status_code != 200:
-            print(f"Warning: Failed to update video metadata: {update_response.text}")
+    if update_response.status_code != 200:
+        print(f"Warning: Failed to update video metadata: {update_response.text}")
     
     os.remove(path)
     return {"video_id": video_id}
@@ -254,6 +253,7 @@ async def update_youtube_credential(
     update_data = credential.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
     await db.update("youtube_credentials", user_id, update_data)
+    credential_resolver.invalidate(existing_credential["user_id"], "youtube")
     
     updated_credential = await db.get("youtube_credentials", user_id)
     return updated_credential
@@ -273,3 +273,4 @@ async def delete_youtube_credential(
         raise HTTPException(status_code=403, detail="Not authorized to delete this credential")
     
     await db.delete("youtube_credentials", user_id)
+    credential_resolver.invalidate(existing_credential["user_id"], "youtube")
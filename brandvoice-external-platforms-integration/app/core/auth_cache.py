@@ -0,0 +1,220 @@
+"""
+app/core/auth_cache.py
+----------------------
+
+Takes the fixed cost out of `get_current_user`.
+
+• Firebase ID tokens are verified locally against Google's signing certs,
+  which are held in memory and refreshed in the background before their
+  Cache-Control max-age runs out — a request never waits on a cert fetch
+  (or on the synchronous firebase_admin verifier). A token signed with an
+  unknown key forces a re-fetch at most once a minute and is rejected in
+  between.
+• A verified token is remembered until its `exp`, so repeat requests with
+  the same token skip signature checks altogether.
+• `users` documents are kept in a bounded LRU keyed on firebase uid; the
+  /auth/me update and delete endpoints invalidate their entry, and a TTL
+  bounds staleness across replicas.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from firebase_admin import auth
+from google.auth import jwt
+
+from app.core.config import get_settings
+from app.core.firebase import get_firebase_app
+from app.core.http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+# Refresh certs this long before Google says they expire
+CERT_REFRESH_MARGIN_SECONDS = 300.0
+# A token with an unknown `kid` forces a fetch at most this often; in between it is rejected
+FORCED_REFRESH_MIN_INTERVAL_SECONDS = 60.0
+CLOCK_SKEW_SECONDS = 10
+
+
+def _max_age(cache_control: str) -> float:
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return float(match.group(1)) if match else 3600.0
+
+
+class FirebaseCertCache:
+    """Google's securetoken signing certs, fetched once and refreshed ahead of expiry."""
+
+    def __init__(self):
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        # Last fetch attempt, successful or not
+        self._attempted_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._refresher: asyncio.Task | None = None
+
+    def _fresh(self) -> bool:
+        return bool(self._certs) and time.monotonic() < self._expires_at
+
+    async def _fetch(self) -> None:
+        self._attempted_at = time.monotonic()
+        resp = await get_http_client("google").get(FIREBASE_CERTS_URL)
+        resp.raise_for_status()
+        self._certs = resp.json()
+        self._expires_at = time.monotonic() + _max_age(resp.headers.get("cache-control", ""))
+
+    async def refresh(self) -> Dict[str, str]:
+        async with self._lock:
+            await self._fetch()
+            return self._certs
+
+    async def get(self) -> Dict[str, str]:
+        if not self._fresh():
+            async with self._lock:
+                # Concurrent misses share the fetch of whoever got the lock first
+                if not self._fresh():
+                    await self._fetch()
+        return self._certs
+
+    async def get_for_kid(self, kid: Any) -> Dict[str, str]:
+        """
+        Certs including `kid` if Google has it. An unknown kid (keys rotated
+        since the last fetch, or a forged token) triggers at most one fetch
+        per FORCED_REFRESH_MIN_INTERVAL_SECONDS.
+        """
+        certs = await self.get()
+        if kid in certs:
+            return certs
+        async with self._lock:
+            since_attempt = time.monotonic() - self._attempted_at
+            if kid not in self._certs and since_attempt >= FORCED_REFRESH_MIN_INTERVAL_SECONDS:
+                await self._fetch()
+            return self._certs
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            delay = max(0.0, self._expires_at - time.monotonic() - CERT_REFRESH_MARGIN_SECONDS)
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except Exception as exc:
+                logger.warning("Refreshing Firebase signing certs failed: %s", exc)
+                await asyncio.sleep(60)
+
+    def start(self) -> None:
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop(), name="firebase-cert-refresh")
+
+    async def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+
+
+class AuthCache:
+    """Verified Firebase tokens (until exp) and uid → User (bounded LRU with TTL)."""
+
+    def __init__(self, token_cache_size: int, user_cache_size: int, user_ttl_seconds: float):
+        self.certs = FirebaseCertCache()
+        # sha256(token) → decoded claims
+        self._tokens: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # firebase uid → (expires_at, User)
+        self._users: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._token_cache_size = token_cache_size
+        self._user_cache_size = user_cache_size
+        self._user_ttl = user_ttl_seconds
+        self.stats_counters = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0}
+
+    # ── tokens ──────────────────────────────────────────────────────────
+    async def _decode(self, token: str) -> Dict[str, Any]:
+        app = get_firebase_app()
+        project_id = getattr(app, "project_id", None)
+        if not project_id:
+            # Without a known project the audience cannot be checked locally
+            return await asyncio.to_thread(auth.verify_id_token, token)
+
+        header = jwt.decode_header(token)
+        certs = await self.certs.get_for_kid(header.get("kid"))
+        if header.get("kid") not in certs:
+            raise ValueError("Firebase ID token has an unknown key id")
+        claims = jwt.decode(
+            token,
+            certs=certs,
+            audience=project_id,
+            clock_skew_in_seconds=CLOCK_SKEW_SECONDS,
+        )
+        if claims.get("iss") != f"https://securetoken.google.com/{project_id}":
+            raise ValueError("Firebase ID token has an incorrect issuer")
+        sub = claims.get("sub")
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise ValueError("Firebase ID token has an invalid subject")
+        claims["uid"] = sub
+        return claims
+
+    async def verify_token(self, token: str) -> Dict[str, Any]:
+        """Decoded claims of a valid Firebase ID token; raises ValueError otherwise."""
+        key = hashlib.sha256(token.encode()).hexdigest()
+        claims = self._tokens.get(key)
+        if claims is not None and claims.get("exp", 0) > time.time():
+            self._tokens.move_to_end(key)
+            self.stats_counters["token_hits"] += 1
+            return claims
+
+        self.stats_counters["token_misses"] += 1
+        self._tokens.pop(key, None)
+        try:
+            claims = await self._decode(token)
+        except Exception as e:
+            raise ValueError(f"Invalid token: {str(e)}")
+        self._tokens[key] = claims
+        while len(self._tokens) > self._token_cache_size:
+            self._tokens.popitem(last=False)
+        return claims
+
+    # ── users ───────────────────────────────────────────────────────────
+    def get_user(self, uid: str):
+        entry = self._users.get(uid)
+        if entry is None or entry[0] <= time.monotonic():
+            self.stats_counters["user_misses"] += 1
+            return None
+        self._users.move_to_end(uid)
+        self.stats_counters["user_hits"] += 1
+        # Callers get their own copy; the cached one stays as loaded
+        return entry[1].model_copy()
+
+    def put_user(self, uid: str, user) -> None:
+        self._users[uid] = (time.monotonic() + self._user_ttl, user.model_copy())
+        self._users.move_to_end(uid)
+        while len(self._users) > self._user_cache_size:
+            self._users.popitem(last=False)
+
+    def invalidate_user(self, uid: Optional[str]) -> None:
+        if uid:
+            self._users.pop(uid, None)
+
+    # ── lifecycle / introspection ───────────────────────────────────────
+    def start(self) -> None:
+        self.certs.start()
+
+    async def stop(self) -> None:
+        await self.certs.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tokens": len(self._tokens), "users": len(self._users), **self.stats_counters}
+
+
+_settings = get_settings()
+auth_cache = AuthCache(
+    token_cache_size=_settings.auth_token_cache_size,
+    user_cache_size=_settings.auth_user_cache_size,
+    user_ttl_seconds=_settings.auth_user_cache_ttl_seconds,
+)
@@ -1,7 +1,7 @@
 from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 import os
 from pathlib import Path
@@ -57,6 +57,72 @@ class Settings(BaseSettings):
     youtube_client_secret: str = os.getenv("YOUTUBE_CLIENT_SECRET", "")
     youtube_callback_url: str = os.getenv("YOUTUBE_CALLBACK_URL", "")
 
+    # ----- Scheduler -----
+    scheduler_max_sleep_seconds: float = Field(default=60.0, description="Longest the dispatcher sleeps without re-checking the heap")
+    scheduler_max_concurrent_schedules: int = Field(default=10, description="Schedules published at the same time")
+    scheduler_platform_concurrency: Dict[str, int] = Field(
+        default={"facebook": 5, "instagram": 5, "twitter": 5, "youtube": 2},
+        description="Concurrent publishes per platform across all schedules",
+    )
+    scheduler_default_platform_concurrency: int = 3
+    scheduler_lease_seconds: float = Field(default=300.0, description="How long a claimed schedule stays leased without a heartbeat")
+    scheduler_claim_batch_size: int = Field(default=20, description="Schedules one replica holds claims on at a time")
+    scheduler_reclaim_interval_seconds: float = Field(default=60.0, description="How often expired leases are looked for")
+    scheduler_retry_max_attempts: int = Field(default=5, description="Publish attempts per schedule before transient failures are final")
+    scheduler_retry_base_seconds: float = Field(default=60.0, description="Backoff before the first retry; doubles on each attempt")
+    scheduler_retry_max_seconds: float = Field(default=3600.0, description="Upper bound on the retry backoff")
+    scheduler_prestage_lookahead_seconds: float = Field(default=600.0, description="Schedules due within this window get their media staged ahead of run_at")
+    scheduler_prestage_interval_seconds: float = Field(default=30.0, description="How often the pre-stager looks for schedules to stage")
+    scheduler_prestage_concurrency: int = Field(default=5, description="Schedules staged at the same time")
+
+    # ----- Outbound rate limits (token bucket per platform + account) -----
+    rate_limits: Dict[str, Dict[str, float]] = Field(
+        default={
+            "facebook": {"per_minute": 30, "burst": 10},
+            "instagram": {"per_minute": 20, "burst": 5},
+            "twitter": {"per_minute": 10, "burst": 5},
+            "youtube": {"per_minute": 2, "burst": 2},
+        },
+        description="Publishing API calls allowed per account: refill rate per minute and burst size",
+    )
+    default_rate_limit: Dict[str, float] = {"per_minute": 10, "burst": 5}
+
+    # ----- Pooled HTTP clients (app/core/http.py) -----
+    http_pools: Dict[str, Dict[str, float]] = Field(
+        default={
+            "graph": {"max_connections": 50, "max_keepalive_connections": 20, "timeout": 30.0},
+            "google": {"max_connections": 20, "max_keepalive_connections": 10, "timeout": 30.0},
+            "media": {"max_connections": 20, "max_keepalive_connections": 10, "timeout": 120.0},
+            "default": {"max_connections": 20, "max_keepalive_connections": 10, "timeout": 30.0},
+        },
+        description="Connection pool size and default timeout per upstream client",
+    )
+    http_keepalive_expiry_seconds: float = 60.0
+    http_connect_timeout_seconds: float = 10.0
+
+    # ----- Media transfer -----
+    media_download_chunk_size: int = Field(default=1024 * 1024, description="Bytes read per chunk when streaming media to disk")
+    twitter_media_max_bytes: int = Field(default=64 * 1024 * 1024, description="Largest media file fetched into memory for a tweet")
+    youtube_upload_chunk_size: int = Field(default=8 * 1024 * 1024, description="Resumable upload chunk size (multiple of 256 KiB)")
+    youtube_client_cache_size: int = Field(default=128, description="YouTube credentials kept with a built API client")
+
+    # ----- Instagram container status polling -----
+    instagram_status_min_interval_seconds: float = Field(default=2.0, description="Earliest first status check of a new container")
+    instagram_status_seconds_per_mb: float = Field(default=0.5, description="Extra initial delay per MB of video")
+    instagram_status_max_interval_seconds: float = Field(default=30.0, description="Longest gap between status checks")
+    instagram_status_backoff_factor: float = Field(default=1.5, description="Growth of the poll interval while IN_PROGRESS")
+    instagram_status_max_wait_seconds: float = Field(default=600.0, description="Give up on a container after this long")
+    instagram_carousel_parallelism: int = Field(default=10, description="Carousel child containers created at once")
+
+    # ----- Credential cache (app/services/credential_resolver.py) -----
+    credential_cache_ttl_seconds: float = Field(default=300.0, description="How long a resolved platform credential is reused")
+    credential_cache_max_entries: int = Field(default=10000, description="(user, platform) credentials kept in memory")
+
+    # ----- Auth cache (app/core/auth_cache.py) -----
+    auth_token_cache_size: int = Field(default=10000, description="Verified ID tokens remembered until they expire")
+    auth_user_cache_size: int = Field(default=5000, description="Users kept per firebase uid")
+    auth_user_cache_ttl_seconds: float = Field(default=300.0, description="How long a cached user is trusted without a re-read")
+
     # ----- Google Cloud -----
     google_application_credentials: str = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'service_account.json'))
 
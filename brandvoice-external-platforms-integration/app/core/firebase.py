@@ -3,7 +3,7 @@ import os
 from pathlib import Path
 
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 from google.auth import default as google_auth_default
 from google.auth.exceptions import DefaultCredentialsError
 
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 
 _firebase_app: firebase_admin.App | None = None
 _firestore_client: firestore.Client | None = None
+_firestore_async_client = None
 
 
 def _load_credentials():
@@ -73,6 +74,15 @@ def get_firestore_client():
     return initialize_firebase()
 
 
+def get_firestore_async_client():
+    """Shared AsyncClient (gRPC aio) for code running on the event loop."""
+    global _firestore_async_client
+    if _firestore_async_client is None:
+        initialize_firebase()
+        _firestore_async_client = firestore_async.client()
+    return _firestore_async_client
+
+
 def get_firebase_app():
     initialize_firebase()
     return _firebase_app
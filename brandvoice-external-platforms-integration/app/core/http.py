@@ -0,0 +1,61 @@
+"""
+app/core/http.py
+----------------
+
+Process-wide pooled HTTP clients.
+
+One `httpx.AsyncClient` per upstream family, shared by every request and
+publish, so calls reuse keep-alive connections (and HTTP/2 streams where the
+host negotiates it) instead of paying a TCP + TLS handshake each time:
+
+• graph  – graph.facebook.com (Facebook pages, Instagram)
+• google – Google OAuth / YouTube / Identity Toolkit
+• media  – media downloads (Cloud Storage, CDNs), long read timeout
+
+Clients are created lazily on first use and closed by `close_http_clients()`
+from the app lifespan. Per-call timeouts can still be passed to the request
+methods (`client.post(..., timeout=120)`).
+"""
+from __future__ import annotations
+
+from typing import Dict
+
+import httpx
+
+from app.core.config import get_settings
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _client_options(name: str) -> dict:
+    settings = get_settings()
+    pool = settings.http_pools.get(name, settings.http_pools["default"])
+    return {
+        "http2": True,
+        "limits": httpx.Limits(
+            max_connections=int(pool["max_connections"]),
+            max_keepalive_connections=int(pool["max_keepalive_connections"]),
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        "timeout": httpx.Timeout(
+            pool["timeout"],
+            connect=settings.http_connect_timeout_seconds,
+        ),
+    }
+
+
+def get_http_client(name: str = "default") -> httpx.AsyncClient:
+    """Shared client for an upstream family; created on first use."""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_options(name))
+        _clients[name] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client (app shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -1,20 +1,47 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from app.scheduler_worker import process_due_schedules  # ← your loop
+from app.core.http import close_http_clients
+from app.scheduler_worker import create_dispatcher, create_prestager  # ← your loop
+from app.services.credential_resolver import credential_resolver
+from app.services.instagram_service import container_tracker
+from app.services.rate_limiter import rate_limiter
+from app.services.schedule_prestager import publish_metrics
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    sched = AsyncIOScheduler()
-    sched.add_job(process_due_schedules, "interval", seconds=10)
-    sched.start()                                  # starts in same event-loop :contentReference[oaicite:0]{index=0}
-    print("✅ APScheduler started")
+    dispatcher = create_dispatcher()
+    await dispatcher.start()                       # listener + heap, runs in the same event-loop
+    app.state.dispatcher = dispatcher
+    prestager = create_prestager(dispatcher)
+    await prestager.start()
+    app.state.prestager = prestager
+    print("✅ Schedule dispatcher started")
     yield
-    sched.shutdown(wait=False)
+    await prestager.stop()
+    await dispatcher.stop()
+    await close_http_clients()
 
 app = FastAPI(lifespan=lifespan)                   # modern FastAPI lifespan API :contentReference[oaicite:1]{index=1}
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "dispatcher": app.state.dispatcher.stats(),
+        "instagram_containers": container_tracker.stats(),
+        "prestager": app.state.prestager.stats(),
+        "credentials": credential_resolver.stats(),
+    }
+
+
+@app.get("/metrics/publish")
+async def publish_lag_metrics():
+    """Per-platform staging hit rate and lag between run_at and the publish call."""
+    return publish_metrics.snapshot()
+
+
+@app.get("/metrics/rate-limits")
+async def rate_limit_metrics():
+    """Token-bucket state and last platform-reported quota per publishing account."""
+    return rate_limiter.metrics()
@@ -9,6 +9,7 @@ import os
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path=dotenv_path)
 import json
+from contextlib import asynccontextmanager
 from sqlalchemy.future import select
 from fastapi import Request, Form, UploadFile, File, Depends, HTTPException, status
 from fastapi.responses import RedirectResponse
@@ -18,6 +19,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from app.api.v1 import router as api_v1_router
 from app.core.config import get_settings
+from app.core.auth_cache import auth_cache
+from app.core.http import close_http_clients
 from sqlalchemy import create_engine  # <-- sync engine
 from sqlmodel import SQLModel
 import logging
@@ -55,9 +58,19 @@ async def dispatch_scheduled_tweet(post_id: int):
     except Exception as e:
         logger.error(f"Error in dispatch_scheduled_tweet: {str(e)}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Firebase signing certs are fetched up front and kept fresh in the background
+    auth_cache.start()
+    # Pooled HTTP clients are created on first use; close their connections on shutdown
+    yield
+    await auth_cache.stop()
+    await close_http_clients()
+
 def create_app() -> FastAPI:
     s = get_settings()
     app = FastAPI(
+        lifespan=lifespan,
         title=s.app_name,
         version="1.0.0",
         description="Multi-agent content automation backend, these are the external APIs for BrandVoice.",
@@ -72,6 +85,7 @@ def create_app() -> FastAPI:
         CORSMiddleware,
         allow_origins=s.allow_origins, allow_credentials=True,
         allow_methods=["*"], allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     app.add_middleware(
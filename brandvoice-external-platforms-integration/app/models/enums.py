@@ -9,5 +9,11 @@ class Platform(str, Enum):
 
 class ScheduleState(str, Enum):
     upcoming = "upcoming"
+    publishing = "publishing"
     published = "published"
     failed = "failed"
+
+class PublishErrorKind(str, Enum):
+    transient = "transient"     # timeouts, 5xx, rate limits: retried with backoff
+    auth = "auth"               # missing / revoked credentials: needs the user to reconnect
+    permanent = "permanent"     # rejected content, unsupported platform: not retried
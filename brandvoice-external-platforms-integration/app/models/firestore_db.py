@@ -1,16 +1,16 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, auth, initialize_app
 from pathlib import Path
-from typing import AsyncGenerator, Any, Dict, Optional, Type, List, Tuple
+from typing import AsyncGenerator, AsyncIterator, Any, Dict, Optional, Type, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from fastapi import HTTPException, status
-import requests
 import json
 import os
 from datetime import datetime
 from app.core.config import get_settings
-from app.core.firebase import get_firestore_client
+from app.core.firebase import get_firestore_async_client
+from app.core.http import get_http_client
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,8 +50,14 @@ def get_collection(collection_name: str):
     return db.collection(collection_name)
 
 class FirestoreSession:
+    """
+    Firestore access for async code, on the firebase-admin AsyncClient: no
+    call blocks the event loop. `query` returns a list; `query_stream` /
+    `query_page` read large result sets a page at a time.
+    """
+
     def __init__(self):
-        self.db = get_firestore_client()
+        self.db = get_firestore_async_client()
         if self.db is None:
             raise RuntimeError("Firebase is not initialized. Check service account configuration.")
 
@@ -64,12 +70,12 @@ class FirestoreSession:
         data["modified_at"] = datetime.utcnow()
         
         doc_ref = self.db.collection(collection).document()
-        doc_ref.set(data)
+        await doc_ref.set(data)
         return doc_ref.id
 
     async def get(self, collection: str, doc_id: str) -> dict:
         doc_ref = self.db.collection(collection).document(doc_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
         doc_dict = doc.to_dict()
@@ -77,14 +83,13 @@ class FirestoreSession:
             return None
         return {"id": doc.id, **doc_dict}
 
-    async def query(
+    def _build_query(
         self,
         collection: str,
-        filters: List[Tuple[str, str, Any]] = [],
-        order_by: Optional[str] = None,
-        limit: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
-        """Query documents in a collection."""
+        filters: List[Tuple[str, str, Any]],
+        order_by: Optional[str],
+        descending: bool = False,
+    ):
         query = self.db.collection(collection)
         
         # Apply filters
@@ -93,15 +98,88 @@ class FirestoreSession:
         
         # Apply ordering
         if order_by:
-            query = query.order_by(order_by)
+            query = query.order_by(
+                order_by, direction=firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+            )
+        return query
+
+    async def query(
+        self,
+        collection: str,
+        filters: List[Tuple[str, str, Any]] = [],
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Query documents in a collection."""
+        query = self._build_query(collection, filters, order_by)
         
         # Apply limit
         if limit:
             query = query.limit(limit)
         
         # Execute query
-        docs = query.stream()
-        return [{"id": doc.id, **doc.to_dict()} for doc in docs]
+        return [{"id": doc.id, **doc.to_dict()} async for doc in query.stream()]
+
+    async def query_page(
+        self,
+        collection: str,
+        filters: List[Tuple[str, str, Any]] = [],
+        order_by: Optional[str] = None,
+        page_size: int = 100,
+        start_after: Optional[str] = None,
+        descending: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of results and the cursor for the next one (the id of the
+        last document, None when there are no more pages). Pass that cursor
+        back as `start_after`.
+        """
+        query = self._build_query(collection, filters, order_by, descending)
+        if not order_by:
+            # Cursors need a total order: fall back to document id
+            query = query.order_by("__name__")
+        if start_after:
+            cursor = await self.db.collection(collection).document(start_after).get()
+            if not cursor.exists:
+                raise ValueError(f"Unknown cursor {start_after!r}")
+            query = query.start_after(cursor)
+
+        docs = [doc async for doc in query.limit(page_size + 1).stream()]
+        has_more = len(docs) > page_size
+        docs = docs[:page_size]
+        next_cursor = docs[-1].id if has_more and docs else None
+        return [{"id": doc.id, **doc.to_dict()} for doc in docs], next_cursor
+
+    async def query_stream(
+        self,
+        collection: str,
+        filters: List[Tuple[str, str, Any]] = [],
+        order_by: Optional[str] = None,
+        page_size: int = 500,
+        start_after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield matching documents page by page; at most one page is held in memory."""
+        yielded = 0
+        cursor = start_after
+        while True:
+            size = page_size if limit is None else min(page_size, limit - yielded)
+            if size <= 0:
+                return
+            page, cursor = await self.query_page(
+                collection, filters, order_by, page_size=size, start_after=cursor
+            )
+            for doc in page:
+                yield doc
+            yielded += len(page)
+            if cursor is None:
+                return
+
+    async def count(self, collection: str, filters: List[Tuple[str, str, Any]] = []) -> int:
+        """Number of matching documents via a count() aggregation (billed per 1000 index entries)."""
+        query = self._build_query(collection, filters, None)
+        results = await query.count(alias="count").get()
+        return int(results[0][0].value) if results and results[0] else 0
 
     async def update(self, collection: str, doc_id: str, data: dict) -> None:
         """Update a document in a collection."""
@@ -112,12 +190,12 @@ class FirestoreSession:
         data["modified_at"] = datetime.utcnow()
         
         doc_ref = self.db.collection(collection).document(doc_id)
-        doc_ref.update(data)
+        await doc_ref.update(data)
 
     async def delete(self, collection: str, doc_id: str) -> None:
         """Delete a document from a collection."""
         doc_ref = self.db.collection(collection).document(doc_id)
-        doc_ref.delete()
+        await doc_ref.delete()
 
     def _serialize_datetime(self, data: dict) -> dict:
         """Pass through datetime objects for Firestore Timestamp conversion."""
@@ -198,8 +276,9 @@ async def sign_in_with_email_password(email: str, password: str) -> Dict[str, st
     """
     try:
         # Sign in with email and password using Firebase Web API
-        response = requests.post(
-            f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_WEB_API_KEY}",
+        response = await get_http_client("google").post(
+            "https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword",
+            params={"key": FIREBASE_WEB_API_KEY},
             json={
                 "email": email,
                 "password": password,
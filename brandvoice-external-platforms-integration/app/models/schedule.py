@@ -26,6 +26,16 @@ class Schedule(SQLModel, table=True):
 
     status: ScheduleState = ScheduleState.upcoming
 
+    # per-platform message / media resolved from the product at schedule time
+    payload: dict | None = Field(default=None, sa_column=Column(JSON))
+
+    # publish outcome and retry history (written by the scheduler worker)
+    results: dict | None = Field(default=None, sa_column=Column(JSON))
+    attempts: List[dict] | None = Field(default=None, sa_column=Column(JSON))
+    attempt_count: int = 0
+    retry_platforms: List[str] | None = Field(default=None, sa_column=Column(JSON))
+    original_run_at: datetime | None = Field(default=None, nullable=True)
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
     modified_at: datetime = Field(default_factory=datetime.utcnow, nullable=True)
 
@@ -2,11 +2,13 @@
 app/services/scheduler.py
 ------------------------
 
-• Runs every 10 s (APS-scheduler) and publishes any schedule whose
-  `run_at` ≤ now  AND  `status == "upcoming"`.
+• Publishes every schedule whose `run_at` ≤ now  AND  `status == "upcoming"`.
+  Due schedules are found by the event-driven ScheduleDispatcher
+  (app/services/schedule_dispatcher.py) rather than by polling.
 
-• Extracts caption, call-to-action, hashtags, image / video URLs from the
-  nested structure:
+• Publishes from the payload stored on the schedule when it was created
+  (app/services/publish_payload.py). That payload (caption, call-to-action,
+  hashtags, image / video URLs) is resolved from the nested structure:
 
     marketing_content[platform] = {
         "content": {
@@ -15,26 +17,70 @@ app/services/scheduler.py
             "hashtags": [...]
         },
         "image_url": "...",   # optional
-        "video_url": "..."    # optional
+        "video_url": "...",   # optional
+        "carousel_urls": [...]  # optional, published as a carousel / multi-image tweet
     }
 
 • Supports Facebook, Instagram, Twitter/X, YouTube out-of-the-box.
+
+• Schedules due soon are pre-staged (app/services/schedule_prestager.py):
+  media is uploaded / containers are created before run_at, so at run_at
+  only the final publish call is left.
 """
 from __future__ import annotations
 
 import asyncio
 import os
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
-
-import aiohttp
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.models.enums import ScheduleState
+from app.core.config import get_settings
+from app.core.http import close_http_clients, get_http_client
+from app.models.enums import PublishErrorKind, ScheduleState
 from app.models.firestore_db import FirestoreSession
-from app.services.facebook_service import post_feed, post_photo, post_video
-from app.services.twitter_service import post_tweet_for_user
+from app.services.credential_resolver import CREDENTIAL_COLLECTIONS, credential_resolver
+from app.services.facebook_service import (
+    post_feed,
+    post_photo,
+    post_video,
+    publish_staged_photo,
+    stage_photo,
+)
+from app.services.instagram_service import (
+    create_carousel_container,
+    create_container,
+    post_carousel_to_instagram,
+    post_to_instagram,
+    publish_container,
+)
+from app.services.publish_payload import (
+    normalize_platform,
+    payload_for_schedule,
+)
+from app.services.publish_retry import (
+    classify_error,
+    classify_result,
+    pending_platforms,
+    plan_outcome,
+)
+from app.services.schedule_dispatcher import ScheduleDispatcher, run_at_timestamp
+from app.services.schedule_lease import (
+    claim_schedule,
+    find_expired_leases,
+    finish_schedule,
+    keep_lease_alive,
+)
+from app.services.schedule_prestager import (
+    SchedulePrestager,
+    StagedSchedule,
+    publish_metrics,
+    schedule_version,
+    shared_staged,
+    staged_schedules,
+)
+from app.services.twitter_service import fetch_media, post_tweet_for_user, upload_media
 from app.services.youtube_service import upload_video_for_user
 
 
@@ -45,89 +91,28 @@ TMP_DIR = Path("/tmp")
 TMP_DIR.mkdir(exist_ok=True)
 
 
-async def download_file(url: str, dest: Path) -> Path:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            if resp.status != 200:
-                raise RuntimeError(f"Failed to download {url}: HTTP {resp.status}")
-            dest.write_bytes(await resp.read())
-            return dest
+def temp_media_path(product_id: str | None, suffix: str) -> Path:
+    """Unique temp file for one publish (several schedules may share a product)."""
+    return TMP_DIR / f"{product_id}_{uuid.uuid4().hex}{suffix}"
 
 
-async def post_to_instagram(
-    cred: Dict[str, Any],
-    image_url: str | None,
-    video_url: str | None,
-    caption: str,
-):
-    """
-    Two-step IG posting flow: 1) create media container → 2) poll for video status if needed → 3) publish.
-    """
-    async with aiohttp.ClientSession() as session:
-        base = f"https://graph.facebook.com/v23.0/{cred['instagram_account_id']}"
-        token = cred["access_token"]
-
-        if video_url:
-            params = {
-                "media_type": "REELS",  # Use REELS for video
-                "video_url": video_url,
-                "caption": caption,
-                "access_token": token,
-            }
-        elif image_url:
-            params = {
-                "image_url": image_url,
-                "caption": caption,
-                "access_token": token,
-            }
-        else:
-            raise ValueError("Instagram post needs either image_url or video_url")
-
-        # Step 1 — container
-        async with session.post(f"{base}/media", data=params) as resp:
-            res = await resp.json()
-            print(f"\n***response from media creation {res}***\n")
-            container_id = int(res.get("id"))
-            print(f"*** Instagram container created: {container_id} type-{type(container_id)}***")
-            if not container_id:
-                print(f"Instagram media upload failed: {res}")
-                return res  # Return error response
-
-        # Step 2 — poll for video status if video_url
-        if video_url:
-            for _ in range(20):  # Try for up to ~1 minute (20 x 3s)
-                status_url = f"https://graph.facebook.com/v23.0/{container_id}?fields=status_code&access_token={token}"
-                async with session.get(status_url) as status_resp:
-                    status_json = await status_resp.json()
-                    status = status_json.get("status_code")
-                    print(f"Instagram container status: {status}")
-                    if status == "FINISHED":
-                        break
-                    elif status == "ERROR":
-                        print(f"Instagram video processing error: {status_json}")
-                        return status_json  # Return error response
-                await asyncio.sleep(3)
-            else:
-                print(f"Instagram video not ready after waiting: {status_json}")
-                return status_json  # Return error response
-
-        # Step 3 — publish
-        async with session.post(
-            f"{base}/media_publish",
-            data={"creation_id": container_id, "access_token": token},
-        ) as resp:
-            return await resp.json()
+async def download_file(url: str, dest: Path) -> Path:
+    """Stream `url` to `dest` in fixed-size chunks; memory use does not grow with the file."""
+    chunk_size = get_settings().media_download_chunk_size
+    async with get_http_client("media").stream("GET", url) as resp:
+        if resp.status_code != 200:
+            raise RuntimeError(f"Failed to download {url}: HTTP {resp.status_code}")
+        with open(dest, "wb") as fh:
+            async for chunk in resp.aiter_bytes(chunk_size):
+                fh.write(chunk)
+    return dest
 
 
 # ────────────────────────────────────────────────────────────────────────
 #  Core scheduler logic
 # ────────────────────────────────────────────────────────────────────────
-PLATFORM_ALIAS = {
-    "x": "twitter",
-}  # extend if you have more aliases: e.g. "fb": "facebook"
-
-
 async def process_due_schedules() -> None:
+    """One-off sweep: publish everything that is already due (catch-up / manual runs)."""
     db = FirestoreSession()
     now = datetime.now(timezone.utc)
     print(f"\n*** Checking due schedules at {now.isoformat()} ***")
@@ -135,194 +120,338 @@ async def process_due_schedules() -> None:
     due: List[Dict[str, Any]] = await db.query(
         "schedules",
         filters=[("run_at", "<=", now), ("status", "==", ScheduleState.upcoming)],
+        limit=get_settings().scheduler_claim_batch_size,
     )
     print(f"*** Found {len(due)} schedule(s) ***")
 
-    for sched in due:
-        user_id: str = sched["user_id"]
-        product_id: str | None = sched.get("product_id")
+    await prefetch_credentials(due)
+    await asyncio.gather(*(publish_schedule(sched, db) for sched in due))
+
 
-        # 1️⃣  Pull the product document
-        product: Dict[str, Any] | None = (
-            await db.get("products", product_id) if product_id else None
+_schedule_slots: asyncio.Semaphore | None = None
+_platform_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def _schedule_semaphore() -> asyncio.Semaphore:
+    """Global cap on schedules being published at once."""
+    global _schedule_slots
+    if _schedule_slots is None:
+        _schedule_slots = asyncio.Semaphore(get_settings().scheduler_max_concurrent_schedules)
+    return _schedule_slots
+
+
+def _platform_semaphore(platform: str) -> asyncio.Semaphore:
+    """Per-platform cap on concurrent publishes, shared by all schedules."""
+    if platform not in _platform_slots:
+        settings = get_settings()
+        limit = settings.scheduler_platform_concurrency.get(
+            platform, settings.scheduler_default_platform_concurrency
         )
-        if product is None:
-            await db.update(
-                "schedules",
-                sched["id"],
-                {
-                    "status": ScheduleState.failed,
-                    "results": {"error": "Product not found"},
-                },
+        _platform_slots[platform] = asyncio.Semaphore(limit)
+    return _platform_slots[platform]
+
+
+async def prefetch_credentials(schedules: List[Dict[str, Any]]) -> None:
+    """Warm the credential cache for a batch of schedules with one `in` query per platform."""
+    await credential_resolver.prefetch(
+        FirestoreSession(),
+        (sched.get("user_id") for sched in schedules),
+        (normalize_platform(p) for sched in schedules for p in pending_platforms(sched)),
+    )
+
+
+async def publish_platform(
+    db: FirestoreSession,
+    sched: Dict[str, Any],
+    payload: Dict[str, Any],
+    raw_platform: str,
+    staged: Optional[Dict[str, Any]] = None,
+    cred: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Publish a schedule's payload (app/services/publish_payload.py) to one
+    platform and return the result code. `staged` holds objects created
+    ahead of run_at by `stage_schedule`; when present only the final
+    publish call is made.
+    """
+    user_id: str = sched["user_id"]
+    product_id: str | None = sched.get("product_id")
+    platform = normalize_platform(raw_platform)
+    staged = staged or {}
+
+    if platform not in CREDENTIAL_COLLECTIONS:
+        return "unsupported_platform"
+
+    img_url = payload.get("image_url")
+    vid_url = payload.get("video_url")
+    media_urls: List[str] = payload.get("media_urls") or []
+    message = payload.get("message", "")
+
+    if cred is None:
+        cred = await credential_resolver.get(db, platform, user_id)
+    print(f"[DEBUG] {platform} creds for user {user_id}: {bool(cred)}")
+    if cred is None:
+        # Make sure no stale entry outlives this result; the next attempt queries again
+        credential_resolver.invalidate(user_id, platform)
+        return "no_credentials"
+
+    # ─── Facebook ───────────────────────────────────
+    if platform == "facebook":
+        if vid_url:
+            result_from_fb_video = await post_video(cred["page_id"], cred["access_token"], vid_url, description=message)
+            print(f"***Facebook video post result: {result_from_fb_video}***")
+            return "video_success"
+        elif staged.get("media_fbid"):
+            result_from_fb_img = await publish_staged_photo(
+                cred["page_id"], cred["access_token"], staged["media_fbid"], message
             )
-            continue
+            print(f"***Facebook staged image post result: {result_from_fb_img}***")
+            return "image_success"
+        elif img_url:
+            result_from_fb_img = await post_photo(cred["page_id"], cred["access_token"], img_url, caption=message)
+            print(f"***Facebook image post result: {result_from_fb_img}***")
+            return "image_success"
+        else:
+            result_from_fb_feed = await post_feed(cred["page_id"], cred["access_token"], message)
+            print(f"***Facebook feed post result: {result_from_fb_feed}***")
+            return "text_success"
+
+    # ─── Instagram ─────────────────────────────────
+    elif platform == "instagram":
+        if staged.get("container_id"):
+            result_from_post = await publish_container(cred, staged["container_id"])
+            if staged.get("skipped_items"):
+                result_from_post["skipped_items"] = staged["skipped_items"]
+        elif payload.get("media_kind") == "carousel":
+            result_from_post = await post_carousel_to_instagram(cred, media_urls, message)
+        else:
+            result_from_post = await post_to_instagram(cred, img_url, vid_url, message)
+        print(f"***Instagram post result: {result_from_post}***")
+        return "success"
+
+    # ─── Twitter / X ───────────────────────────────
+    elif platform == "twitter":
+        media_ids = staged.get("media_ids")
+        media: List[Tuple[str, bytes]] = []
+        if not media_ids:
+            # Media goes to Twitter straight from memory
+            media = list(await asyncio.gather(*(fetch_media(u) for u in media_urls)))
+
+        print(f"[DEBUG] Twitter post payload: access_token={cred['access_token'][:6]}..., "
+            f"access_token_secret={cred['access_token_secret'][:6]}..., "
+            f"message='{message}', media={media_ids or [name for name, _ in media] or None}")
+
+        result_from_tweet = await post_tweet_for_user(
+            cred["access_token"],
+            cred["access_token_secret"],
+            message,
+            media=media or None,
+            media_ids=media_ids,
+        )
+        print(f"***Twitter post result: {result_from_tweet}***")
+        return "success"
 
-        mc_root = product.get("marketing_content", {})
-        youtube_video_url = product.get("video_url")
+    # ─── YouTube ───────────────────────────────────
+    elif platform == "youtube":
+        youtube_video_url = vid_url
         print(f"\n*** Processing video URL: {youtube_video_url} ***\n")
-        results: Dict[str, str] = {}
+        if not youtube_video_url:
+            print(f"[DEBUG] YouTube post requires video_url")
+            return "no_video"
+        staged_path = staged.get("video_path")
+        downloaded = bool(staged_path) and Path(staged_path).exists()
+        tmp_vid = Path(staged_path) if downloaded else temp_media_path(product_id, "_yt_video.mp4")
+        try:
+            if not downloaded:
+                await download_file(youtube_video_url, tmp_vid)
+                print(f"[DEBUG] Downloaded YouTube video to {tmp_vid}")
+            result_from_you = await upload_video_for_user(
+                cred,
+                tmp_vid,
+                title=payload.get("title", ""),
+                desc=payload.get("description", ""),
+            )
+            print(f"***YouTube upload result: {result_from_you}***")
+        finally:
+            if tmp_vid.exists():
+                os.remove(tmp_vid)
+        return "success"
+
+    return "unsupported_platform"
+
+
+async def _publish_platform_limited(
+    db: FirestoreSession,
+    sched: Dict[str, Any],
+    payload: Dict[str, Any],
+    raw_platform: str,
+    staged: Optional[Dict[str, Any]] = None,
+    cred: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, PublishErrorKind | None]:
+    """Publish one platform and return its result code with the retry class of any failure."""
+    platform = normalize_platform(raw_platform)
+    try:
+        async with _platform_semaphore(platform):
+            result = await publish_platform(db, sched, payload, raw_platform, staged, cred)
+    except Exception as exc:
+        kind = classify_error(exc)
+        print(f"*** {platform} publish for schedule {sched['id']} failed ({kind.value}): {exc!r} ***")
+        if kind == PublishErrorKind.auth:
+            # Token revoked or replaced: look it up again on the next attempt
+            credential_resolver.invalidate(sched["user_id"], platform)
+        return f"error: {exc}", kind
+    return result, classify_result(result)
+
+
+async def publish_schedule(sched: Dict[str, Any], db: FirestoreSession | None = None) -> None:
+    """Claim one due schedule, publish it to its pending platforms and record the outcome."""
+    db = db or FirestoreSession()
+    lease_seconds = get_settings().scheduler_lease_seconds
+    async with _schedule_semaphore():
+        # 0️⃣  Take the lease — another replica may already have it
+        claimed = await claim_schedule(sched["id"], lease_seconds)
+        if claimed is None:
+            print(f"*** Schedule {sched['id']} already claimed or no longer due — skipping ***")
+            return
+        sched = claimed
+        local = None
+        heartbeat = asyncio.create_task(keep_lease_alive(sched["id"], lease_seconds))
+        try:
+            # Objects pre-staged by this replica, else the ids another replica recorded on the doc
+            local = staged_schedules.pop(sched["id"])
+            if local is not None and local.version != schedule_version(sched):
+                stale, local = local, None
+                discard_staged(stale)
+            shared = shared_staged(sched)
+
+            platforms = pending_platforms(sched)
+
+            # 1️⃣  Publish payload: stored on the schedule at creation, so no product
+            #     read here (legacy schedules and unstaged runs fall back to one)
+            payloads: Dict[str, Dict[str, Any]] | None = local.payload if local and local.payload else (
+                await payload_for_schedule(db, sched, platforms)
+            )
+            if payloads is None:
+                await finish_schedule(
+                    sched["id"],
+                    {
+                        "status": ScheduleState.failed.value,
+                        "results": {"error": "Product not found"},
+                    },
+                )
+                return
+
+            # 2️⃣  Publish the platforms still pending (all of them on the first
+            #     attempt, only the transient failures on a retry) concurrently
+            due_at = run_at_timestamp(sched.get("run_at"))
+            lag = datetime.now(timezone.utc).timestamp() - due_at if due_at is not None else None
+            calls = []
+            for raw in platforms:
+                platform = normalize_platform(raw)
+                staged = (local.platforms.get(platform) if local else None) or shared.get(platform)
+                cred = local.credentials.get(platform) if local else None
+                publish_metrics.record(platform, bool(staged), lag)
+                calls.append(_publish_platform_limited(db, sched, payloads.get(platform, {}), raw, staged, cred))
+            outcomes = await asyncio.gather(*calls)
+
+            # 3️⃣  Persist status / retry plan on the schedule document and release the lease
+            update = plan_outcome(sched, dict(zip(platforms, outcomes)))
+            if update["status"] == ScheduleState.upcoming.value:
+                print(f"*** Schedule {sched['id']} attempt {update['attempt_count']} will be retried "
+                      f"at {update['run_at'].isoformat()} for {update['retry_platforms']} ***")
+
+            if not await finish_schedule(sched["id"], update):
+                print(f"*** Lease on schedule {sched['id']} was lost; results not recorded: {update['results']} ***")
+        finally:
+            heartbeat.cancel()
+            if local is not None:
+                discard_staged(local)
+
 
-        # 2️⃣  Iterate over each requested platform
-        for raw_platform in sched["platforms"]:
-            platform = PLATFORM_ALIAS.get(raw_platform, raw_platform)
+# ────────────────────────────────────────────────────────────────────────
+#  Pre-staging (everything but the final publish call, ahead of run_at)
+# ────────────────────────────────────────────────────────────────────────
+async def _stage_platform(
+    sched: Dict[str, Any],
+    payload: Dict[str, Any],
+    platform: str,
+    cred: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Create the unpublished objects for one platform; {} when nothing can be staged."""
+    message = payload.get("message", "")
+    img_url = payload.get("image_url")
+    vid_url = payload.get("video_url")
+    media_urls: List[str] = payload.get("media_urls") or []
+
+    if platform == "instagram":
+        if payload.get("media_kind") == "carousel":
+            container_id, skipped = await create_carousel_container(cred, media_urls, message)
+            return {"container_id": container_id, "skipped_items": skipped}
+        if img_url or vid_url:
+            return {"container_id": await create_container(cred, img_url, vid_url, message)}
+
+    elif platform == "facebook":
+        # Videos are fetched by Facebook from file_url at publish time anyway
+        if img_url and not vid_url:
+            return {"media_fbid": await stage_photo(cred["page_id"], cred["access_token"], img_url)}
+
+    elif platform == "twitter":
+        if media_urls:
+            media = list(await asyncio.gather(*(fetch_media(u) for u in media_urls)))
+            return {"media_ids": await upload_media(cred["access_token"], cred["access_token_secret"], media)}
+
+    elif platform == "youtube":
+        if vid_url:
+            tmp_vid = temp_media_path(sched.get("product_id"), "_yt_video.mp4")
             try:
-                block = mc_root.get(platform, {})
-                content = block.get("content", {})
-
-                caption = content.get("caption", "") or ""
-                cta = content.get("call_to_action", "") or ""
-                text = content.get("text", "") or ""
-                hashtags = content.get("hashtags", []) or []
-                if isinstance(hashtags, str):
-                    hashtags = hashtags.split()
-                hashtags_str = " ".join(hashtags)
-
-                img_url = block.get("image_url")
-                vid_url = block.get("video_url")
-
-                message = f"{caption}\n\n{cta}\n\n{hashtags_str}".strip()
-                
-                if platform == "twitter" or platform == "x" or platform == "facebook":
-                    # Twitter/X has a 280 char limit, truncate if needed
-                    message = ""
-                    message = f"{cta}\n\n{text}\n\n{hashtags_str}".strip()
-                if platform == "youtube":
-                    message = ""
-                    message = f"{caption}\n\n{cta}\n\n{hashtags_str}".strip()
-
-                # ─── Facebook ───────────────────────────────────
-                if platform == "facebook":
-                    creds = await db.query(
-                        "facebook_credentials",
-                        filters=[("user_id", "==", user_id), ("is_active", "==", True)],
-                    )
-                    if not creds:
-                        results[raw_platform] = "no_credentials"
-                        continue
-                    cred = creds[0]
-
-                    if vid_url:
-                        result_from_fb_video = await post_video(cred["page_id"], cred["access_token"], vid_url, description=message)
-                        print(f"***Facebook video post result: {result_from_fb_video}***")
-                        results[raw_platform] = "video_success"
-                    elif img_url:
-                        result_from_fb_img = await post_photo(cred["page_id"], cred["access_token"], img_url, caption=message)
-                        print(f"***Facebook image post result: {result_from_fb_img}***")
-                        results[raw_platform] = "image_success"
-                    else:
-                        result_from_fb_feed = await post_feed(cred["page_id"], cred["access_token"], message)
-                        print(f"***Facebook feed post result: {result_from_fb_feed}***")
-                        results[raw_platform] = "text_success"
-
-                # ─── Instagram ─────────────────────────────────
-                elif platform == "instagram":
-                    
-                    creds = await db.query(
-                        "instagram_credentials",
-                        filters=[("user_id", "==", user_id), ("is_active", "==", True)],
-                    )
-                    if not creds:
-                        results[raw_platform] = "no_credentials"
-                        continue
-                    cred = creds[0]
-                    result_from_post = await post_to_instagram(cred, img_url, vid_url, message)
-                    print(f"***Instagram post result: {result_from_post}***")
-                    results[raw_platform] = "success"
-
-                # ─── Twitter / X ───────────────────────────────
-                elif platform == "twitter":
-                    creds = await db.query(
-                        "twitter_credentials",
-                        filters=[("user_id", "==", user_id), ("is_active", "==", True)],
-                    )
-                    print(f"[DEBUG] Twitter creds for user {user_id}: {creds}")
-                    if not creds:
-                        results[raw_platform] = "no_credentials"
-                        continue
-                    cred = creds[0]
-
-                    media_paths: List[str] = []
-                    if img_url:
-                        tmp = TMP_DIR / f"{product_id}_tw_image.jpg"
-                        print(f"[DEBUG] Downloading Twitter image from {img_url} to {tmp}")
-                        await download_file(img_url, tmp)
-                        media_paths.append(str(tmp))
-
-                    print(f"[DEBUG] Twitter post payload: access_token={cred['access_token'][:6]}..., "
-                        f"access_token_secret={cred['access_token_secret'][:6]}..., "
-                        f"message='{message}', media_paths={media_paths or None}")
-
-                    result_from_tweet = await post_tweet_for_user(
-                        cred["access_token"],
-                        cred["access_token_secret"],
-                        message,
-                        media_paths or None,
-                    )
-                    print(f"***Twitter post result: {result_from_tweet}***")
-                    for p in media_paths:
-                        try:
-                            os.remove(p)
-                            print(f"[DEBUG] Removed temp file {p}")
-                        except FileNotFoundError:
-                            print(f"[DEBUG] Temp file {p} not found for removal")
-
-                    results[raw_platform] = "success"
-
-                # ─── YouTube ───────────────────────────────────
-                elif platform == "youtube":
-                    creds = await db.query(
-                        "youtube_credentials", filters=[("user_id", "==", user_id)]
-                    )
-                    if not creds:
-                        print(f"[DEBUG] No YouTube credentials found for user {user_id}")
-                        results[raw_platform] = "no_credentials"
-                        continue
-                    cred = creds[0]
-                    if not youtube_video_url:
-                        print(f"[DEBUG] YouTube post requires video_url")
-                        results[raw_platform] = "no_video"
-                        continue
-                    vid_url= youtube_video_url
-                    if vid_url:
-                        tmp_vid = TMP_DIR / f"{product_id}_yt_video.mp4"
-                        await download_file(vid_url, tmp_vid)
-                        print(f"[DEBUG] Downloaded YouTube video to {tmp_vid}")
-                        result_from_you = await upload_video_for_user(
-                            cred,
-                            tmp_vid,
-                            title=caption,
-                            desc=cta,
-                        )
-                        print(f"***YouTube upload result: {result_from_you}***")
-                        os.remove(tmp_vid)
-                        results[raw_platform] = "success"
-                    elif img_url:
-                        print(f"[DEBUG] Skipping YouTube upload: image uploads are not supported.")
-                        results[raw_platform] = "image_not_supported"
-                    else:
-                        print(f"[DEBUG] YouTube post requires video_url or image_url")
-                        results[raw_platform] = "no_video_or_image"
-                        continue
-
-                # ─── Unknown platform ──────────────────────────
-                else:
-                    results[raw_platform] = "unsupported_platform"
+                await download_file(vid_url, tmp_vid)
+            except Exception:
+                if tmp_vid.exists():
+                    os.remove(tmp_vid)
+                raise
+            return {"video_path": str(tmp_vid)}
 
-            except Exception as exc:
-                results[raw_platform] = f"error: {exc}"
+    return {}
 
-        # 3️⃣  Persist status on the schedule document
-        if all(v.startswith(("success", "text_success", "image_success", "video_success"))
-               for v in results.values()):
-            new_state = ScheduleState.published
-        else:
-            new_state = ScheduleState.failed
 
-        await db.update(
-            "schedules",
-            sched["id"],
-            {"status": new_state, "results": results},
-        )
+async def stage_schedule(sched: Dict[str, Any]) -> StagedSchedule:
+    """Resolve payload and credentials and stage every pending platform of a schedule."""
+    db = FirestoreSession()
+    staged = StagedSchedule(version=schedule_version(sched))
+    platforms = pending_platforms(sched)
+    payloads = await payload_for_schedule(db, sched, platforms)
+    if payloads is None:
+        # publish_schedule looks again and records the failure
+        return staged
+    staged.payload = payloads
+
+    async def stage_one(raw: str) -> None:
+        platform = normalize_platform(raw)
+        if platform not in CREDENTIAL_COLLECTIONS:
+            return
+        cred = await credential_resolver.get(db, platform, sched["user_id"])
+        if cred is None:
+            return
+        staged.credentials[platform] = cred
+        try:
+            info = await _stage_platform(sched, payloads.get(platform, {}), platform, cred)
+        except Exception as exc:
+            # Not fatal: the platform is published the slow way at run_at
+            print(f"*** Pre-staging {platform} for schedule {sched['id']} failed: {exc!r} ***")
+            return
+        if info:
+            staged.platforms[platform] = info
+
+    await asyncio.gather(*(stage_one(raw) for raw in platforms))
+    return staged
+
+
+def discard_staged(staged: StagedSchedule) -> None:
+    """Remove local files of a staged schedule (platform-side objects expire on their own)."""
+    for info in staged.platforms.values():
+        path = info.get("video_path")
+        if path and os.path.exists(path):
+            os.remove(path)
 
 
 # ────────────────────────────────────────────────────────────────────────
@@ -330,8 +459,7 @@ async def process_due_schedules() -> None:
 # ────────────────────────────────────────────────────────────────────────
 async def migrate_run_at_to_timestamp() -> None:
     db = FirestoreSession()
-    schedules = await db.query("schedules", filters=[])
-    for sched in schedules:
+    async for sched in db.query_stream("schedules"):
         run_at = sched.get("run_at")
         if isinstance(run_at, str):
             try:
@@ -345,17 +473,47 @@ async def migrate_run_at_to_timestamp() -> None:
 # ────────────────────────────────────────────────────────────────────────
 #  Entry-point
 # ────────────────────────────────────────────────────────────────────────
+def create_dispatcher() -> ScheduleDispatcher:
+    settings = get_settings()
+    return ScheduleDispatcher(
+        publish_schedule,
+        max_sleep_seconds=settings.scheduler_max_sleep_seconds,
+        max_in_flight=settings.scheduler_claim_batch_size,
+        reclaim=find_expired_leases,
+        reclaim_interval_seconds=settings.scheduler_reclaim_interval_seconds,
+        prefetch=prefetch_credentials,
+    )
+
+
+def create_prestager(dispatcher: ScheduleDispatcher) -> SchedulePrestager:
+    settings = get_settings()
+    return SchedulePrestager(
+        dispatcher,
+        stage_schedule,
+        discard=discard_staged,
+        prefetch=prefetch_credentials,
+        lookahead_seconds=settings.scheduler_prestage_lookahead_seconds,
+        interval_seconds=settings.scheduler_prestage_interval_seconds,
+        max_concurrent=settings.scheduler_prestage_concurrency,
+    )
+
+
 async def main() -> None:
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(process_due_schedules, "interval", seconds=10)
-    scheduler.start()
+    dispatcher = create_dispatcher()
+    await dispatcher.start()
+    prestager = create_prestager(dispatcher)
+    await prestager.start()
 
     print("🚀 Scheduler started — press Ctrl-C to stop.")
     try:
         while True:
             await asyncio.sleep(3600)
-    except (KeyboardInterrupt, SystemExit):
+    except (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
         pass
+    finally:
+        await prestager.stop()
+        await dispatcher.stop()
+        await close_http_clients()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+"""
+app/services/credential_resolver.py
+-----------------------------------
+
+Resolves a user's publishing credential for a platform without a Firestore
+query per publish.
+
+• TTL cache keyed on (user_id, platform). Only found credentials are
+  cached: a user who connects an account is seen on the next lookup, even
+  in the scheduler process where the API's invalidations don't arrive.
+• `prefetch` loads every credential for a batch of users with `in` queries
+  (30 values per query, Firestore's limit) — the dispatcher calls it for each
+  due batch, the pre-stager for its lookahead window.
+• The connect / callback / update / delete endpoints invalidate the user's
+  entries. The scheduler runs in its own process, so there the TTL bounds
+  how long a disconnected account can still be used; an auth failure on
+  publish also drops the entry.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.models.firestore_db import FirestoreSession
+
+logger = logging.getLogger(__name__)
+
+CREDENTIAL_COLLECTIONS = {
+    "facebook": "facebook_credentials",
+    "instagram": "instagram_credentials",
+    "twitter": "twitter_credentials",
+    "youtube": "youtube_credentials",
+}
+
+# Firestore accepts at most 30 values in an `in` filter
+IN_QUERY_LIMIT = 30
+
+
+def _active_filters(platform: str) -> List[Tuple[str, str, Any]]:
+    # YouTube credentials have no is_active flag
+    return [] if platform == "youtube" else [("is_active", "==", True)]
+
+
+class CredentialResolver:
+    """Default (first active) credential per user and platform, cached for `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 10000):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        # (user_id, platform) → (expires_at, credential)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Tuple[str, str]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def _store(self, key: Tuple[str, str], cred: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, cred)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, db: FirestoreSession, platform: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """The user's credential document for `platform`, or None if none is connected."""
+        if platform not in CREDENTIAL_COLLECTIONS:
+            return None
+        key = (user_id, platform)
+        found, cred = self._lookup(key)
+        if found:
+            self.hits += 1
+            return cred
+
+        self.misses += 1
+        creds = await db.query(
+            CREDENTIAL_COLLECTIONS[platform],
+            filters=[("user_id", "==", user_id), *_active_filters(platform)],
+        )
+        cred = creds[0] if creds else None
+        if cred is not None:
+            self._store(key, cred)
+        return cred
+
+    async def prefetch(
+        self,
+        db: FirestoreSession,
+        user_ids: Iterable[str],
+        platforms: Iterable[str],
+    ) -> None:
+        """Load the credentials of `user_ids` on `platforms` that are not cached yet."""
+        user_ids = list(dict.fromkeys(u for u in user_ids if u))
+        for platform in dict.fromkeys(platforms):
+            if platform not in CREDENTIAL_COLLECTIONS:
+                continue
+            missing = [u for u in user_ids if not self._lookup((u, platform))[0]]
+            for start in range(0, len(missing), IN_QUERY_LIMIT):
+                chunk = missing[start:start + IN_QUERY_LIMIT]
+                docs = await db.query(
+                    CREDENTIAL_COLLECTIONS[platform],
+                    filters=[("user_id", "in", chunk), *_active_filters(platform)],
+                )
+                first: Dict[str, Dict[str, Any]] = {}
+                for doc in docs:
+                    first.setdefault(doc.get("user_id"), doc)
+                for user_id, cred in first.items():
+                    self._store((user_id, platform), cred)
+
+    def invalidate(self, user_id: str, platform: str | None = None) -> None:
+        """Forget cached credentials of a user (one platform, or all of them)."""
+        for name in ([platform] if platform else CREDENTIAL_COLLECTIONS):
+            self._entries.pop((str(user_id), name), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_settings = get_settings()
+credential_resolver = CredentialResolver(
+    ttl_seconds=_settings.credential_cache_ttl_seconds,
+    max_entries=_settings.credential_cache_max_entries,
+)
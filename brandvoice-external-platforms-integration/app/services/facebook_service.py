@@ -1,5 +1,6 @@
-import httpx
 from app.core.config import get_settings
+from app.core.http import get_http_client
+from app.services.rate_limiter import rate_limiter
 settings = get_settings()
 
 import json
@@ -15,8 +16,8 @@ async def exchange_code_for_token(code: str) -> str:
         "client_secret": settings.facebook_app_secret,
         "code": code,
     }
-    async with httpx.AsyncClient() as c:
-        r = await c.get(url, params=params)
+    c = get_http_client("graph")
+    r = await c.get(url, params=params)
     r.raise_for_status()
     return r.json()["access_token"]
 
@@ -29,25 +30,24 @@ async def upgrade_to_long_lived(short_token: str) -> str:
         "client_secret": settings.facebook_app_secret,
         "fb_exchange_token": short_token,
     }
-    async with httpx.AsyncClient() as c:
-        r = await c.get(url, params=params)
+    c = get_http_client("graph")
+    r = await c.get(url, params=params)
     r.raise_for_status()
     return r.json()["access_token"]
 
 async def page_id_and_token(long_user_token: str) -> tuple[str, str]:
     """Step-3: pick the first Page & return its never-expiring Page token"""
     # 3a list pages
-    async with httpx.AsyncClient() as c:
-        r = await c.get(f"{GRAPH}/me/accounts",
-                        params={"access_token": long_user_token})
+    c = get_http_client("graph")
+    r = await c.get(f"{GRAPH}/me/accounts",
+                    params={"access_token": long_user_token})
     r.raise_for_status()
     page = r.json()["data"][0]          # or make UI to pick
     page_id = page["id"]
     # 3b fetch page access_token
-    async with httpx.AsyncClient() as c:
-        r2 = await c.get(f"{GRAPH}/{page_id}",
-                         params={"fields": "access_token",
-                                 "access_token": long_user_token})
+    r2 = await c.get(f"{GRAPH}/{page_id}",
+                     params={"fields": "access_token",
+                             "access_token": long_user_token})
     r2.raise_for_status()
     page_token = r2.json()["access_token"]
     return page_id, page_token
@@ -58,16 +58,20 @@ async def post_feed(page_id: str, page_token: str, message: str, link: str | Non
     data = {"message": message, "access_token": page_token}
     if link:
         data["link"] = link
-    async with httpx.AsyncClient() as c:
-        r = await c.post(url, data=data)
+    await rate_limiter.acquire("facebook", page_id)
+    c = get_http_client("graph")
+    r = await c.post(url, data=data)
+    rate_limiter.observe("facebook", page_id, r.headers)
     r.raise_for_status()
     return r.json()["id"]
 
 async def post_photo(page_id: str, page_token: str, image_url: str, caption: str | None):
     url = f"{GRAPH}/{page_id}/photos"
     data = {"url": image_url, "caption": caption or "", "access_token": page_token}
-    async with httpx.AsyncClient(timeout= 30.0) as c:
-        r = await c.post(url, data=data)
+    await rate_limiter.acquire("facebook", page_id)
+    c = get_http_client("graph")
+    r = await c.post(url, data=data, timeout=30.0)
+    rate_limiter.observe("facebook", page_id, r.headers)
     r.raise_for_status()
     return r.json()["id"]
 
@@ -89,8 +93,10 @@ async def post_video(
         "access_token": page_token,
         # optional: "published": "true" (default)
     }
-    async with httpx.AsyncClient(timeout = 120.0) as c:  # 2-minute budget
-        r = await c.post(url, data=data)
+    await rate_limiter.acquire("facebook", page_id)
+    c = get_http_client("graph")
+    r = await c.post(url, data=data, timeout=120.0)  # 2-minute budget
+    rate_limiter.observe("facebook", page_id, r.headers)
     r.raise_for_status()                       # raise HTTP 4xx/5xx as Python error
     return r.json()["id"]                      # { "id": "{page_id}_{video_id}" }
 
@@ -112,8 +118,10 @@ async def post_video_as_feed(page_id: str,
         "published": "false",
         "access_token": page_token,
     }
-    async with httpx.AsyncClient(timeout = 300) as c:   # large videos take time
-        up = await c.post(upload_url, data=upload_data)
+    await rate_limiter.acquire("facebook", page_id)
+    c = get_http_client("graph")
+    up = await c.post(upload_url, data=upload_data, timeout=300)   # large videos take time
+    rate_limiter.observe("facebook", page_id, up.headers)
     up.raise_for_status()
     video_id = up.json()["id"]
 
@@ -126,7 +134,41 @@ async def post_video_as_feed(page_id: str,
         "attached_media[0]": json.dumps({"media_fbid": video_id}),
         "access_token": page_token,
     }
-    async with httpx.AsyncClient(timeout = (60)) as c:
-        post = await c.post(feed_url, data=feed_data)
+    await rate_limiter.acquire("facebook", page_id)
+    post = await c.post(feed_url, data=feed_data, timeout=60)
+    rate_limiter.observe("facebook", page_id, post.headers)
     post.raise_for_status()
     return post.json()["id"]          # "{page-id}_{post-id}"
+
+
+# ----------  pre-staged posts ---------- #
+async def stage_photo(page_id: str, page_token: str, image_url: str) -> str:
+    """
+    Upload a photo with published=false ahead of time.
+    Returns its media fbid for `publish_staged_photo`.
+    """
+    await rate_limiter.acquire("facebook", page_id)
+    c = get_http_client("graph")
+    r = await c.post(
+        f"{GRAPH}/{page_id}/photos",
+        data={"url": image_url, "published": "false", "access_token": page_token},
+        timeout=30.0,
+    )
+    rate_limiter.observe("facebook", page_id, r.headers)
+    r.raise_for_status()
+    return r.json()["id"]
+
+
+async def publish_staged_photo(page_id: str, page_token: str, media_fbid: str, message: str = "") -> str:
+    """Feed post attaching a photo staged with `stage_photo`. Returns the post ID."""
+    feed_data = {
+        "message": message,
+        "attached_media[0]": json.dumps({"media_fbid": media_fbid}),
+        "access_token": page_token,
+    }
+    await rate_limiter.acquire("facebook", page_id)
+    c = get_http_client("graph")
+    r = await c.post(f"{GRAPH}/{page_id}/feed", data=feed_data, timeout=60)
+    rate_limiter.observe("facebook", page_id, r.headers)
+    r.raise_for_status()
+    return r.json()["id"]
@@ -0,0 +1,386 @@
+"""
+app/services/instagram_service.py
+---------------------------------
+
+Instagram Graph API publishing.
+
+• `post_to_instagram` – container → (wait for video processing) → publish.
+• `post_carousel_to_instagram` – child containers in parallel → CAROUSEL
+  parent → publish.
+
+• `ContainerStatusTracker` – one background poller for every container
+  that is still processing. Pending containers are checked together with
+  a single multi-id request per account (`?ids=a,b,c&fields=status_code`),
+  each on its own adaptive schedule: the first check is delayed according
+  to the video size and the interval grows while the container is still
+  IN_PROGRESS. A waiter is released the moment its container reaches a
+  final state, so each post is published as soon as it is ready.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.http import get_http_client
+from app.services.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+GRAPH = "https://graph.facebook.com/v23.0"
+
+# Graph API accepts at most 50 ids per multi-id request
+MAX_IDS_PER_REQUEST = 50
+FINAL_STATUSES = {"FINISHED", "ERROR", "EXPIRED", "PUBLISHED"}
+
+
+async def fetch_container_statuses(
+    container_ids: List[str],
+    access_token: str,
+    account_id: str | None = None,
+) -> Dict[str, Dict[str, Any]]:
+    """`status_code` of several containers in one request per 50 ids: {container_id: {...}}."""
+    client = get_http_client("graph")
+    statuses: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(container_ids), MAX_IDS_PER_REQUEST):
+        chunk = container_ids[i:i + MAX_IDS_PER_REQUEST]
+        resp = await client.get(
+            f"{GRAPH}/",
+            params={"ids": ",".join(chunk), "fields": "status_code,status", "access_token": access_token},
+        )
+        if account_id:
+            rate_limiter.observe("instagram", account_id, resp.headers)
+        resp.raise_for_status()
+        statuses.update(resp.json())
+    return statuses
+
+
+# ── container status tracker ─────────────────────────────────────────────
+@dataclass
+class _PendingContainer:
+    container_id: str
+    access_token: str
+    account_id: str
+    future: asyncio.Future
+    interval: float
+    next_poll: float
+    deadline: float
+
+
+def initial_poll_delay(video_bytes: Optional[int]) -> float:
+    """First status check: bigger videos take longer to process, so wait longer before asking."""
+    settings = get_settings()
+    delay = settings.instagram_status_min_interval_seconds
+    if video_bytes:
+        delay += video_bytes / (1024 * 1024) * settings.instagram_status_seconds_per_mb
+    return min(delay, settings.instagram_status_max_interval_seconds)
+
+
+class ContainerStatusTracker:
+    """Batches status polls for all processing containers of this process."""
+
+    def __init__(self):
+        self._pending: Dict[str, _PendingContainer] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.polls = 0
+        self.containers_polled = 0
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="ig-container-tracker")
+
+    async def wait(
+        self,
+        container_id: str,
+        access_token: str,
+        account_id: str,
+        video_bytes: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Wait until the container is FINISHED / ERROR / EXPIRED (or times out) and return its status."""
+        self._ensure_running()
+        now = time.monotonic()
+        delay = initial_poll_delay(video_bytes)
+        pending = _PendingContainer(
+            container_id=str(container_id),
+            access_token=access_token,
+            account_id=account_id,
+            future=asyncio.get_running_loop().create_future(),
+            interval=delay,
+            next_poll=now + delay,
+            deadline=now + get_settings().instagram_status_max_wait_seconds,
+        )
+        self._pending[pending.container_id] = pending
+        self._wakeup.set()
+        try:
+            return await pending.future
+        finally:
+            self._pending.pop(pending.container_id, None)
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            due = [p for p in self._pending.values() if p.next_poll <= now and not p.future.done()]
+            if due:
+                try:
+                    await self._poll(due)
+                except Exception as exc:
+                    # Keep polling: every other waiter depends on this loop for its deadline
+                    logger.warning("Container status poll failed: %s", exc)
+                    self._reschedule(due)
+
+            waiting = [p.next_poll for p in self._pending.values() if not p.future.done()]
+            timeout = max(0.0, min(waiting) - time.monotonic()) if waiting else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, due: List[_PendingContainer]) -> None:
+        groups: Dict[Tuple[str, str], List[_PendingContainer]] = {}
+        for p in due:
+            groups.setdefault((p.account_id, p.access_token), []).append(p)
+        await asyncio.gather(*(
+            self._poll_group(account_id, token, containers)
+            for (account_id, token), containers in groups.items()
+        ))
+
+    async def _poll_group(self, account_id: str, token: str, containers: List[_PendingContainer]) -> None:
+        self.polls += 1
+        self.containers_polled += len(containers)
+        try:
+            statuses = await fetch_container_statuses([p.container_id for p in containers], token, account_id)
+        except Exception as exc:
+            logger.warning("Container status poll for %s failed: %s", account_id, exc)
+            statuses = {}
+
+        settings = get_settings()
+        now = time.monotonic()
+        for p in containers:
+            if p.future.done():
+                # Waiter was cancelled while the poll was in flight
+                continue
+            status = statuses.get(p.container_id) or {}
+            if status.get("status_code") in FINAL_STATUSES:
+                p.future.set_result(status)
+            elif now >= p.deadline:
+                p.future.set_result({**status, "id": p.container_id, "status_code": "TIMEOUT"})
+            else:
+                p.interval = min(p.interval * settings.instagram_status_backoff_factor,
+                                 settings.instagram_status_max_interval_seconds)
+                p.next_poll = now + p.interval
+
+    def _reschedule(self, containers: List[_PendingContainer]) -> None:
+        """Push back the next poll of `containers` after a failed pass; release those past their deadline."""
+        now = time.monotonic()
+        for p in containers:
+            if p.future.done():
+                continue
+            if now >= p.deadline:
+                p.future.set_result({"id": p.container_id, "status_code": "TIMEOUT"})
+            else:
+                p.next_poll = max(p.next_poll, now + p.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "polls": self.polls,
+            "containers_polled": self.containers_polled,
+        }
+
+
+container_tracker = ContainerStatusTracker()
+
+
+async def _video_size(video_url: str) -> Optional[int]:
+    try:
+        resp = await get_http_client("media").head(video_url, follow_redirects=True)
+        return int(resp.headers.get("content-length") or 0) or None
+    except Exception:
+        return None
+
+
+# ── publishing ───────────────────────────────────────────────────────────
+class InstagramPublishError(RuntimeError):
+    """Graph API refused a container or it failed processing; `payload` is the response."""
+
+    def __init__(self, message: str, payload: Dict[str, Any]):
+        super().__init__(f"{message}: {payload}")
+        self.payload = payload
+
+
+async def create_container(
+    cred: Dict[str, Any],
+    image_url: str | None,
+    video_url: str | None,
+    caption: str,
+) -> str:
+    """Create a media container and, for video, wait until it is ready to publish."""
+    client = get_http_client("graph")
+    account_id = cred["instagram_account_id"]
+    token = cred["access_token"]
+
+    if video_url:
+        params = {
+            "media_type": "REELS",  # Use REELS for video
+            "video_url": video_url,
+            "caption": caption,
+            "access_token": token,
+        }
+    elif image_url:
+        params = {
+            "image_url": image_url,
+            "caption": caption,
+            "access_token": token,
+        }
+    else:
+        raise ValueError("Instagram post needs either image_url or video_url")
+
+    await rate_limiter.acquire("instagram", account_id)
+    resp = await client.post(f"{GRAPH}/{account_id}/media", data=params)
+    rate_limiter.observe("instagram", account_id, resp.headers)
+    res = resp.json()
+    print(f"\n***response from media creation {res}***\n")
+    container_id = res.get("id")
+    if not container_id:
+        raise InstagramPublishError("Instagram media upload failed", res)
+    print(f"*** Instagram container created: {container_id}***")
+
+    # Wait for video processing (batched with every other pending container)
+    if video_url:
+        status_json = await container_tracker.wait(
+            container_id, token, account_id, video_bytes=await _video_size(video_url)
+        )
+        status = status_json.get("status_code")
+        print(f"Instagram container status: {status}")
+        if status != "FINISHED":
+            raise InstagramPublishError("Instagram video not ready", status_json)
+    return container_id
+
+
+async def publish_container(cred: Dict[str, Any], container_id: str) -> Dict[str, Any]:
+    """Publish a ready container — the only call left at run_at for a pre-staged post."""
+    account_id = cred["instagram_account_id"]
+    await rate_limiter.acquire("instagram", account_id)
+    resp = await get_http_client("graph").post(
+        f"{GRAPH}/{account_id}/media_publish",
+        data={"creation_id": container_id, "access_token": cred["access_token"]},
+    )
+    rate_limiter.observe("instagram", account_id, resp.headers)
+    res = resp.json()
+    if "id" not in res:
+        raise InstagramPublishError("Instagram publish failed", res)
+    return res
+
+
+async def post_to_instagram(
+    cred: Dict[str, Any],
+    image_url: str | None,
+    video_url: str | None,
+    caption: str,
+):
+    """
+    Two-step IG posting flow: 1) create media container (and wait for video processing) → 2) publish.
+    """
+    container_id = await create_container(cred, image_url, video_url, caption)
+    return await publish_container(cred, container_id)
+
+
+# ── carousels ────────────────────────────────────────────────────────────
+# Instagram carousels hold 2–10 items
+MIN_CAROUSEL_ITEMS = 2
+MAX_CAROUSEL_ITEMS = 10
+
+
+def _is_video_url(url: str) -> bool:
+    return url.split("?", 1)[0].lower().endswith((".mp4", ".mov"))
+
+
+async def _create_carousel_item(client, base: str, token: str, account_id: str, url: str) -> str:
+    """Create one carousel child container and wait until it is usable."""
+    if _is_video_url(url):
+        params = {"media_type": "VIDEO", "video_url": url, "is_carousel_item": "true", "access_token": token}
+    else:
+        params = {"image_url": url, "is_carousel_item": "true", "access_token": token}
+    # Child containers are not posts: they don't take a publishing slot, but
+    # their usage headers still count
+    resp = await client.post(f"{base}/media", data=params)
+    rate_limiter.observe("instagram", account_id, resp.headers)
+    resp.raise_for_status()
+    container_id = resp.json()["id"]
+
+    if params.get("media_type") == "VIDEO":
+        status = await container_tracker.wait(container_id, token, account_id, video_bytes=await _video_size(url))
+        if status.get("status_code") != "FINISHED":
+            raise RuntimeError(f"Carousel video {url} not ready: {status}")
+    return container_id
+
+
+async def create_carousel_container(
+    cred: Dict[str, Any],
+    media_urls: List[str],
+    caption: str,
+) -> Tuple[str, List[str]]:
+    """
+    Child containers created concurrently (bounded), then the CAROUSEL parent.
+    Children that fail are left out as long as at least two remain; otherwise
+    the first child error is raised. Returns the parent id and skipped URLs.
+    """
+    client = get_http_client("graph")
+    account_id = cred["instagram_account_id"]
+    base = f"{GRAPH}/{account_id}"
+    token = cred["access_token"]
+    slots = asyncio.Semaphore(get_settings().instagram_carousel_parallelism)
+
+    async def create(url: str) -> str:
+        async with slots:
+            return await _create_carousel_item(client, base, token, account_id, url)
+
+    # Children, in parallel; order of the results follows media_urls
+    outcomes = await asyncio.gather(*(create(u) for u in media_urls), return_exceptions=True)
+    children = [c for c in outcomes if not isinstance(c, BaseException)]
+    failures = [(u, e) for u, e in zip(media_urls, outcomes) if isinstance(e, BaseException)]
+    for url, exc in failures:
+        print(f"*** Instagram carousel item {url} failed: {exc!r} ***")
+    if len(children) < MIN_CAROUSEL_ITEMS:
+        raise failures[0][1]
+
+    # Parent container
+    await rate_limiter.acquire("instagram", account_id)
+    resp = await client.post(
+        f"{base}/media",
+        data={
+            "media_type": "CAROUSEL",
+            "children": ",".join(children),
+            "caption": caption,
+            "access_token": token,
+        },
+    )
+    rate_limiter.observe("instagram", account_id, resp.headers)
+    resp.raise_for_status()
+    parent_id = resp.json()["id"]
+    print(f"*** Instagram carousel container created: {parent_id} ({len(children)} items) ***")
+    return parent_id, [url for url, _ in failures]
+
+
+async def post_carousel_to_instagram(
+    cred: Dict[str, Any],
+    media_urls: List[str],
+    caption: str,
+):
+    """Carousel flow: child containers in parallel → CAROUSEL parent → publish."""
+    media_urls = [u for u in media_urls if u][:MAX_CAROUSEL_ITEMS]
+    if len(media_urls) < MIN_CAROUSEL_ITEMS:
+        image = media_urls[0] if media_urls else None
+        return await post_to_instagram(cred, image, None, caption)
+
+    parent_id, skipped = await create_carousel_container(cred, media_urls, caption)
+    result = await publish_container(cred, parent_id)
+    if skipped:
+        result["skipped_items"] = skipped
+    return result
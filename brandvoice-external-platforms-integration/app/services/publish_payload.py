@@ -0,0 +1,170 @@
+"""
+app/services/publish_payload.py
+-------------------------------
+
+Compact per-platform publish payload, resolved from the product when a
+schedule is created or edited and stored on the schedule document:
+
+    payload = {
+        "version": "<hash of the platform payloads>",
+        "built_at": <datetime>,
+        "platforms": {
+            "<platform>": {
+                "message": "...",          # final text, platform rules applied
+                "media_kind": "video" | "carousel" | "image" | "text",
+                "image_url": ..., "video_url": ..., "media_urls": [...],
+                "title": ..., "description": ...,   # YouTube only
+            },
+        },
+    }
+
+• The worker publishes from the payload alone: no product read and no
+  message assembly when a schedule fires.
+• Content edited after scheduling is picked up through the refresh
+  endpoints (POST /scheduler/{id}/refresh-payload, or per product).
+• Schedules written before payloads existed are resolved from the product
+  at publish time (`payload_for_schedule`).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.models.firestore_db import FirestoreSession
+from app.services.instagram_service import MAX_CAROUSEL_ITEMS, MIN_CAROUSEL_ITEMS
+from app.services.twitter_service import MAX_TWEET_IMAGES
+
+PLATFORM_ALIAS = {
+    "x": "twitter",
+}  # extend if you have more aliases: e.g. "fb": "facebook"
+
+
+def normalize_platform(raw_platform: Any) -> str:
+    """Schedule platform (enum or stored string) → marketing_content key."""
+    raw_platform = getattr(raw_platform, "value", raw_platform)
+    return PLATFORM_ALIAS.get(raw_platform, raw_platform)
+
+
+def build_message(platform: str, content: Dict[str, Any]) -> str:
+    caption = content.get("caption", "") or ""
+    cta = content.get("call_to_action", "") or ""
+    text = content.get("text", "") or ""
+    hashtags = content.get("hashtags", []) or []
+    if isinstance(hashtags, str):
+        hashtags = hashtags.split()
+    hashtags_str = " ".join(hashtags)
+
+    message = f"{caption}\n\n{cta}\n\n{hashtags_str}".strip()
+
+    if platform == "twitter" or platform == "x" or platform == "facebook":
+        # Twitter/X has a 280 char limit, truncate if needed
+        message = ""
+        message = f"{cta}\n\n{text}\n\n{hashtags_str}".strip()
+    if platform == "youtube":
+        message = ""
+        message = f"{caption}\n\n{cta}\n\n{hashtags_str}".strip()
+    return message
+
+
+def tweet_media_urls(block: Dict[str, Any]) -> List[str]:
+    """One video, else up to four images."""
+    if block.get("video_url"):
+        return [block["video_url"]]
+    media_urls = block.get("carousel_urls") or ([block["image_url"]] if block.get("image_url") else [])
+    return media_urls[:MAX_TWEET_IMAGES]
+
+
+def instagram_carousel_urls(block: Dict[str, Any]) -> List[str]:
+    """Carousel items to publish, or [] when the post is a single image / reel."""
+    if block.get("video_url"):
+        return []
+    urls = [u for u in block.get("carousel_urls") or [] if u][:MAX_CAROUSEL_ITEMS]
+    return urls if len(urls) >= MIN_CAROUSEL_ITEMS else []
+
+
+def build_platform_payload(product: Dict[str, Any], platform: str) -> Dict[str, Any]:
+    """Everything the worker needs to publish `product` on one platform."""
+    block = product.get("marketing_content", {}).get(platform, {})
+    content = block.get("content", {})
+    img_url = block.get("image_url")
+    vid_url = block.get("video_url")
+    payload: Dict[str, Any] = {
+        "message": build_message(platform, content),
+        "image_url": img_url,
+        "video_url": vid_url,
+        "media_urls": [],
+    }
+
+    if platform == "instagram":
+        payload["media_urls"] = instagram_carousel_urls(block)
+    elif platform == "twitter":
+        payload["media_urls"] = tweet_media_urls(block)
+    elif platform == "youtube":
+        # YouTube takes the product-level video with caption / CTA as title / description
+        payload.update({
+            "video_url": product.get("video_url"),
+            "image_url": None,
+            "title": content.get("caption", "") or "",
+            "description": content.get("call_to_action", "") or "",
+        })
+
+    if payload["video_url"]:
+        payload["media_kind"] = "video"
+    elif platform == "instagram" and payload["media_urls"]:
+        payload["media_kind"] = "carousel"
+    elif payload["image_url"] or payload["media_urls"]:
+        payload["media_kind"] = "image"
+    else:
+        payload["media_kind"] = "text"
+    return payload
+
+
+def build_publish_payload(product: Dict[str, Any], platforms: Iterable[str]) -> Dict[str, Any]:
+    """Payload document for a schedule publishing `product` on `platforms`."""
+    resolved = {
+        platform: build_platform_payload(product, platform)
+        for platform in dict.fromkeys(normalize_platform(p) for p in platforms)
+    }
+    digest = hashlib.sha1(json.dumps(resolved, sort_keys=True).encode()).hexdigest()[:12]
+    return {
+        "version": digest,
+        "built_at": datetime.now(timezone.utc),
+        "platforms": resolved,
+    }
+
+
+def payload_version(sched: Dict[str, Any]) -> Optional[str]:
+    return (sched.get("payload") or {}).get("version")
+
+
+def stored_payload(sched: Dict[str, Any], platforms: Iterable[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Per-platform payloads from the schedule document, if they cover `platforms`."""
+    resolved = (sched.get("payload") or {}).get("platforms") or {}
+    wanted = [normalize_platform(p) for p in platforms]
+    if not wanted or any(p not in resolved for p in wanted):
+        return None
+    return resolved
+
+
+async def resolve_payload(
+    db: FirestoreSession, product_id: Optional[str], platforms: Iterable[str]
+) -> Optional[Dict[str, Any]]:
+    """Read the product and build the payload; None if there is no such product."""
+    product = await db.get("products", product_id) if product_id else None
+    if product is None:
+        return None
+    return build_publish_payload(product, platforms)
+
+
+async def payload_for_schedule(
+    db: FirestoreSession, sched: Dict[str, Any], platforms: Iterable[str]
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Stored payloads, else (legacy schedules) resolved from the product now."""
+    platforms = list(platforms)
+    resolved = stored_payload(sched, platforms)
+    if resolved is not None:
+        return resolved
+    payload = await resolve_payload(db, sched.get("product_id"), platforms)
+    return payload["platforms"] if payload else None
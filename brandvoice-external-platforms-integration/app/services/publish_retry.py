@@ -0,0 +1,176 @@
+"""
+app/services/publish_retry.py
+-----------------------------
+
+Failure classification and retry planning for platform publishes.
+
+• Every platform outcome is classified as success, transient (timeouts,
+  5xx, 429), auth (revoked / missing credentials) or permanent (bad request,
+  unsupported platform, missing media).
+
+• Only transient failures are retried. The schedule goes back to `upcoming`
+  with `run_at` pushed out by a jittered exponential backoff and the failed
+  platforms in `retry_platforms`, so the dispatcher picks it up again like
+  any other schedule and publishes just those platforms.
+
+• Each attempt is appended to the schedule's `attempts` history, and the
+  first `run_at` is kept in `original_run_at`.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import tweepy
+from google.auth.exceptions import RefreshError
+from googleapiclient.errors import HttpError
+
+from app.core.config import get_settings
+from app.models.enums import PublishErrorKind, ScheduleState
+from app.services.instagram_service import InstagramPublishError
+
+SUCCESS_CODES = ("success", "text_success", "image_success", "video_success")
+
+# Result codes returned (not raised) by publish_platform
+_RESULT_KINDS = {
+    "no_credentials": PublishErrorKind.auth,
+    "no_video": PublishErrorKind.permanent,
+    "unsupported_platform": PublishErrorKind.permanent,
+}
+
+# Graph API error codes for expired / revoked tokens and missing permissions
+_GRAPH_AUTH_CODES = {102, 190, 200, 10}
+# Graph API throttling / temporary errors
+_GRAPH_TRANSIENT_CODES = {1, 2, 4, 17, 32, 341, 613, 80001}
+
+
+def is_success(result: Optional[str]) -> bool:
+    return bool(result) and result.startswith(SUCCESS_CODES)
+
+
+def _kind_from_status(status: int) -> PublishErrorKind:
+    if status in (408, 429) or status >= 500:
+        return PublishErrorKind.transient
+    if status in (401, 403):
+        return PublishErrorKind.auth
+    return PublishErrorKind.permanent
+
+
+def _graph_error_kind(body: Any) -> Optional[PublishErrorKind]:
+    error = body.get("error") if isinstance(body, dict) else None
+    if not isinstance(error, dict):
+        return None
+    code = error.get("code")
+    if error.get("is_transient") or code in _GRAPH_TRANSIENT_CODES:
+        return PublishErrorKind.transient
+    if code in _GRAPH_AUTH_CODES:
+        return PublishErrorKind.auth
+    return None
+
+
+def classify_error(exc: BaseException) -> PublishErrorKind:
+    """Map an exception raised while publishing to a retry class."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            body = exc.response.json()
+        except ValueError:
+            body = None
+        return _graph_error_kind(body) or _kind_from_status(exc.response.status_code)
+    if isinstance(exc, InstagramPublishError):
+        # Graph error body from container create / publish, or the status of a
+        # container that did not finish processing in time (worth another attempt)
+        if exc.payload.get("status_code") == "TIMEOUT":
+            return PublishErrorKind.transient
+        return _graph_error_kind(exc.payload) or PublishErrorKind.permanent
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, ConnectionError, TimeoutError)):
+        return PublishErrorKind.transient
+
+    if isinstance(exc, (tweepy.TooManyRequests, tweepy.TwitterServerError)):
+        return PublishErrorKind.transient
+    if isinstance(exc, (tweepy.Unauthorized, tweepy.Forbidden)):
+        return PublishErrorKind.auth
+    if isinstance(exc, tweepy.HTTPException):
+        return PublishErrorKind.permanent
+    if isinstance(exc, tweepy.TweepyException):
+        # Connection problems inside tweepy surface as the base exception
+        return PublishErrorKind.transient
+
+    if isinstance(exc, RefreshError):
+        return PublishErrorKind.auth
+    if isinstance(exc, HttpError):
+        return _kind_from_status(exc.resp.status)
+
+    return PublishErrorKind.permanent
+
+
+def classify_result(result: str) -> Optional[PublishErrorKind]:
+    """Retry class of a returned result code; None for success."""
+    if is_success(result):
+        return None
+    return _RESULT_KINDS.get(result, PublishErrorKind.permanent)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` (1-based): exponential with equal jitter."""
+    settings = get_settings()
+    delay = min(settings.scheduler_retry_max_seconds,
+                settings.scheduler_retry_base_seconds * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def pending_platforms(sched: Dict[str, Any]) -> List[str]:
+    """Platforms to publish on this attempt: the retry set of a rescheduled schedule, else all of them."""
+    platforms = list(dict.fromkeys(sched.get("platforms") or []))
+    retry = sched.get("retry_platforms")
+    if retry:
+        return [p for p in platforms if p in retry]
+    return platforms
+
+
+def plan_outcome(
+    sched: Dict[str, Any],
+    outcomes: Dict[str, Tuple[str, Optional[PublishErrorKind]]],
+) -> Dict[str, Any]:
+    """
+    Build the schedule update for one publish attempt: merged results, attempt
+    history, and either a final status or the next `run_at` for a retry.
+    """
+    settings = get_settings()
+    now = datetime.now(timezone.utc)
+    attempt = int(sched.get("attempt_count") or 0) + 1
+
+    previous = sched.get("results") if isinstance(sched.get("results"), dict) else {}
+    results = {**previous, **{p: result for p, (result, _) in outcomes.items()}}
+    history = list(sched.get("attempts") or [])
+    history.append({
+        "attempt": attempt,
+        "at": now,
+        "results": {
+            p: {"result": result, "kind": kind.value if kind else "success"}
+            for p, (result, kind) in outcomes.items()
+        },
+    })
+
+    update: Dict[str, Any] = {
+        "results": results,
+        "attempts": history,
+        "attempt_count": attempt,
+        "original_run_at": sched.get("original_run_at") or sched.get("run_at"),
+    }
+
+    transient = [p for p, (_, kind) in outcomes.items() if kind == PublishErrorKind.transient]
+    if transient and attempt < settings.scheduler_retry_max_attempts:
+        # Only the transiently failed platforms are published again
+        update["status"] = ScheduleState.upcoming.value
+        update["run_at"] = now + timedelta(seconds=backoff_delay(attempt))
+        update["retry_platforms"] = transient
+    else:
+        all_published = all(
+            is_success(results.get(p)) for p in dict.fromkeys(sched.get("platforms") or [])
+        )
+        update["status"] = (ScheduleState.published if all_published else ScheduleState.failed).value
+        update["retry_platforms"] = []
+    return update
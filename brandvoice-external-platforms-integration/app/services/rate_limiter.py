@@ -0,0 +1,213 @@
+"""
+app/services/rate_limiter.py
+----------------------------
+
+Token-bucket throttling for outbound publishing calls.
+
+• One bucket per (platform, account) — Page id, IG business account id,
+  Twitter access token, YouTube credential — refilled at the per-platform
+  rate from settings.rate_limits.
+
+• `acquire()` waits (FIFO) until a token is available, so a burst of due
+  schedules for one account queues up instead of tripping platform limits.
+
+• `observe()` reads the quota the platform reports in its response headers
+  (Graph API X-App-Usage / X-Business-Use-Case-Usage / X-Page-Usage,
+  Twitter x-rate-limit-*). When the platform says the quota is exhausted the
+  bucket is paused until it says access is regained.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Pause used when a platform reports 100 % usage without saying for how long
+DEFAULT_QUOTA_PAUSE_SECONDS = 60.0
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.waited_seconds = 0.0
+        self.waiting = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            # The lock keeps waiters in arrival order
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.waited_seconds += waited
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` (platform says quota is exhausted)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+def _account_key(platform: str, account: str) -> str:
+    # Twitter accounts are keyed by access token: never keep/expose it in clear
+    if platform == "twitter":
+        return "token:" + hashlib.sha256(account.encode()).hexdigest()[:12]
+    return str(account)
+
+
+def _graph_usage(headers: Mapping[str, str]) -> Tuple[Optional[float], Optional[float], Dict[str, Any]]:
+    """Highest Graph API usage percentage, seconds until access is regained, and the raw usage."""
+    usage: Dict[str, Any] = {}
+    highest: Optional[float] = None
+    regain_seconds: Optional[float] = None
+
+    def track(values: Dict[str, Any]) -> None:
+        nonlocal highest, regain_seconds
+        for key in ("call_count", "total_time", "total_cputime"):
+            if isinstance(values.get(key), (int, float)):
+                highest = max(highest or 0.0, float(values[key]))
+        minutes = values.get("estimated_time_to_regain_access")
+        if isinstance(minutes, (int, float)) and minutes > 0:
+            regain_seconds = max(regain_seconds or 0.0, minutes * 60.0)
+
+    for header in ("x-app-usage", "x-page-usage", "x-ad-account-usage"):
+        raw = headers.get(header)
+        if not raw:
+            continue
+        try:
+            values = json.loads(raw)
+        except ValueError:
+            continue
+        usage[header] = values
+        track(values)
+
+    raw = headers.get("x-business-use-case-usage")
+    if raw:
+        try:
+            buc = json.loads(raw)
+            usage["x-business-use-case-usage"] = buc
+            for entries in buc.values():
+                for values in entries:
+                    track(values)
+        except (ValueError, AttributeError):
+            pass
+
+    return highest, regain_seconds, usage
+
+
+class RateLimiter:
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._quota: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._throttled: Dict[str, int] = {}
+
+    def _bucket(self, platform: str, account: str) -> TokenBucket:
+        key = (platform, _account_key(platform, account))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            settings = get_settings()
+            limits = settings.rate_limits.get(platform, settings.default_rate_limit)
+            bucket = TokenBucket(limits["per_minute"], limits["burst"])
+            self._buckets[key] = bucket
+        return bucket
+
+    async def acquire(self, platform: str, account: str) -> None:
+        """Wait for a publishing slot for this account on this platform."""
+        waited = await self._bucket(platform, account).acquire()
+        if waited > 1:
+            self._throttled[platform] = self._throttled.get(platform, 0) + 1
+            logger.info("Throttled %s call for %.1fs", platform, waited)
+
+    def observe(self, platform: str, account: str, headers: Mapping[str, str] | None) -> None:
+        """Record the remaining quota reported in a platform response and back off if it is exhausted."""
+        if not headers:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+        key = (platform, _account_key(platform, account))
+        pause: Optional[float] = None
+
+        if platform in ("facebook", "instagram"):
+            highest, regain_seconds, usage = _graph_usage(headers)
+            if not usage:
+                return
+            self._quota[key] = {"usage_percent": highest, "usage": usage, "observed_at": time.time()}
+            if regain_seconds:
+                pause = regain_seconds
+            elif highest is not None and highest >= 100:
+                pause = DEFAULT_QUOTA_PAUSE_SECONDS
+
+        elif platform == "twitter":
+            if "x-rate-limit-remaining" not in headers:
+                return
+            try:
+                limit = int(headers.get("x-rate-limit-limit", 0))
+                remaining = int(headers["x-rate-limit-remaining"])
+                reset = int(headers.get("x-rate-limit-reset", 0))
+            except ValueError:
+                return
+            self._quota[key] = {
+                "limit": limit,
+                "remaining": remaining,
+                "reset_at": reset,
+                "observed_at": time.time(),
+            }
+            if remaining <= 0:
+                pause = max(reset - time.time(), 1.0) if reset else DEFAULT_QUOTA_PAUSE_SECONDS
+
+        if pause:
+            logger.warning("%s quota exhausted for %s; pausing %.0fs", platform, key[1], pause)
+            self._bucket(platform, account).pause(pause)
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        accounts = []
+        for (platform, account), bucket in self._buckets.items():
+            bucket._refill(now)
+            accounts.append({
+                "platform": platform,
+                "account": account,
+                "tokens": round(bucket.tokens, 2),
+                "capacity": bucket.capacity,
+                "per_minute": round(bucket.rate * 60, 2),
+                "waiting": bucket.waiting,
+                "acquired": bucket.acquired,
+                "waited_seconds": round(bucket.waited_seconds, 2),
+                "paused_for_seconds": round(max(0.0, bucket.paused_until - now), 1),
+                "quota": self._quota.get((platform, account)),
+            })
+        return {"throttled_calls": dict(self._throttled), "accounts": accounts}
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,258 @@
+"""
+app/services/schedule_dispatcher.py
+-----------------------------------
+
+Event-driven replacement for polling the `schedules` collection.
+
+• A Firestore snapshot listener on `status == "upcoming"` delivers the
+  upcoming schedules once at start-up and then only the changes.
+
+• Schedules are kept in an in-memory min-heap keyed on `run_at`; the
+  dispatcher sleeps until the earliest one is due (or until the listener
+  reports a change) and hands due schedules to the publish callback.
+
+Idle cost is a single open listener instead of a query every 10 s, and
+publishes fire as soon as `run_at` passes rather than on the next poll.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.firebase import get_firestore_client
+from app.models.enums import ScheduleState
+
+logger = logging.getLogger(__name__)
+
+PublishCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+ReclaimCallback = Callable[[int], Awaitable[List[Dict[str, Any]]]]
+# Called with each batch of due schedules before they are published
+PrefetchCallback = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+def run_at_timestamp(run_at: Any) -> Optional[float]:
+    """POSIX timestamp of a schedule's run_at (Firestore timestamp or legacy ISO string)."""
+    if run_at is None:
+        return None
+    if isinstance(run_at, str):
+        try:
+            run_at = datetime.fromisoformat(run_at.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(run_at, datetime):
+        if run_at.tzinfo is None:
+            run_at = run_at.replace(tzinfo=timezone.utc)
+        return run_at.timestamp()
+    return None
+
+
+class ScheduleDispatcher:
+    """Keeps upcoming schedules in a heap and dispatches each one when it is due."""
+
+    def __init__(
+        self,
+        publish: PublishCallback,
+        *,
+        collection: str = "schedules",
+        max_sleep_seconds: float = 60.0,
+        max_in_flight: int = 20,
+        reclaim: ReclaimCallback | None = None,
+        reclaim_interval_seconds: float = 60.0,
+        prefetch: PrefetchCallback | None = None,
+    ):
+        self._publish = publish
+        self._prefetch = prefetch
+        self._collection = collection
+        self._max_sleep = max_sleep_seconds
+        # Bounded batch: due schedules beyond this stay on the heap for other replicas
+        self._max_in_flight = max_in_flight
+        self._reclaim = reclaim
+        self._reclaim_interval = reclaim_interval_seconds
+
+        self._heap: List[Tuple[float, str]] = []
+        self._schedules: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._watch = None
+        self._runner: asyncio.Task | None = None
+        self._reclaimer: asyncio.Task | None = None
+
+    # ── lifecycle ───────────────────────────────────────────────────────
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        query = (
+            get_firestore_client()
+            .collection(self._collection)
+            .where("status", "==", ScheduleState.upcoming.value)
+        )
+        # Callbacks arrive on a Firestore background thread
+        self._watch = query.on_snapshot(self._on_snapshot)
+        self._runner = asyncio.create_task(self._run(), name="schedule-dispatcher")
+        if self._reclaim is not None:
+            self._reclaimer = asyncio.create_task(self._reclaim_loop(), name="schedule-reclaimer")
+        logger.info("Schedule dispatcher started")
+
+    async def stop(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        for task in (self._runner, self._reclaimer):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._runner = self._reclaimer = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("Schedule dispatcher stopped")
+
+    # ── listener → heap ─────────────────────────────────────────────────
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        updates = []
+        for change in changes:
+            doc = change.document
+            if change.type.name == "REMOVED":
+                updates.append((doc.id, None))
+            else:
+                updates.append((doc.id, {"id": doc.id, **(doc.to_dict() or {})}))
+        if updates and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._apply, updates)
+
+    def _apply(self, updates: List[Tuple[str, Optional[Dict[str, Any]]]]) -> None:
+        for schedule_id, sched in updates:
+            if sched is None:
+                self._schedules.pop(schedule_id, None)
+                continue
+            due_at = run_at_timestamp(sched.get("run_at"))
+            if due_at is None:
+                logger.warning("Schedule %s has no usable run_at; skipping", schedule_id)
+                self._schedules.pop(schedule_id, None)
+                continue
+            self._schedules[schedule_id] = sched
+            # Stale heap entries (old run_at) are skipped when popped
+            heapq.heappush(self._heap, (due_at, schedule_id))
+        self._wakeup.set()
+
+    # ── heap → publish ──────────────────────────────────────────────────
+    def _pop_due(self, now: float) -> List[Dict[str, Any]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if len(self._in_flight) >= self._max_in_flight:
+                break
+            due_at, schedule_id = heapq.heappop(self._heap)
+            sched = self._schedules.get(schedule_id)
+            if sched is None or run_at_timestamp(sched.get("run_at")) != due_at:
+                continue
+            if schedule_id in self._in_flight:
+                continue
+            del self._schedules[schedule_id]
+            # In flight from here on, including the prefetch before it is dispatched
+            self._in_flight.add(schedule_id)
+            due.append(sched)
+        return due
+
+    def _seconds_until_next(self, now: float) -> float:
+        if len(self._in_flight) >= self._max_in_flight:
+            # Woken up again as soon as a publish finishes
+            return self._max_sleep
+        while self._heap:
+            due_at, schedule_id = self._heap[0]
+            sched = self._schedules.get(schedule_id)
+            if sched is not None and run_at_timestamp(sched.get("run_at")) == due_at:
+                return max(0.0, min(due_at - now, self._max_sleep))
+            heapq.heappop(self._heap)
+        return self._max_sleep
+
+    async def _run(self) -> None:
+        while True:
+            now = datetime.now(timezone.utc).timestamp()
+            due = self._pop_due(now)
+            await self._prefetch_batch(due)
+            for sched in due:
+                self._dispatch(sched)
+
+            timeout = self._seconds_until_next(datetime.now(timezone.utc).timestamp())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _prefetch_batch(self, due: List[Dict[str, Any]]) -> None:
+        if not due or self._prefetch is None:
+            return
+        try:
+            await self._prefetch(due)
+        except Exception as exc:
+            # Only an optimisation: each publish still resolves what it needs
+            logger.warning("Prefetch for %d due schedule(s) failed: %s", len(due), exc)
+
+    def _dispatch(self, sched: Dict[str, Any]) -> None:
+        schedule_id = sched["id"]
+        self._in_flight.add(schedule_id)
+
+        async def publish() -> None:
+            try:
+                await self._publish(sched)
+            except Exception as exc:
+                logger.exception("Publishing schedule %s failed: %s", schedule_id, exc)
+            finally:
+                self._in_flight.discard(schedule_id)
+                # Still upcoming (changed while publishing, or publish did not
+                # update its status): put it back on the heap
+                pending = self._schedules.get(schedule_id)
+                due_at = run_at_timestamp(pending.get("run_at")) if pending else None
+                if due_at is not None:
+                    heapq.heappush(self._heap, (due_at, schedule_id))
+                # A slot is free again
+                self._wakeup.set()
+
+        task = asyncio.create_task(publish(), name=f"publish-{schedule_id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ── expired leases ──────────────────────────────────────────────────
+    async def _reclaim_loop(self) -> None:
+        """Pick up schedules whose publishing replica died (they are not `upcoming`, so the listener never sees them)."""
+        while True:
+            await asyncio.sleep(self._reclaim_interval)
+            capacity = self._max_in_flight - len(self._in_flight)
+            if capacity <= 0:
+                continue
+            try:
+                expired = await self._reclaim(capacity)
+            except Exception as exc:
+                logger.warning("Looking for expired schedule leases failed: %s", exc)
+                continue
+            await self._prefetch_batch(expired)
+            for sched in expired:
+                if sched["id"] not in self._in_flight:
+                    logger.info("Reclaiming schedule %s from %s", sched["id"], sched.get("lease_owner"))
+                    self._dispatch(sched)
+
+    # ── introspection ───────────────────────────────────────────────────
+    def stats(self) -> Dict[str, Any]:
+        next_due = self._seconds_until_next(datetime.now(timezone.utc).timestamp()) if self._heap else None
+        return {
+            "upcoming": len(self._schedules),
+            "in_flight": len(self._in_flight),
+            "seconds_until_next": next_due,
+        }
+
+    def in_flight(self) -> Set[str]:
+        """Ids of the schedules taken off the heap and not finished publishing yet."""
+        return set(self._in_flight)
+
+    def upcoming(self) -> List[Dict[str, Any]]:
+        """Snapshot of the upcoming schedules currently tracked, soonest first."""
+        return sorted(
+            self._schedules.values(),
+            key=lambda s: run_at_timestamp(s.get("run_at")) or 0.0,
+        )
@@ -0,0 +1,172 @@
+"""
+app/services/schedule_lease.py
+------------------------------
+
+Claim protocol that lets several scheduler replicas share the `schedules`
+collection without publishing the same schedule twice.
+
+• claim    – transaction: `upcoming` (due) or `publishing` with an expired
+             lease  →  `publishing`, lease_owner = this worker,
+             lease_expires_at = now + lease.
+• renew    – heartbeat while publishing; only the lease owner may renew.
+• finish   – final status/results write; clears the lease fields, only if
+             this worker still owns the lease.
+
+A replica that dies mid-publish simply stops renewing; once its lease
+expires another replica reclaims the schedule.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+
+from app.core.firebase import get_firestore_client
+from app.models.enums import ScheduleState
+
+logger = logging.getLogger(__name__)
+
+SCHEDULES = "schedules"
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return None
+
+
+def _claimable(data: Dict[str, Any], now: datetime) -> bool:
+    status = data.get("status")
+    if status == ScheduleState.upcoming.value:
+        run_at = _as_utc(data.get("run_at"))
+        return run_at is not None and run_at <= now
+    if status == ScheduleState.publishing.value:
+        expires = _as_utc(data.get("lease_expires_at"))
+        return expires is None or expires <= now
+    return False
+
+
+# ── sync transaction bodies (run in a worker thread) ─────────────────────
+def _claim_sync(schedule_id: str, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+    db = get_firestore_client()
+    ref = db.collection(SCHEDULES).document(schedule_id)
+
+    @firestore.transactional
+    def claim(transaction):
+        snap = ref.get(transaction=transaction)
+        if not snap.exists:
+            return None
+        data = snap.to_dict() or {}
+        now = _now()
+        if not _claimable(data, now):
+            return None
+        lease = {
+            "status": ScheduleState.publishing.value,
+            "lease_owner": owner,
+            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+            "claimed_at": now,
+            "modified_at": now,
+        }
+        transaction.update(ref, lease)
+        return {"id": snap.id, **data, **lease, "previous_owner": data.get("lease_owner")}
+
+    return claim(db.transaction())
+
+
+def _renew_sync(schedule_id: str, owner: str, lease_seconds: float) -> bool:
+    db = get_firestore_client()
+    ref = db.collection(SCHEDULES).document(schedule_id)
+
+    @firestore.transactional
+    def renew(transaction):
+        snap = ref.get(transaction=transaction)
+        data = snap.to_dict() or {} if snap.exists else {}
+        if data.get("lease_owner") != owner or data.get("status") != ScheduleState.publishing.value:
+            return False
+        transaction.update(ref, {"lease_expires_at": _now() + timedelta(seconds=lease_seconds)})
+        return True
+
+    return renew(db.transaction())
+
+
+def _finish_sync(schedule_id: str, owner: str, updates: Dict[str, Any]) -> bool:
+    db = get_firestore_client()
+    ref = db.collection(SCHEDULES).document(schedule_id)
+
+    @firestore.transactional
+    def finish(transaction):
+        snap = ref.get(transaction=transaction)
+        data = snap.to_dict() or {} if snap.exists else {}
+        if data.get("lease_owner") != owner:
+            return False
+        transaction.update(ref, {
+            **updates,
+            "lease_owner": firestore.DELETE_FIELD,
+            "lease_expires_at": firestore.DELETE_FIELD,
+            # Staged objects are used up (or stale for a retry at a new run_at)
+            "staged": firestore.DELETE_FIELD,
+            "staged_at": firestore.DELETE_FIELD,
+            "modified_at": _now(),
+        })
+        return True
+
+    return finish(db.transaction())
+
+
+def _expired_leases_sync(limit: int) -> List[Dict[str, Any]]:
+    query = (
+        get_firestore_client()
+        .collection(SCHEDULES)
+        .where("status", "==", ScheduleState.publishing.value)
+        .where("lease_expires_at", "<=", _now())
+        .limit(limit)
+    )
+    return [{"id": doc.id, **doc.to_dict()} for doc in query.stream()]
+
+
+# ── async API ────────────────────────────────────────────────────────────
+async def claim_schedule(schedule_id: str, lease_seconds: float, owner: str = WORKER_ID) -> Optional[Dict[str, Any]]:
+    """Claim a due schedule; returns the claimed document or None if it isn't ours to take."""
+    return await asyncio.to_thread(_claim_sync, schedule_id, owner, lease_seconds)
+
+
+async def renew_lease(schedule_id: str, lease_seconds: float, owner: str = WORKER_ID) -> bool:
+    return await asyncio.to_thread(_renew_sync, schedule_id, owner, lease_seconds)
+
+
+async def finish_schedule(schedule_id: str, updates: Dict[str, Any], owner: str = WORKER_ID) -> bool:
+    """Write the final status/results and release the lease; False if the lease was lost."""
+    return await asyncio.to_thread(_finish_sync, schedule_id, owner, updates)
+
+
+async def find_expired_leases(limit: int) -> List[Dict[str, Any]]:
+    """Schedules stuck in `publishing` whose owner stopped renewing its lease."""
+    return await asyncio.to_thread(_expired_leases_sync, limit)
+
+
+async def keep_lease_alive(schedule_id: str, lease_seconds: float, owner: str = WORKER_ID) -> None:
+    """Heartbeat task: renew the lease every third of its length until cancelled."""
+    while True:
+        await asyncio.sleep(lease_seconds / 3)
+        try:
+            if not await renew_lease(schedule_id, lease_seconds, owner):
+                logger.warning("Lost lease on schedule %s", schedule_id)
+                return
+        except Exception as exc:
+            logger.warning("Lease renewal for schedule %s failed: %s", schedule_id, exc)
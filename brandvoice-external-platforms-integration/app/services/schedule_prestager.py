@@ -0,0 +1,254 @@
+"""
+app/services/schedule_prestager.py
+----------------------------------
+
+Does the slow part of a publish before `run_at`.
+
+• Every `interval` the pre-stager looks at the dispatcher's upcoming
+  schedules and stages those due within the lookahead window: the publish
+  payload and credentials are resolved, media is fetched/uploaded and unpublished
+  platform objects are created (IG containers, FB unpublished media,
+  Twitter media ids). The platform-side ids are also written to the
+  schedule's `staged` field so any replica can use them.
+
+• At `run_at` the publisher takes the staged entry and only makes the final
+  publish call. Anything not staged (or staged by an older version of the
+  schedule, including a refreshed payload) falls back to the full publish
+  path.
+
+• `publish_metrics` records per-platform staging hit rate and publish lag
+  (time between `run_at` and the start of the publish call).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.firebase import get_firestore_client
+from app.services.publish_payload import payload_version
+from app.services.schedule_dispatcher import ScheduleDispatcher, run_at_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_version(sched: Dict[str, Any]) -> Tuple:
+    """What staging depends on; a change means the staged objects are stale."""
+    return (
+        run_at_timestamp(sched.get("run_at")),
+        tuple(sched.get("platforms") or ()),
+        sched.get("product_id"),
+        payload_version(sched),
+    )
+
+
+@dataclass
+class StagedSchedule:
+    version: Tuple
+    # platform → publish payload (app/services/publish_payload.py)
+    payload: Optional[Dict[str, Dict[str, Any]]] = None
+    # platform → credential document
+    credentials: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # platform → staged objects (container_id, media_fbid, media_ids, video_path, …)
+    platforms: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    staged_at: float = field(default_factory=time.time)
+
+
+# stage(sched) builds the StagedSchedule; discard(staged) frees local resources (temp files)
+StageCallback = Callable[[Dict[str, Any]], Awaitable[StagedSchedule]]
+DiscardCallback = Callable[[StagedSchedule], None]
+PrefetchCallback = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class StagedScheduleCache:
+    """Staged schedules of this replica; the publisher pops its entry at run_at."""
+
+    def __init__(self):
+        self._entries: Dict[str, StagedSchedule] = {}
+
+    def put(self, schedule_id: str, staged: StagedSchedule) -> None:
+        self._entries[schedule_id] = staged
+
+    def peek(self, schedule_id: str) -> Optional[StagedSchedule]:
+        return self._entries.get(schedule_id)
+
+    def pop(self, schedule_id: str) -> Optional[StagedSchedule]:
+        return self._entries.pop(schedule_id, None)
+
+    def ids(self):
+        return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PublishMetrics:
+    """Staging hit rate and publish lag per platform."""
+
+    def __init__(self, window: int = 500):
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lag: Dict[str, Deque[float]] = {}
+        self._window = window
+
+    def record(self, platform: str, staged: bool, lag_seconds: Optional[float]) -> None:
+        counter = self._hits if staged else self._misses
+        counter[platform] = counter.get(platform, 0) + 1
+        if lag_seconds is not None:
+            self._lag.setdefault(platform, deque(maxlen=self._window)).append(lag_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        platforms = set(self._hits) | set(self._misses)
+        out = {}
+        for platform in sorted(platforms):
+            hits, misses = self._hits.get(platform, 0), self._misses.get(platform, 0)
+            lag = sorted(self._lag.get(platform, ()))
+            out[platform] = {
+                "staged": hits,
+                "unstaged": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                "lag_p50_seconds": round(statistics.median(lag), 3) if lag else None,
+                "lag_p95_seconds": round(lag[int(len(lag) * 0.95) - 1 if len(lag) > 1 else 0], 3) if lag else None,
+                "lag_max_seconds": round(lag[-1], 3) if lag else None,
+            }
+        return out
+
+
+staged_schedules = StagedScheduleCache()
+publish_metrics = PublishMetrics()
+
+
+def shared_staged(sched: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Staged ids recorded on the schedule document, if they match its current version."""
+    staged = sched.get("staged") or {}
+    if list(staged.get("version") or []) != list(schedule_version(sched)):
+        return {}
+    return staged.get("platforms") or {}
+
+
+def _persist_staged_sync(schedule_id: str, version: Tuple, platforms: Dict[str, Dict[str, Any]]) -> None:
+    # Plain update (no modified_at) so the write is not mistaken for a user edit
+    get_firestore_client().collection("schedules").document(schedule_id).update({
+        "staged": {"version": list(version), "platforms": platforms},
+        "staged_at": datetime.now(timezone.utc),
+    })
+
+
+class SchedulePrestager:
+    """Stages upcoming schedules whose run_at falls within the lookahead window."""
+
+    def __init__(
+        self,
+        dispatcher: ScheduleDispatcher,
+        stage: StageCallback,
+        *,
+        discard: DiscardCallback | None = None,
+        prefetch: PrefetchCallback | None = None,
+        lookahead_seconds: float = 600.0,
+        interval_seconds: float = 30.0,
+        max_concurrent: int = 5,
+    ):
+        self._dispatcher = dispatcher
+        self._stage = stage
+        self._discard = discard
+        self._prefetch = prefetch
+        self._lookahead = lookahead_seconds
+        self._interval = interval_seconds
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._staging: Dict[str, asyncio.Task] = {}
+        self._runner: asyncio.Task | None = None
+        self.failures = 0
+
+    async def start(self) -> None:
+        self._runner = asyncio.create_task(self._run(), name="schedule-prestager")
+        logger.info("Schedule pre-stager started (lookahead %.0fs)", self._lookahead)
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._runner, *self._staging.values()) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._runner = None
+        self._staging.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._tick()
+            except Exception as exc:
+                logger.warning("Pre-staging pass failed: %s", exc)
+            await asyncio.sleep(self._interval)
+
+    async def _tick(self) -> None:
+        now = datetime.now(timezone.utc).timestamp()
+        upcoming = {s["id"]: s for s in self._dispatcher.upcoming()}
+
+        # Drop entries whose schedule went away (deleted, or published by another
+        # replica). Schedules being published here are left to publish_schedule,
+        # which takes their entry.
+        in_flight = self._dispatcher.in_flight()
+        for schedule_id in staged_schedules.ids():
+            if schedule_id not in upcoming and schedule_id not in in_flight:
+                staged = staged_schedules.pop(schedule_id)
+                if staged is not None and self._discard is not None:
+                    self._discard(staged)
+
+        to_stage = []
+        for schedule_id, sched in upcoming.items():
+            due_at = run_at_timestamp(sched.get("run_at"))
+            if due_at is None or due_at - now > self._lookahead or due_at <= now:
+                continue
+            if schedule_id in self._staging:
+                continue
+            current = staged_schedules.peek(schedule_id)
+            if current is not None and current.version == schedule_version(sched):
+                continue
+            to_stage.append(sched)
+
+        if to_stage and self._prefetch is not None:
+            try:
+                await self._prefetch(to_stage)
+            except Exception as exc:
+                logger.warning("Credential prefetch for pre-staging failed: %s", exc)
+        for sched in to_stage:
+            schedule_id = sched["id"]
+            task = asyncio.create_task(self._stage_one(sched), name=f"prestage-{schedule_id}")
+            self._staging[schedule_id] = task
+            task.add_done_callback(lambda _t, sid=schedule_id: self._staging.pop(sid, None))
+
+    async def _stage_one(self, sched: Dict[str, Any]) -> None:
+        async with self._slots:
+            try:
+                staged = await self._stage(sched)
+            except Exception as exc:
+                self.failures += 1
+                logger.warning("Pre-staging schedule %s failed: %s", sched["id"], exc)
+                return
+        previous = staged_schedules.pop(sched["id"])
+        if previous is not None and self._discard is not None:
+            self._discard(previous)
+        staged_schedules.put(sched["id"], staged)
+
+        shared = {
+            platform: {k: v for k, v in info.items() if k != "video_path"}
+            for platform, info in staged.platforms.items()
+        }
+        if any(shared.values()):
+            try:
+                await asyncio.to_thread(_persist_staged_sync, sched["id"], staged.version, shared)
+            except Exception as exc:
+                logger.warning("Could not record staged objects on schedule %s: %s", sched["id"], exc)
+        logger.info("Pre-staged schedule %s: %s", sched["id"], sorted(staged.platforms))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "staged": len(staged_schedules),
+            "staging": len(self._staging),
+            "failures": self.failures,
+            "publishes": publish_metrics.snapshot(),
+        }
@@ -1,18 +1,41 @@
+import asyncio
+import io
+import mimetypes
 import os
-from typing import Optional, List
+import pathlib
+from typing import Optional, List, Tuple
+import httpx
 import tweepy
 from app.core.config import get_settings
+from app.core.http import get_http_client
+from app.services.rate_limiter import rate_limiter
 
 settings = get_settings()
 
+
+class RateLimitedClient(tweepy.Client):
+    """tweepy.Client that keeps the headers of the last API response (x-rate-limit-*)."""
+
+    last_headers: dict = {}
+
+    def request(self, *args, **kwargs):
+        try:
+            response = super().request(*args, **kwargs)
+        except tweepy.TooManyRequests as e:
+            self.last_headers = e.response.headers
+            raise
+        self.last_headers = response.headers
+        return response
+
+
 def get_client_for_user(
     user_token: str,
     user_token_secret: str
-) -> tweepy.Client:
+) -> RateLimitedClient:
     """
     Instantiate a Tweepy v2 Client for a given user.
     """
-    return tweepy.Client(
+    return RateLimitedClient(
         bearer_token=settings.twitter_bearer_token,
         consumer_key=settings.twitter_api_key,
         consumer_secret=settings.twitter_api_secret,
@@ -20,38 +43,111 @@ def get_client_for_user(
         access_token_secret=user_token_secret,
     )
 
+# A tweet carries at most four images (or one video / GIF)
+MAX_TWEET_IMAGES = 4
+
+# (filename, content) — the filename only tells tweepy the media type
+MediaItem = Tuple[str, bytes]
+
+
+def _media_category(filename: str) -> Optional[str]:
+    mime = mimetypes.guess_type(filename)[0] or ""
+    if mime.startswith("video/"):
+        return "tweet_video"
+    if mime == "image/gif":
+        return "tweet_gif"
+    return None
+
+
+def _upload_media_sync(access_token: str, access_token_secret: str, item: MediaItem) -> int:
+    """v1.1 media upload from memory; videos/GIFs go through the chunked INIT/APPEND/FINALIZE flow."""
+    filename, content = item
+    # One API (and requests session) per upload so concurrent uploads share no state
+    twitter_api = tweepy.API(
+        tweepy.OAuth1UserHandler(
+            settings.twitter_api_key,
+            settings.twitter_api_secret,
+            access_token,
+            access_token_secret
+        )
+    )
+    category = _media_category(filename)
+    if category:
+        res = twitter_api.media_upload(filename, file=io.BytesIO(content),
+                                       chunked=True, media_category=category)
+    else:
+        res = twitter_api.media_upload(filename, file=io.BytesIO(content))
+    return res.media_id
+
+
+async def fetch_media(url: str) -> MediaItem:
+    """
+    Download a media URL into memory for upload.
+    Refuses anything over `twitter_media_max_bytes`, by content-length up front
+    and by the bytes actually read for servers that do not send one.
+    """
+    limit = settings.twitter_media_max_bytes
+    async with get_http_client("media").stream("GET", url) as resp:
+        resp.raise_for_status()
+        declared = int(resp.headers.get("content-length") or 0)
+        if declared > limit:
+            raise ValueError(f"Media too large for a tweet: {url} is {declared} bytes (limit {limit})")
+        content = bytearray()
+        async for chunk in resp.aiter_bytes(settings.media_download_chunk_size):
+            content += chunk
+            if len(content) > limit:
+                raise ValueError(f"Media too large for a tweet: {url} exceeds {limit} bytes")
+    filename = pathlib.PurePosixPath(httpx.URL(url).path).name or "media"
+    return filename, bytes(content)
+
+
+async def upload_media(access_token: str, access_token_secret: str, media: List[MediaItem]) -> List[int]:
+    """Upload media concurrently (each in a worker thread); ids come back in input order."""
+    if any(_media_category(name) for name, _ in media):
+        # Videos and GIFs cannot be combined with other media
+        media = media[:1]
+    else:
+        media = media[:MAX_TWEET_IMAGES]
+    return list(await asyncio.gather(*(
+        asyncio.to_thread(_upload_media_sync, access_token, access_token_secret, item)
+        for item in media
+    )))
+
+
 async def post_tweet_for_user(
     access_token: str,
     access_token_secret: str,
     text: str,
-    media_paths: Optional[List[str]] = None
+    media_paths: Optional[List[str]] = None,
+    media: Optional[List[MediaItem]] = None,
+    media_ids: Optional[List[int]] = None,
 ) -> str:
     """
     Posts a Tweet (and optional media) via Twitter API v2.
+    Media is given in memory (`media`) or, for older callers, as file paths;
+    `media_ids` reuses media uploaded beforehand with `upload_media`.
+    Tweepy is synchronous, so every call runs in a worker thread.
     Returns the created Tweet ID.
     """
     client = get_client_for_user(access_token, access_token_secret)
 
-    media_ids = []
-    if media_paths:
-        # Media uploads still use v1.1 under the hood
-        twitter_api = tweepy.API(
-            tweepy.OAuth1UserHandler(
-                os.getenv("TWITTER_API_KEY"),
-                os.getenv("TWITTER_API_SECRET"),
-                access_token,
-                access_token_secret
-            )
-        )
-        for path in media_paths:
-            res = twitter_api.media_upload(path)
-            media_ids.append(res.media_id)
+    media = list(media or [])
+    for path in media_paths or []:
+        media.append((os.path.basename(path), await asyncio.to_thread(pathlib.Path(path).read_bytes)))
+
+    # Media uploads still use v1.1 under the hood
+    if media and not media_ids:
+        media_ids = await upload_media(access_token, access_token_secret, media)
     
     # Create the tweet
-    if media_ids:
-        resp = client.create_tweet(text=text, media_ids=media_ids)
-    else:
-        resp = client.create_tweet(text=text)
+    await rate_limiter.acquire("twitter", access_token)
+    try:
+        if media_ids:
+            resp = await asyncio.to_thread(client.create_tweet, text=text, media_ids=media_ids)
+        else:
+            resp = await asyncio.to_thread(client.create_tweet, text=text)
+    finally:
+        rate_limiter.observe("twitter", access_token, client.last_headers)
     
     # client.create_tweet returns a Response with .data.id
     tweet_data = getattr(resp, "data", None)
@@ -1,62 +1,189 @@
+import asyncio
 import httpx, json, pathlib, mimetypes, os
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+import google_auth_httplib2
+import httplib2
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build           # pip install google-api-python-client
 from googleapiclient.http import MediaFileUpload
 from httpx import Timeout
 from app.core.config import get_settings
+from app.models.firestore_db import FirestoreSession
+from app.services.rate_limiter import rate_limiter
 
 settings = get_settings()
 
-def creds_from_tokens(token, refresh, client_id, client_secret):
+# Refresh this long before the access token actually expires
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def _parse_expiry(value: Any) -> Optional[datetime]:
+    """`expires_at` as the naive UTC datetime google-auth expects."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    return None
+
+
+def creds_from_tokens(token, refresh, client_id, client_secret, expiry=None):
     return Credentials(token,
                     refresh_token=refresh,
                     token_uri="https://oauth2.googleapis.com/token",
                     client_id=client_id,
                     client_secret=client_secret,
+                    expiry=expiry,
                     scopes=["https://www.googleapis.com/auth/youtube.upload"])
 
-# async def upload_video_for_user(user, file_path: str, title: str, desc: str):
-#     creds = creds_from_tokens(user.youtube_access_token, user.youtube_refresh_token,
-#                             settings.youtube_client_id, settings.youtube_client_secret)
-
-#     youtube = build("youtube", "v3", credentials=creds)
-
-#     media = MediaFileUpload(file_path,
-#                             chunksize=-1,
-#                             resumable=True,
-#                             mimetype=mimetypes.guess_type(file_path)[0])
-
-#     request = youtube.videos().insert(
-#         part="snippet,status",
-#         body={
-#             "snippet": {"title": title, "description": desc},
-#             "status": {"privacyStatus": "public"},
-#         },
-#         media_body=media,
-#     )
-
-#     # resumable loop
-#     while True:
-#         status, response = request.next_chunk()
-#         if response and "id" in response:
-#             return response["id"]
-
-async def upload_video_for_user(cred, file_path: str, title: str, desc: str):
-    creds = creds_from_tokens(cred.get("access_token"), cred.get("refresh_token"),
-                        settings.youtube_client_id, settings.youtube_client_secret)
-    print(f"***Using credentials: {creds}\n")
-    # creds = cred.get("access_token",""
-    # print(f"Using access token: {creds}")
-    youtube = build("youtube", "v3", credentials=creds)
 
+# ── per-credential client cache ──────────────────────────────────────────
+@dataclass
+class _YouTubeClient:
+    credentials: Credentials
+    service: Any
+    refresh_key: str
+    # Serializes token refreshes (worker threads)
+    lock: threading.Lock
+    # Serializes writes of the refreshed token (event loop)
+    persist_lock: asyncio.Lock
+
+
+_clients: "OrderedDict[str, _YouTubeClient]" = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def _refresh_key(cred: Dict[str, Any]) -> str:
+    # A reconnect stores a new refresh token: the cached client is then stale
+    return hashlib.sha256((cred.get("refresh_token") or "").encode()).hexdigest()
+
+
+def _get_client(cred: Dict[str, Any]) -> _YouTubeClient:
+    """Cached Credentials + service for a youtube_credentials document."""
+    cache_key = cred.get("id") or cred.get("user_id")
+    refresh_key = _refresh_key(cred)
+    with _clients_lock:
+        client = _clients.get(cache_key)
+        if client is not None and client.refresh_key == refresh_key:
+            _clients.move_to_end(cache_key)
+            return client
+
+        creds = creds_from_tokens(cred.get("access_token"), cred.get("refresh_token"),
+                                  settings.youtube_client_id, settings.youtube_client_secret,
+                                  expiry=_parse_expiry(cred.get("expires_at")))
+        # Static discovery document shipped with the client library: no network fetch
+        service = build("youtube", "v3", credentials=creds,
+                        static_discovery=True, cache_discovery=False)
+        client = _YouTubeClient(creds, service, refresh_key, threading.Lock(), asyncio.Lock())
+        _clients[cache_key] = client
+        while len(_clients) > settings.youtube_client_cache_size:
+            _clients.popitem(last=False)
+        return client
+
+
+def _ensure_fresh_token(client: _YouTubeClient) -> bool:
+    """Refresh the access token if it is missing or about to expire; True if refreshed."""
+    with client.lock:
+        creds = client.credentials
+        expiry = creds.expiry
+        if creds.token and expiry and expiry - TOKEN_REFRESH_MARGIN > datetime.utcnow():
+            return False
+        creds.refresh(Request())
+        return True
+
+
+class _SerializedRefreshCredentials:
+    """
+    What one upload's AuthorizedHttp sees of the cached Credentials: the
+    refresh-if-expired in before_request and the refresh after a 401 both run
+    under the client's lock, and a 401 for a token another upload has already
+    replaced does not refresh again.
+    """
+
+    def __init__(self, client: _YouTubeClient):
+        self._client = client
+        self._sent_token: Optional[str] = None
+
+    def before_request(self, request, method, url, headers) -> None:
+        with self._client.lock:
+            self._client.credentials.before_request(request, method, url, headers)
+            self._sent_token = self._client.credentials.token
+
+    def refresh(self, request) -> None:
+        with self._client.lock:
+            creds = self._client.credentials
+            if creds.token == self._sent_token:
+                creds.refresh(request)
+
+
+async def _persist_token(cred: Dict[str, Any], client: _YouTubeClient) -> None:
+    """Write a refreshed access token back so other workers and restarts reuse it."""
+    if not cred.get("id"):
+        return
+    # One write at a time, each of the latest token: an older token never lands last
+    async with client.persist_lock:
+        creds = client.credentials
+        token, expiry = creds.token, creds.expiry
+        if not token or token == cred.get("access_token"):
+            return
+        update = {"access_token": token, "updated_at": datetime.utcnow().isoformat()}
+        if expiry:
+            update["expires_at"] = expiry.isoformat()
+        await FirestoreSession().update("youtube_credentials", cred["id"], update)
+        cred.update(update)
+
+
+def _log_progress(file_path: str, progress: float) -> None:
+    print(f"YouTube upload {pathlib.Path(file_path).name}: {progress:.0%}")
+
+
+def _run_resumable_upload(request, http, file_path: str, on_progress: Callable[[float], None]) -> str:
+    """Blocking chunk loop; runs in a worker thread so the event loop keeps serving."""
+    response = None
+    while response is None:
+        status, response = request.next_chunk(http=http)
+        if status is not None:
+            on_progress(status.progress())
+    if "id" not in response:
+        raise RuntimeError(f"YouTube upload returned no video id: {response}")
+    on_progress(1.0)
+    return response["id"]
+
+
+async def upload_video_for_user(
+    cred,
+    file_path: str,
+    title: str,
+    desc: str,
+    on_progress: Optional[Callable[[float], None]] = None,
+):
+    file_path = str(file_path)
+    client = await asyncio.to_thread(_get_client, cred)
+    if await asyncio.to_thread(_ensure_fresh_token, client):
+        await _persist_token(cred, client)
+
+    # Bounded chunks: the client only ever holds one chunk of the file in memory
     media = MediaFileUpload(file_path,
-                            chunksize=-1,
+                            chunksize=settings.youtube_upload_chunk_size,
                             resumable=True,
                             mimetype=mimetypes.guess_type(file_path)[0])
     
     print(f"Uploading video: {file_path} with title: {title}")
 
-    request = youtube.videos().insert(
+    # YouTube reports quota in units, not headers: the bucket only spaces uploads out
+    await rate_limiter.acquire("youtube", cred.get("user_id") or cred.get("id") or "default")
+
+    request = client.service.videos().insert(
         part="snippet,status",
         body={
             "snippet": {"title": title, "description": desc},
@@ -64,9 +191,20 @@ async def upload_video_for_user(cred, file_path: str, title: str, desc: str):
         },
         media_body=media,
     )
+    # httplib2 connections are not thread-safe: one per upload, sharing the cached
+    # credentials with refreshes serialized across uploads
+    http = google_auth_httplib2.AuthorizedHttp(
+        _SerializedRefreshCredentials(client), http=httplib2.Http()
+    )
 
-    # resumable loop
-    while True:
-        status, response = request.next_chunk()
-        if response and "id" in response:
-            return response["id"]
+    try:
+        return await asyncio.to_thread(
+            _run_resumable_upload,
+            request,
+            http,
+            file_path,
+            on_progress or (lambda progress: _log_progress(file_path, progress)),
+        )
+    finally:
+        # The transport refreshes on a 401 mid-upload; keep that token too
+        await _persist_token(cred, client)
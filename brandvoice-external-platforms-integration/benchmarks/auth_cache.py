@@ -0,0 +1,136 @@
+"""
+benchmarks/auth_cache.py
+------------------------
+
+Per-request cost of `get_current_user`'s two steps, cached vs uncached.
+
+• verify_token: a real RS256 Firebase-style ID token checked against a locally
+  generated signing cert. uncached = the token cache is emptied before each
+  call, so every call decodes and verifies the signature; cached = the claims
+  are served from the token cache. Certs are preloaded in both (no fetch).
+
+• get_user: uncached = the `users` lookup by firebase uid, stubbed as a sleep
+  standing in for the Firestore round trip; cached = `auth_cache.get_user`.
+
+No credentials or network needed. Run from the service root:
+
+    python -m benchmarks.auth_cache [--number 2000] [--firestore-seconds 0.02]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import os
+import time
+
+os.environ.setdefault("FIREBASE_WEB_API_KEY", "benchmark")
+
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+from google.auth import crypt, jwt  # noqa: E402
+
+from app.core import auth_cache as auth_cache_module  # noqa: E402
+from app.core.auth_cache import AuthCache  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+PROJECT_ID = "brandvoice-bench"
+KID = "bench-key"
+
+
+class _App:
+    project_id = PROJECT_ID
+
+
+def signing_material() -> tuple[str, str]:
+    """(private key PEM, self-signed cert PEM)"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return key_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def id_token(key_pem: str) -> str:
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "firebase-uid-1",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    signer = crypt.RSASigner.from_string(key_pem, key_id=KID)
+    return jwt.encode(signer, payload).decode()
+
+
+async def per_call_us(fn, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        await fn()
+    return (time.perf_counter() - started) / number * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="Calls per measurement")
+    parser.add_argument("--firestore-seconds", type=float, default=0.02, help="Simulated users lookup round trip")
+    args = parser.parse_args()
+
+    key_pem, cert_pem = signing_material()
+    token = id_token(key_pem)
+    auth_cache_module.get_firebase_app = lambda: _App()
+
+    cache = AuthCache(token_cache_size=1000, user_cache_size=1000, user_ttl_seconds=300)
+    cache.certs._certs = {KID: cert_pem}
+    cache.certs._expires_at = time.monotonic() + 3600
+    now = datetime.datetime.now(datetime.timezone.utc)
+    user = User(id="u1", email="bench@example.com", firebase_uid="firebase-uid-1",
+                created_at=now, updated_at=now)
+
+    async def verify_uncached():
+        cache._tokens.clear()
+        await cache.verify_token(token)
+
+    async def verify_cached():
+        await cache.verify_token(token)
+
+    async def user_uncached():
+        # get_user_by_firebase_uid: one Firestore query
+        await asyncio.sleep(args.firestore_seconds)
+        return user
+
+    async def user_cached():
+        return cache.get_user("firebase-uid-1")
+
+    assert (await cache.verify_token(token))["uid"] == "firebase-uid-1"
+    cache.put_user("firebase-uid-1", user)
+    # The sleep-bound lookup needs far fewer iterations for a stable mean
+    user_number = max(1, min(args.number, int(2 / max(args.firestore_seconds, 1e-3))))
+
+    rows = [
+        ("verify_token", await per_call_us(verify_uncached, args.number), await per_call_us(verify_cached, args.number)),
+        ("get_user", await per_call_us(user_uncached, user_number), await per_call_us(user_cached, args.number)),
+    ]
+    print(f"mean per call over {args.number} calls ({user_number} for the "
+          f"{args.firestore_seconds}s uncached users lookup)")
+    print(f"{'step':<14}{'uncached us':>13}{'cached us':>11}{'speedup':>10}")
+    for step, uncached, cached in rows:
+        print(f"{step:<14}{uncached:>13.1f}{cached:>11.1f}{uncached / cached:>9.0f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
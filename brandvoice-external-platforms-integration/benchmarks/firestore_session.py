@@ -0,0 +1,122 @@
+"""
+benchmarks/firestore_session.py
+-------------------------------
+
+FirestoreSession throughput: the old sync client vs the AsyncClient it runs on now.
+
+• async: the real `FirestoreSession.get` / `.update` over a stand-in AsyncClient
+  whose document calls `await asyncio.sleep(rtt)`.
+• sync: the same methods as they were before the switch — the sync client
+  called straight from the coroutine — over a stand-in client that
+  `time.sleep(rtt)`s, i.e. blocks the event loop for the round trip.
+
+Each request does a get followed by an update (the shape of the schedule
+endpoints); requests are issued `--concurrency` at a time. No emulator,
+credentials or network needed. Run from the service root:
+
+    python -m benchmarks.firestore_session [--requests 200] [--rtt 0.01] [--concurrency 1 10 50]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("FIREBASE_WEB_API_KEY", "benchmark")
+
+from app.models.firestore_db import FirestoreSession  # noqa: E402
+
+
+class _Snapshot:
+    def __init__(self, doc_id: str, data: dict):
+        self.id = doc_id
+        self.exists = True
+        self._data = data
+
+    def to_dict(self) -> dict:
+        return dict(self._data)
+
+
+class _SyncDocument:
+    def __init__(self, rtt: float, doc_id: str):
+        self.rtt, self.id = rtt, doc_id
+
+    def get(self):
+        time.sleep(self.rtt)
+        return _Snapshot(self.id, {"status": "upcoming"})
+
+    def update(self, data):
+        time.sleep(self.rtt)
+
+
+class _AsyncDocument(_SyncDocument):
+    async def get(self):
+        await asyncio.sleep(self.rtt)
+        return _Snapshot(self.id, {"status": "upcoming"})
+
+    async def update(self, data):
+        await asyncio.sleep(self.rtt)
+
+
+class _Client:
+    def __init__(self, document_cls, rtt: float):
+        self.document_cls, self.rtt = document_cls, rtt
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        return self.document_cls(self.rtt, doc_id)
+
+
+class SyncClientSession(FirestoreSession):
+    """get / update as they were on the sync client (blocking calls inside the coroutine)."""
+
+    async def get(self, collection: str, doc_id: str) -> dict:
+        doc = self.db.collection(collection).document(doc_id).get()
+        return {"id": doc.id, **doc.to_dict()}
+
+    async def update(self, collection: str, doc_id: str, data: dict) -> None:
+        self.db.collection(collection).document(doc_id).update(self._serialize_datetime(data))
+
+
+def session(cls, client) -> FirestoreSession:
+    # Skip __init__: it would look up the real firebase-admin client
+    db = cls.__new__(cls)
+    db.db = client
+    return db
+
+
+async def run(db: FirestoreSession, requests: int, concurrency: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with slots:
+            sched = await db.get("schedules", f"s{index}")
+            await db.update("schedules", sched["id"], {"status": "publishing"})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="get+update requests per run")
+    parser.add_argument("--rtt", type=float, default=0.01, help="Simulated Firestore round trip")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50], help="Requests in flight")
+    args = parser.parse_args()
+
+    sync_db = session(SyncClientSession, _Client(_SyncDocument, args.rtt))
+    async_db = session(FirestoreSession, _Client(_AsyncDocument, args.rtt))
+    print(f"{args.requests} requests (get + update), {args.rtt}s per Firestore call")
+    print(f"{'in flight':>10}{'sync req/s':>12}{'async req/s':>13}{'speedup':>9}")
+    for concurrency in args.concurrency:
+        sync_rps = asyncio.run(run(sync_db, args.requests, concurrency))
+        async_rps = asyncio.run(run(async_db, args.requests, concurrency))
+        print(f"{concurrency:>10}{sync_rps:>12.1f}{async_rps:>13.1f}{async_rps / sync_rps:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
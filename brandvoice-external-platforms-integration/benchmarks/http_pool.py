@@ -0,0 +1,202 @@
+"""
+benchmarks/http_pool.py
+-----------------------
+
+Request latency: the pooled HTTP/2 client (`get_http_client`) vs a new
+`httpx.AsyncClient` per call, as the services did before app/core/http.py.
+
+Both talk to a local TLS stub (self-signed cert, ALPN h2 + http/1.1) that
+waits `--rtt` before answering each request, plus 2 × rtt on the first
+answer of each new connection (the TCP + TLS round trips), so connection
+reuse shows up as it would against graph.facebook.com. The cert is trusted
+through SSL_CERT_FILE, so the pooled client is the real one from
+`get_http_client`.
+
+No network needed. Run from the service root:
+
+    python -m benchmarks.http_pool [--requests 200] [--rtt 0.005] [--concurrency 1 20]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import os
+import ssl
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("FIREBASE_WEB_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+from h2.config import H2Configuration  # noqa: E402
+from h2.connection import H2Connection  # noqa: E402
+from h2.events import ConnectionTerminated, RequestReceived  # noqa: E402
+
+from app.core.http import close_http_clients, get_http_client  # noqa: E402
+
+BODY = b'{"id": "1789", "success": true}'
+
+
+def self_signed() -> tuple[bytes, bytes]:
+    """(cert PEM, key PEM) for localhost / 127.0.0.1"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([
+            x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1")),
+        ]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return cert.public_bytes(serialization.Encoding.PEM), key_pem
+
+
+class TLSStub:
+    """Answers every request with BODY after `rtt`; speaks h2 or HTTP/1.1 by ALPN."""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        # The handshake itself is local; charge its round trips to the connection
+        handshake = asyncio.create_task(asyncio.sleep(2 * self.rtt))
+        try:
+            if writer.get_extra_info("ssl_object").selected_alpn_protocol() == "h2":
+                await self._serve_h2(reader, writer, handshake)
+            else:
+                await self._serve_http11(reader, writer, handshake)
+        except (ConnectionError, ssl.SSLError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_h2(self, reader, writer, handshake) -> None:
+        conn = H2Connection(config=H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+
+        async def respond(stream_id: int) -> None:
+            await handshake
+            await asyncio.sleep(self.rtt)
+            conn.send_headers(stream_id, [
+                (":status", "200"), ("content-type", "application/json"), ("content-length", str(len(BODY))),
+            ])
+            conn.send_data(stream_id, BODY, end_stream=True)
+            writer.write(conn.data_to_send())
+
+        responses = set()
+        while data := await reader.read(65535):
+            for event in conn.receive_data(data):
+                if isinstance(event, RequestReceived):
+                    task = asyncio.create_task(respond(event.stream_id))
+                    responses.add(task)
+                    task.add_done_callback(responses.discard)
+                elif isinstance(event, ConnectionTerminated):
+                    return
+            writer.write(conn.data_to_send())
+
+    async def _serve_http11(self, reader, writer, handshake) -> None:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            await handshake
+            await asyncio.sleep(self.rtt)
+            writer.write(b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+                         b"content-length: %d\r\n\r\n%s" % (len(BODY), BODY))
+            await writer.drain()
+            if b"connection: close" in head.lower():
+                return
+
+
+async def measure(get, url: str, requests: int, concurrency: int) -> dict:
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> str:
+        async with slots:
+            started = time.perf_counter()
+            resp = await get(url)
+            latencies.append(time.perf_counter() - started)
+            resp.raise_for_status()
+            return resp.http_version
+
+    started = time.perf_counter()
+    versions = await asyncio.gather(*(one() for _ in range(requests)))
+    ordered = sorted(latencies)
+    return {
+        "total_s": time.perf_counter() - started,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "version": versions[0],
+    }
+
+
+async def per_call_get(url: str) -> httpx.Response:
+    # What the services did before: a fresh client (and connection) per request
+    async with httpx.AsyncClient() as client:
+        return await client.get(url)
+
+
+async def pooled_get(url: str) -> httpx.Response:
+    return await get_http_client("graph").get(url)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per run")
+    parser.add_argument("--rtt", type=float, default=0.005, help="Simulated network round trip")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 20], help="Requests in flight")
+    args = parser.parse_args()
+
+    cert_pem, key_pem = self_signed()
+    tmp = tempfile.TemporaryDirectory()
+    cert_file, key_file = os.path.join(tmp.name, "cert.pem"), os.path.join(tmp.name, "key.pem")
+    with open(cert_file, "wb") as fh:
+        fh.write(cert_pem)
+    with open(key_file, "wb") as fh:
+        fh.write(key_pem)
+    # httpx trusts SSL_CERT_FILE, so neither client needs a custom verify=
+    os.environ["SSL_CERT_FILE"] = cert_file
+
+    server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_ctx.load_cert_chain(cert_file, key_file)
+    server_ctx.set_alpn_protocols(["h2", "http/1.1"])
+    stub = TLSStub(args.rtt)
+    server = await asyncio.start_server(stub.handle, "127.0.0.1", 0, ssl=server_ctx)
+    url = f"https://localhost:{server.sockets[0].getsockname()[1]}/v23.0/me"
+
+    print(f"{args.requests} GETs, {args.rtt}s simulated RTT")
+    print(f"{'client':<10}{'in flight':>10}{'proto':>10}{'p50 ms':>9}{'p99 ms':>9}{'total s':>9}{'conns':>7}")
+    for concurrency in args.concurrency:
+        for label, get in (("per-call", per_call_get), ("pooled", pooled_get)):
+            stub.connections = 0
+            result = await measure(get, url, args.requests, concurrency)
+            print(f"{label:<10}{concurrency:>10}{result['version']:>10}{result['p50_ms']:>9.1f}"
+                  f"{result['p99_ms']:>9.1f}{result['total_s']:>9.2f}{stub.connections:>7}")
+        await close_http_clients()
+
+    server.close()
+    await server.wait_closed()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+benchmarks/scheduler_batch.py
+-----------------------------
+
+Completion time of a batch of due schedules: serial vs concurrent publishing.
+
+• Runs the real `publish_schedule` (claim → payload → per-platform publish →
+  plan_outcome → finish). The Firestore lease calls and the payload lookup
+  are replaced with in-memory versions, and `publish_platform` is a sleep
+  standing in for one platform API call.
+
+• serial: one schedule and one platform at a time, which is how the worker
+  published before. concurrent: the configured schedule / per-platform limits.
+
+No credentials or network needed. Run from the service root:
+
+    python -m benchmarks.scheduler_batch [--sizes 10 50 200] [--publish-seconds 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("FIREBASE_WEB_API_KEY", "benchmark")
+
+from app import scheduler_worker  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+
+PLATFORMS = ["facebook", "x"]
+
+
+def install_stubs(publish_seconds: float) -> None:
+    async def claim_schedule(schedule_id, lease_seconds):
+        return {"id": schedule_id, "user_id": "u", "platforms": PLATFORMS, "status": "publishing"}
+
+    async def keep_lease_alive(schedule_id, lease_seconds):
+        await asyncio.Event().wait()
+
+    async def finish_schedule(schedule_id, updates):
+        return True
+
+    async def payload_for_schedule(db, sched, platforms):
+        return {scheduler_worker.normalize_platform(p): {"message": "hello"} for p in platforms}
+
+    async def publish_platform(db, sched, payload, raw_platform, staged=None, cred=None):
+        await asyncio.sleep(publish_seconds)
+        return "success"
+
+    scheduler_worker.claim_schedule = claim_schedule
+    scheduler_worker.keep_lease_alive = keep_lease_alive
+    scheduler_worker.finish_schedule = finish_schedule
+    scheduler_worker.payload_for_schedule = payload_for_schedule
+    scheduler_worker.publish_platform = publish_platform
+
+
+async def run_batch(size: int, serial: bool) -> float:
+    settings = get_settings()
+    # Fresh limits for this loop: 1 everywhere for the serial run, the configured ones otherwise
+    scheduler_worker._schedule_slots = asyncio.Semaphore(1 if serial else settings.scheduler_max_concurrent_schedules)
+    scheduler_worker._platform_slots = {
+        p: asyncio.Semaphore(1 if serial else settings.scheduler_platform_concurrency.get(
+            p, settings.scheduler_default_platform_concurrency))
+        for p in ("facebook", "twitter")
+    }
+    due = [{"id": f"s{i}"} for i in range(size)]
+    started = time.perf_counter()
+    await asyncio.gather(*(scheduler_worker.publish_schedule(sched, db=object()) for sched in due))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="Schedules per batch")
+    parser.add_argument("--publish-seconds", type=float, default=0.05, help="Simulated time of one platform publish")
+    args = parser.parse_args()
+
+    install_stubs(args.publish_seconds)
+    settings = get_settings()
+    print(f"{len(PLATFORMS)} platforms per schedule, {args.publish_seconds}s per publish, "
+          f"{settings.scheduler_max_concurrent_schedules} schedules at once")
+    print(f"{'schedules':>10}{'serial s':>11}{'concurrent s':>14}{'speedup':>9}")
+    for size in args.sizes:
+        serial_s = asyncio.run(run_batch(size, serial=True))
+        concurrent_s = asyncio.run(run_batch(size, serial=False))
+        print(f"{size:>10}{serial_s:>11.2f}{concurrent_s:>14.2f}{serial_s / concurrent_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmarks/youtube_client.py
+----------------------------
+
+Per-upload client setup cost: cold vs warm `_get_client` + `_ensure_fresh_token`.
+
+• cold: what every upload paid before the client cache — a new Credentials,
+  a `build("youtube", "v3")` and a token refresh each time.
+
+• warm: the cached client with a still-valid token; the first call builds
+  and refreshes, the rest reuse both.
+
+`build` and `Credentials.refresh` are replaced with sleeps (discovery-document
+parsing and the OAuth round trip), so no credentials or network are needed.
+Run from the service root:
+
+    python -m benchmarks.youtube_client [--calls 50] [--build-seconds 0.08] [--refresh-seconds 0.15]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("FIREBASE_WEB_API_KEY", "benchmark")
+
+from app.services import youtube_service  # noqa: E402
+from app.services.youtube_service import _clients, _ensure_fresh_token, _get_client  # noqa: E402
+
+calls = {"build": 0, "refresh": 0}
+
+
+def install_stubs(build_seconds: float, refresh_seconds: float) -> None:
+    def build(*args, **kwargs):
+        calls["build"] += 1
+        time.sleep(build_seconds)
+        return object()
+
+    def refresh(self, request):
+        calls["refresh"] += 1
+        time.sleep(refresh_seconds)
+        self.token = "fresh-token"
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+    youtube_service.build = build
+    youtube_service.Credentials.refresh = refresh
+
+
+def setup_once(cred: dict, cold: bool) -> None:
+    if cold:
+        _clients.clear()
+    client = _get_client(cred)
+    _ensure_fresh_token(client)
+
+
+def run(mode: str, n: int) -> dict:
+    _clients.clear()
+    calls.update(build=0, refresh=0)
+    # Stored token already expired, as it is for most scheduled uploads
+    cred = {"id": "yt1", "user_id": "u1", "access_token": "stale", "refresh_token": "r",
+            "expires_at": (datetime.utcnow() - timedelta(minutes=1)).isoformat()}
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        setup_once(cred, cold=(mode == "cold"))
+        samples.append(time.perf_counter() - started)
+    return {"mode": mode, "mean_ms": sum(samples) / n * 1000, "total_s": sum(samples), **calls}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50, help="Uploads set up for one credential")
+    parser.add_argument("--build-seconds", type=float, default=0.08, help="Simulated cost of build()")
+    parser.add_argument("--refresh-seconds", type=float, default=0.15, help="Simulated OAuth refresh round trip")
+    args = parser.parse_args()
+
+    install_stubs(args.build_seconds, args.refresh_seconds)
+    print(f"{args.calls} setups, build {args.build_seconds}s, refresh {args.refresh_seconds}s")
+    print(f"{'mode':<6}{'mean ms':>10}{'total s':>10}{'builds':>8}{'refreshes':>11}")
+    for mode in ("cold", "warm"):
+        r = run(mode, args.calls)
+        print(f"{r['mode']:<6}{r['mean_ms']:>10.2f}{r['total_s']:>10.2f}{r['build']:>8}{r['refresh']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# app.models.firestore_db refuses to import without it; tests never call the REST auth API
+os.environ.setdefault("FIREBASE_WEB_API_KEY", "test-web-api-key")
@@ -0,0 +1,48 @@
+import asyncio
+
+from app.core import auth_cache
+from app.core.auth_cache import FirebaseCertCache
+
+
+def _counting_fetch(cache, certs, delay=0.0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        cache._attempted_at = auth_cache.time.monotonic()
+        await asyncio.sleep(delay)
+        cache._certs = dict(certs)
+        cache._expires_at = auth_cache.time.monotonic() + 3600
+
+    cache._fetch = fetch
+    return calls
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = FirebaseCertCache()
+    calls = _counting_fetch(cache, {"k1": "cert"}, delay=0.01)
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get() for _ in range(20)))
+        assert all(r == {"k1": "cert"} for r in results)
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_unknown_kids_force_at_most_one_fetch_per_interval(monkeypatch):
+    cache = FirebaseCertCache()
+    calls = _counting_fetch(cache, {"k1": "cert"})
+
+    async def scenario():
+        await cache.get()
+        for i in range(50):
+            assert f"forged-{i}" not in await cache.get_for_kid(f"forged-{i}")
+
+    asyncio.run(scenario())
+    # The initial fetch only: the forced refresh window had not passed yet
+    assert len(calls) == 1
+
+    monkeypatch.setattr(auth_cache, "FORCED_REFRESH_MIN_INTERVAL_SECONDS", 0.0)
+    asyncio.run(cache.get_for_kid("rotated"))
+    assert len(calls) == 2
@@ -0,0 +1,66 @@
+import asyncio
+
+from app.services.credential_resolver import CredentialResolver
+
+
+class FakeSession:
+    """Answers credential queries from a dict of collection → documents."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = 0
+
+    async def query(self, collection, filters=None):
+        self.queries += 1
+        docs = self.docs.get(collection, [])
+        for field, op, value in filters or []:
+            if op == "==":
+                docs = [d for d in docs if d.get(field) == value]
+            elif op == "in":
+                docs = [d for d in docs if d.get(field) in value]
+        return docs
+
+
+def test_found_credentials_are_cached():
+    db = FakeSession({"twitter_credentials": [{"user_id": "u1", "is_active": True, "access_token": "t"}]})
+    resolver = CredentialResolver()
+
+    async def scenario():
+        assert (await resolver.get(db, "twitter", "u1"))["access_token"] == "t"
+        assert (await resolver.get(db, "twitter", "u1"))["access_token"] == "t"
+
+    asyncio.run(scenario())
+    assert db.queries == 1
+
+
+def test_missing_credentials_are_not_cached():
+    db = FakeSession({"twitter_credentials": []})
+    resolver = CredentialResolver()
+
+    async def scenario():
+        await resolver.prefetch(db, ["u1"], ["twitter"])
+        assert await resolver.get(db, "twitter", "u1") is None
+        # The user connects an account after the miss
+        db.docs["twitter_credentials"].append({"user_id": "u1", "is_active": True, "access_token": "t"})
+        assert (await resolver.get(db, "twitter", "u1"))["access_token"] == "t"
+
+    asyncio.run(scenario())
+
+
+def test_prefetch_caches_first_active_credential_per_user():
+    db = FakeSession({"facebook_credentials": [
+        {"user_id": "u1", "is_active": True, "page_id": "p1"},
+        {"user_id": "u1", "is_active": True, "page_id": "p2"},
+        {"user_id": "u2", "is_active": False, "page_id": "p3"},
+    ]})
+    resolver = CredentialResolver()
+
+    async def scenario():
+        await resolver.prefetch(db, ["u1", "u2"], ["facebook"])
+        queries = db.queries
+        assert (await resolver.get(db, "facebook", "u1"))["page_id"] == "p1"
+        assert db.queries == queries
+        assert await resolver.get(db, "facebook", "u2") is None
+        assert db.queries == queries + 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services import instagram_service
+from app.services.instagram_service import ContainerStatusTracker
+
+
+def test_tracker_survives_waiter_cancelled_mid_poll(monkeypatch):
+    monkeypatch.setattr(instagram_service, "initial_poll_delay", lambda video_bytes: 0.0)
+
+    async def fetch(container_ids, token, account_id):
+        await asyncio.sleep(0.05)
+        return {cid: {"id": cid, "status_code": "FINISHED"} for cid in container_ids}
+
+    monkeypatch.setattr(instagram_service, "fetch_container_statuses", fetch)
+
+    async def scenario():
+        tracker = ContainerStatusTracker()
+        cancelled = asyncio.create_task(tracker.wait("1", "token", "acct"))
+        survivor = asyncio.create_task(tracker.wait("2", "token", "acct"))
+        await asyncio.sleep(0.01)  # both are in the in-flight poll
+        cancelled.cancel()
+        status = await asyncio.wait_for(survivor, timeout=1)
+        assert status["status_code"] == "FINISHED"
+        assert not tracker._task.done()
+        tracker._task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_tracker_keeps_running_when_a_poll_raises(monkeypatch):
+    monkeypatch.setattr(instagram_service, "initial_poll_delay", lambda video_bytes: 0.0)
+
+    async def fetch(container_ids, token, account_id):
+        return {cid: {"id": cid, "status_code": "FINISHED"} for cid in container_ids}
+
+    monkeypatch.setattr(instagram_service, "fetch_container_statuses", fetch)
+
+    async def scenario():
+        tracker = ContainerStatusTracker()
+        poll, failures = tracker._poll, []
+
+        async def flaky_poll(due):
+            if not failures:
+                failures.append(due)
+                raise RuntimeError("boom")
+            await poll(due)
+
+        tracker._poll = flaky_poll
+        status = await asyncio.wait_for(tracker.wait("1", "token", "acct"), timeout=1)
+        assert failures and status["status_code"] == "FINISHED"
+        tracker._task.cancel()
+
+    asyncio.run(scenario())
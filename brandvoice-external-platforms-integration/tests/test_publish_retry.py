@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+import tweepy
+
+from app.core.config import get_settings
+from app.models.enums import PublishErrorKind, ScheduleState
+from app.services.instagram_service import InstagramPublishError
+from app.services.publish_retry import (
+    backoff_delay,
+    classify_error,
+    classify_result,
+    pending_platforms,
+    plan_outcome,
+)
+
+
+def _status_error(status: int, body=None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://graph.facebook.com/v23.0/me/media")
+    response = httpx.Response(status, json=body, request=request) if body is not None \
+        else httpx.Response(status, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def _tweepy_response(status: int):
+    response = httpx.Response(status, json={})
+    response.reason = "error"
+    return response
+
+
+# ── classify_error ──────────────────────────────────────────────────────
+@pytest.mark.parametrize("status, kind", [
+    (429, PublishErrorKind.transient),
+    (408, PublishErrorKind.transient),
+    (500, PublishErrorKind.transient),
+    (503, PublishErrorKind.transient),
+    (401, PublishErrorKind.auth),
+    (403, PublishErrorKind.auth),
+    (400, PublishErrorKind.permanent),
+    (404, PublishErrorKind.permanent),
+])
+def test_http_status_mapping(status, kind):
+    assert classify_error(_status_error(status)) == kind
+
+
+@pytest.mark.parametrize("error, kind", [
+    ({"code": 4}, PublishErrorKind.transient),
+    ({"code": 17}, PublishErrorKind.transient),
+    ({"code": 32}, PublishErrorKind.transient),
+    ({"code": 613}, PublishErrorKind.transient),
+    ({"code": 100, "is_transient": True}, PublishErrorKind.transient),
+    ({"code": 190}, PublishErrorKind.auth),
+    ({"code": 102}, PublishErrorKind.auth),
+    ({"code": 100}, PublishErrorKind.permanent),
+])
+def test_graph_error_body_wins_over_status(error, kind):
+    # Graph answers 400 for throttling and expired tokens alike
+    assert classify_error(_status_error(400, {"error": error})) == kind
+
+
+@pytest.mark.parametrize("payload, kind", [
+    ({"error": {"code": 4, "message": "Application request limit reached"}}, PublishErrorKind.transient),
+    ({"error": {"code": 613}}, PublishErrorKind.transient),
+    ({"error": {"code": 9007, "is_transient": True}}, PublishErrorKind.transient),
+    ({"error": {"code": 190, "message": "Error validating access token"}}, PublishErrorKind.auth),
+    ({"error": {"code": 102}}, PublishErrorKind.auth),
+    ({"error": {"code": 100, "message": "Invalid parameter"}}, PublishErrorKind.permanent),
+    ({"id": "1789", "status_code": "TIMEOUT"}, PublishErrorKind.transient),
+    ({"id": "1789", "status_code": "ERROR"}, PublishErrorKind.permanent),
+])
+def test_instagram_publish_error_mapping(payload, kind):
+    assert classify_error(InstagramPublishError("Instagram publish failed", payload)) == kind
+
+
+def test_transport_errors_are_transient():
+    assert classify_error(httpx.ConnectTimeout("timed out")) == PublishErrorKind.transient
+    assert classify_error(TimeoutError()) == PublishErrorKind.transient
+    assert classify_error(ConnectionError()) == PublishErrorKind.transient
+
+
+def test_tweepy_mapping():
+    assert classify_error(tweepy.TooManyRequests(_tweepy_response(429))) == PublishErrorKind.transient
+    assert classify_error(tweepy.TwitterServerError(_tweepy_response(503))) == PublishErrorKind.transient
+    assert classify_error(tweepy.Unauthorized(_tweepy_response(401))) == PublishErrorKind.auth
+    assert classify_error(tweepy.BadRequest(_tweepy_response(400))) == PublishErrorKind.permanent
+    assert classify_error(tweepy.TweepyException("connection reset")) == PublishErrorKind.transient
+
+
+def test_unknown_errors_are_permanent():
+    assert classify_error(ValueError("no media")) == PublishErrorKind.permanent
+
+
+def test_classify_result():
+    assert classify_result("success") is None
+    assert classify_result("video_success: 123") is None
+    assert classify_result("no_credentials") == PublishErrorKind.auth
+    assert classify_result("no_video") == PublishErrorKind.permanent
+    assert classify_result("something else") == PublishErrorKind.permanent
+
+
+# ── retry planning ──────────────────────────────────────────────────────
+def test_backoff_delay_is_jittered_exponential_and_capped():
+    settings = get_settings()
+    base, cap = settings.scheduler_retry_base_seconds, settings.scheduler_retry_max_seconds
+    for attempt in range(1, 12):
+        expected = min(cap, base * 2 ** (attempt - 1))
+        for _ in range(20):
+            assert expected / 2 <= backoff_delay(attempt) <= expected
+
+
+def test_pending_platforms_uses_retry_set():
+    sched = {"platforms": ["facebook", "x", "facebook"]}
+    assert pending_platforms(sched) == ["facebook", "x"]
+    assert pending_platforms({**sched, "retry_platforms": ["x"]}) == ["x"]
+
+
+def test_plan_outcome_retries_only_transient_platforms():
+    run_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    sched = {"platforms": ["facebook", "x"], "run_at": run_at}
+    update = plan_outcome(sched, {
+        "facebook": ("success", None),
+        "x": ("error: 503", PublishErrorKind.transient),
+    })
+    assert update["status"] == ScheduleState.upcoming.value
+    assert update["retry_platforms"] == ["x"]
+    assert update["run_at"] > datetime.now(timezone.utc)
+    assert update["attempt_count"] == 1
+    assert update["original_run_at"] == run_at
+    assert update["attempts"][0]["results"]["x"]["kind"] == "transient"
+
+
+def test_plan_outcome_publishes_after_successful_retry():
+    run_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    sched = {
+        "platforms": ["facebook", "x"],
+        "run_at": datetime.now(timezone.utc),
+        "original_run_at": run_at,
+        "attempt_count": 1,
+        "results": {"facebook": "success", "x": "error: 503"},
+        "retry_platforms": ["x"],
+    }
+    update = plan_outcome(sched, {"x": ("success", None)})
+    assert update["status"] == ScheduleState.published.value
+    assert update["results"] == {"facebook": "success", "x": "success"}
+    assert update["retry_platforms"] == []
+    assert update["attempt_count"] == 2
+    assert update["original_run_at"] == run_at
+
+
+def test_plan_outcome_fails_on_auth_and_permanent_errors():
+    sched = {"platforms": ["facebook", "youtube"]}
+    update = plan_outcome(sched, {
+        "facebook": ("no_credentials", PublishErrorKind.auth),
+        "youtube": ("no_video", PublishErrorKind.permanent),
+    })
+    assert update["status"] == ScheduleState.failed.value
+    assert update["retry_platforms"] == []
+
+
+def test_plan_outcome_stops_retrying_at_max_attempts():
+    attempts = get_settings().scheduler_retry_max_attempts
+    sched = {"platforms": ["x"], "attempt_count": attempts - 1}
+    update = plan_outcome(sched, {"x": ("error: 503", PublishErrorKind.transient)})
+    assert update["status"] == ScheduleState.failed.value
+    assert update["attempt_count"] == attempts
+
@@ -0,0 +1,41 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.services.schedule_dispatcher import ScheduleDispatcher
+from app.services.schedule_prestager import (
+    SchedulePrestager,
+    StagedSchedule,
+    schedule_version,
+    staged_schedules,
+)
+
+
+async def _noop(*args):
+    return None
+
+
+def test_tick_keeps_entries_of_schedules_being_published():
+    async def scenario():
+        dispatcher = ScheduleDispatcher(_noop)
+        dispatcher._wakeup = asyncio.Event()
+        run_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        due = {"id": "due", "run_at": run_at, "platforms": ["x"]}
+        gone = {"id": "gone", "run_at": run_at, "platforms": ["x"]}
+        dispatcher._apply([("due", due)])
+
+        discarded = []
+        prestager = SchedulePrestager(dispatcher, _noop, discard=discarded.append)
+        staged_schedules.put("due", StagedSchedule(version=schedule_version(due)))
+        staged_schedules.put("gone", StagedSchedule(version=schedule_version(gone)))
+        try:
+            # Taken off the heap: no longer upcoming, not dispatched yet
+            assert [s["id"] for s in dispatcher._pop_due(run_at.timestamp() + 5)] == ["due"]
+            await prestager._tick()
+            assert staged_schedules.peek("due") is not None
+            assert staged_schedules.peek("gone") is None
+            assert len(discarded) == 1
+        finally:
+            staged_schedules.pop("due")
+            staged_schedules.pop("gone")
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import twitter_service
+from app.services.twitter_service import fetch_media
+
+LIMIT = 1024
+
+
+def _serve(monkeypatch, body: bytes, declare_length: bool = True):
+    def handler(request):
+        if declare_length:
+            return httpx.Response(200, content=body)
+        # A streamed body goes out chunked, without content-length
+        async def chunks():
+            for i in range(0, len(body), 256):
+                yield body[i:i + 256]
+        return httpx.Response(200, content=chunks())
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(twitter_service, "get_http_client", lambda name: client)
+    monkeypatch.setattr(twitter_service.settings, "twitter_media_max_bytes", LIMIT)
+
+
+def test_fetch_media_returns_name_and_content(monkeypatch):
+    _serve(monkeypatch, b"x" * LIMIT)
+    name, content = asyncio.run(fetch_media("https://cdn.example.com/media/photo.png?sig=1"))
+    assert name == "photo.png"
+    assert content == b"x" * LIMIT
+
+
+def test_fetch_media_rejects_declared_oversize(monkeypatch):
+    _serve(monkeypatch, b"x" * (LIMIT + 1))
+    with pytest.raises(ValueError, match="too large"):
+        asyncio.run(fetch_media("https://cdn.example.com/clip.mp4"))
+
+
+def test_fetch_media_rejects_oversize_without_content_length(monkeypatch):
+    _serve(monkeypatch, b"x" * (LIMIT * 2), declare_length=False)
+    with pytest.raises(ValueError, match="too large"):
+        asyncio.run(fetch_media("https://cdn.example.com/clip.mp4"))
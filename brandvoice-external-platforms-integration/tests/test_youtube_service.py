@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from app.services.youtube_service import _SerializedRefreshCredentials, _YouTubeClient
+
+
+class FakeCredentials:
+    def __init__(self):
+        self.token = "t0"
+        self.refreshes = 0
+
+    def before_request(self, request, method, url, headers):
+        headers["authorization"] = f"Bearer {self.token}"
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = f"t{self.refreshes}"
+
+
+def _client(creds):
+    return _YouTubeClient(creds, None, "key", threading.Lock(), asyncio.Lock())
+
+
+def test_401s_for_the_same_token_refresh_once():
+    creds = FakeCredentials()
+    client = _client(creds)
+    first, second = _SerializedRefreshCredentials(client), _SerializedRefreshCredentials(client)
+
+    # Both uploads sent t0 and got a 401
+    first.before_request(None, "PUT", "https://upload", {})
+    second.before_request(None, "PUT", "https://upload", {})
+    first.refresh(None)
+    second.refresh(None)
+    assert creds.refreshes == 1
+    assert creds.token == "t1"
+
+    # The retried request carries the new token; a 401 for it refreshes again
+    headers = {}
+    second.before_request(None, "PUT", "https://upload", headers)
+    assert headers["authorization"] == "Bearer t1"
+    second.refresh(None)
+    assert creds.refreshes == 2
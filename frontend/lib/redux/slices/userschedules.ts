@@ -4,15 +4,23 @@ import axios from 'axios'
 export const fetchUserSchedules = createAsyncThunk(
     'userSchedules/fetch',
     async (userId: string) => {
-        const response = await axios.get(
-            `https://brandvoice-backend-v61p.onrender.com/api/v1/users/${userId}/schedules/`,
-            {
-                headers: {
-                    accept: 'application/json',
-                },
-            }
-        )
-        return response.data;
+        // The list is paged; follow X-Next-Cursor until the last (empty) one
+        const schedules = []
+        let cursor = ''
+        do {
+            const response = await axios.get(
+                `https://brandvoice-backend-v61p.onrender.com/api/v1/users/${userId}/schedules/`,
+                {
+                    headers: {
+                        accept: 'application/json',
+                    },
+                    params: cursor ? { cursor } : {},
+                }
+            )
+            schedules.push(...response.data)
+            cursor = response.headers['x-next-cursor'] || ''
+        } while (cursor)
+        return schedules;
     }
 )
 